@@ -0,0 +1,98 @@
+"""initial schema
+
+Revision ID: 4b7e2c9a1f03
+Revises:
+Create Date: 2026-10-16 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c9a1f03'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Databases created by the old create_all at startup already have these tables, so every
+# object is created only if missing; they join the migration history without a stamp.
+def upgrade() -> None:
+    op.create_table(
+        'leads',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('email', sa.String(length=320), nullable=False),
+        sa.Column('mobile', sa.String(length=32), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email', name='uq_leads_email'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'lead_email_filters',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('num_bits', sa.Integer(), nullable=False),
+        sa.Column('num_hashes', sa.Integer(), nullable=False),
+        sa.Column('item_count', sa.Integer(), nullable=False),
+        sa.Column('bits', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('mode', sa.String(length=16), nullable=False),
+        sa.Column('batch_size', sa.Integer(), nullable=True),
+        sa.Column('strip_plus_tags', sa.Boolean(), nullable=False),
+        sa.Column('filename', sa.String(length=512), nullable=True),
+        sa.Column('file_sha256', sa.String(length=64), nullable=True),
+        sa.Column('rows_estimated', sa.Integer(), nullable=True),
+        sa.Column('rows_parsed', sa.Integer(), nullable=False),
+        sa.Column('inserted_count', sa.Integer(), nullable=False),
+        sa.Column('duplicate_count', sa.Integer(), nullable=False),
+        sa.Column('in_file_duplicate_count', sa.Integer(), nullable=False),
+        sa.Column('existing_duplicate_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('last_committed_row', sa.Integer(), nullable=False),
+        sa.Column('rows_per_second', sa.Float(), nullable=True),
+        sa.Column('eta_seconds', sa.Float(), nullable=True),
+        sa.Column('errors', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('validation_errors', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('failure_reasons', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('error_report_id', sa.String(length=32), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_import_jobs_file_sha256', 'import_jobs', ['file_sha256'], if_not_exists=True)
+    op.create_table(
+        'lead_uploads',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('filename', sa.String(length=512), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('file_sha256', sa.String(length=64), nullable=True),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('lead_uploads')
+    op.drop_index('ix_import_jobs_file_sha256', table_name='import_jobs')
+    op.drop_table('import_jobs')
+    op.drop_table('lead_email_filters')
+    op.drop_table('leads')
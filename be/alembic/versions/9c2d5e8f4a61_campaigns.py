@@ -0,0 +1,57 @@
+"""campaigns
+
+Revision ID: 9c2d5e8f4a61
+Revises: d5bc8d59614a
+Create Date: 2026-10-16 23:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2d5e8f4a61'
+down_revision: Union[str, None] = 'd5bc8d59614a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'campaigns',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('channel', sa.String(length=16), nullable=False),
+        sa.Column('content', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('total_leads', sa.Integer(), nullable=False),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'campaign_results',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('campaign_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('lead_name', sa.String(length=255), nullable=False),
+        sa.Column('recipient', sa.String(length=320), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('detail', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_campaign_results_campaign_id_id', 'campaign_results', ['campaign_id', 'id'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_campaign_results_campaign_id_id', table_name='campaign_results')
+    op.drop_table('campaign_results')
+    op.drop_table('campaigns')
@@ -0,0 +1,27 @@
+"""import job lease
+
+Revision ID: a3c9d7e21b84
+Revises: f76350210650
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9d7e21b84'
+down_revision: Union[str, None] = 'f76350210650'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NULL counts as expired, so jobs left queued or running before this revision can be resumed.
+    op.add_column('import_jobs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('import_jobs', 'lease_expires_at')
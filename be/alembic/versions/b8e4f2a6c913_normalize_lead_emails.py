@@ -0,0 +1,150 @@
+"""normalize lead emails
+
+Revision ID: b8e4f2a6c913
+Revises: a3c9d7e21b84
+Create Date: 2026-10-17 09:40:00.000000
+
+Lowercases and trims every stored ``leads.email`` and adds ``ck_leads_email_normalized`` so
+that ``uq_leads_email`` matches case-insensitively.
+
+DATA LOSS: rows that become duplicates once normalized (e.g. ``Ann@x.com`` and ``ann@x.com``)
+cannot all stay. Per normalized email the row already stored normalized is kept, otherwise
+the oldest; the others are deleted from ``leads``. Every deleted row is first copied to
+``lead_email_duplicates`` (with the email it collapsed into) and the count is logged, so it
+can be reviewed or restored by hand. Downgrading keeps that table.
+
+Large tables are handled without long locks: the constraint is added NOT VALID (checked for
+new writes only) and validated at the end, and rows are normalized in keyset batches of
+BATCH_SIZE, each in its own transaction, so a failed run can simply be retried.
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f2a6c913'
+down_revision: Union[str, None] = 'a3c9d7e21b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 5000
+CONSTRAINT = "ck_leads_email_normalized"
+LOOKUP_INDEX = "ix_leads_email_normalized_tmp"
+
+
+def normalized(column: str) -> str:
+    return f"lower(btrim({column}, E' \\t\\r\\n'))"
+
+
+# One keyset batch of ``leads`` by id: unnormalized rows that collide with a normalized or an
+# older row are archived and deleted, the rest are normalized in place. Returns the last id
+# scanned (NULL when done) and the counts.
+NORMALIZE_BATCH = f"""
+WITH batch AS (
+    SELECT id, created_at, email, {normalized("email")} AS normalized
+    FROM leads
+    WHERE id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :batch_size
+),
+pending AS (
+    SELECT * FROM batch WHERE email <> normalized
+),
+doomed AS (
+    DELETE FROM leads l
+    USING pending p
+    WHERE l.id = p.id AND EXISTS (
+        SELECT 1 FROM leads o
+        WHERE o.id <> p.id
+          AND {normalized("o.email")} = p.normalized
+          AND (o.email = p.normalized OR (o.created_at, o.id) < (p.created_at, p.id))
+    )
+    RETURNING l.id, l.name, l.email, l.mobile, l.created_at
+),
+archived AS (
+    INSERT INTO lead_email_duplicates (id, name, email, mobile, created_at, kept_email)
+    SELECT id, name, email, mobile, created_at, {normalized("email")} FROM doomed
+    ON CONFLICT (id) DO NOTHING
+    RETURNING 1
+),
+updated AS (
+    UPDATE leads l
+    SET email = p.normalized
+    FROM pending p
+    WHERE l.id = p.id AND NOT EXISTS (SELECT 1 FROM doomed d WHERE d.id = p.id)
+    RETURNING 1
+)
+SELECT
+    (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id,
+    (SELECT count(*) FROM archived) AS deleted,
+    (SELECT count(*) FROM updated) AS updated
+"""
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS lead_email_duplicates (
+            id uuid PRIMARY KEY,
+            name varchar(255) NOT NULL,
+            email varchar(320) NOT NULL,
+            mobile varchar(32),
+            created_at timestamptz NOT NULL,
+            kept_email varchar(320) NOT NULL,
+            archived_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    # NOT VALID only takes a brief lock: new writes are checked at once, old rows below.
+    if context.is_offline_mode() or not _has_constraint():
+        op.create_check_constraint(CONSTRAINT, "leads", f"email = {normalized('email')}", postgresql_not_valid=True)
+
+    with op.get_context().autocommit_block():
+        # serves the duplicate lookup; dropped once every row is normalized
+        create_index_concurrently(LOOKUP_INDEX, "leads", [sa.text(normalized("email"))])
+        _normalize_in_batches()
+        op.drop_index(LOOKUP_INDEX, table_name="leads", postgresql_concurrently=True, if_exists=True)
+
+    # takes SHARE UPDATE EXCLUSIVE only, so leads stays readable and writable while it scans
+    op.execute(f"ALTER TABLE leads VALIDATE CONSTRAINT {CONSTRAINT}")
+    # The stored email filter hashed the old spellings; it is rebuilt from the table on next use.
+    op.execute("DELETE FROM lead_email_filters")
+
+
+def _has_constraint() -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": CONSTRAINT}
+    ).first() is not None
+
+
+def _normalize_in_batches() -> None:
+    start = "00000000-0000-0000-0000-000000000000"
+    if context.is_offline_mode():
+        # the script cannot loop; one pass over the whole table
+        op.execute(sa.text(NORMALIZE_BATCH).bindparams(after=start, batch_size=None))
+        return
+    bind = op.get_bind()
+    after, deleted, updated = start, 0, 0
+    while True:
+        last_id, batch_deleted, batch_updated = bind.execute(
+            sa.text(NORMALIZE_BATCH), {"after": after, "batch_size": BATCH_SIZE}
+        ).one()
+        if last_id is None:
+            break
+        after, deleted, updated = str(last_id), deleted + batch_deleted, updated + batch_updated
+    logger.info(f"Normalized {updated} lead emails")
+    if deleted:
+        logger.warning(
+            f"Deleted {deleted} leads whose email duplicated another lead once normalized; "
+            f"they are kept in lead_email_duplicates"
+        )
+
+
+def downgrade() -> None:
+    # lead_email_duplicates is kept: it holds the only copy of the deleted rows.
+    op.drop_constraint(CONSTRAINT, "leads", type_="check")
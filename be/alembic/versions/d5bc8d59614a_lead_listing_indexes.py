@@ -0,0 +1,55 @@
+"""lead listing indexes
+
+Revision ID: d5bc8d59614a
+Revises: 4b7e2c9a1f03
+Create Date: 2026-10-16 22:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5bc8d59614a'
+down_revision: Union[str, None] = '4b7e2c9a1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY cannot run inside a transaction, and keeps leads writable while building.
+    with op.get_context().autocommit_block():
+        create_index_concurrently("ix_leads_created_at_id", "leads", ["created_at", "id"])
+        create_index_concurrently(
+            "ix_leads_with_mobile", "leads", ["created_at", "id"],
+            postgresql_where=sa.text("mobile IS NOT NULL"),
+        )
+        create_index_concurrently(
+            "ix_leads_email_domain", "leads",
+            [sa.text("lower(split_part(email, '@', 2))"), "created_at", "id"],
+        )
+        create_index_concurrently(
+            "ix_leads_name_trgm", "leads", ["name"],
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        )
+        create_index_concurrently(
+            "ix_leads_email_trgm", "leads", ["email"],
+            postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_leads_email_trgm",
+            "ix_leads_name_trgm",
+            "ix_leads_email_domain",
+            "ix_leads_with_mobile",
+            "ix_leads_created_at_id",
+        ):
+            op.drop_index(name, table_name="leads", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,62 @@
+"""message outbox
+
+Revision ID: e1a7c3b95d24
+Revises: 9c2d5e8f4a61
+Create Date: 2026-10-16 23:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.db.migrations import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c3b95d24'
+down_revision: Union[str, None] = '9c2d5e8f4a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+    with op.get_context().autocommit_block():
+        create_index_concurrently('uq_campaigns_idempotency_key', 'campaigns', ['idempotency_key'], unique=True)
+    op.create_table(
+        'message_outbox',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('campaign_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=512), nullable=False),
+        sa.Column('channel', sa.String(length=16), nullable=False),
+        sa.Column('lead_name', sa.String(length=255), nullable=False),
+        sa.Column('recipient', sa.String(length=320), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key'),
+    )
+    op.create_index(
+        'ix_message_outbox_due', 'message_outbox', ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.create_index(
+        'ix_message_outbox_leased', 'message_outbox', ['locked_until'],
+        postgresql_where=sa.text("status = 'sending'"),
+    )
+    op.create_index('ix_message_outbox_campaign_id_status', 'message_outbox', ['campaign_id', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_table('message_outbox')
+    op.drop_index('uq_campaigns_idempotency_key', table_name='campaigns')
+    op.drop_column('campaigns', 'idempotency_key')
@@ -0,0 +1,36 @@
+"""sent messages ledger
+
+Revision ID: f76350210650
+Revises: e1a7c3b95d24
+Create Date: 2026-10-16 23:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f76350210650'
+down_revision: Union[str, None] = 'e1a7c3b95d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sent_messages',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('scope', sa.String(length=64), nullable=False),
+        sa.Column('channel', sa.String(length=16), nullable=False),
+        sa.Column('recipient', sa.String(length=320), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'channel', 'recipient', name='uq_sent_messages_scope_channel_recipient'),
+    )
+    op.create_index('ix_sent_messages_recipient_channel', 'sent_messages', ['recipient', 'channel'])
+
+
+def downgrade() -> None:
+    op.drop_table('sent_messages')
@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
-from app.schemas.health import HealthCheckResponse
+from app.core.config import settings
+from app.db.schema import schema_status
+from app.schemas.health import HealthCheckResponse, ReadinessResponse
 from app.utils.logger import get_logger
 
 router = APIRouter()
@@ -13,4 +15,22 @@ async def health_check():
     """
     health_logger.debug("Health check endpoint was called.")
 
-    return HealthCheckResponse(status="ok")
\ No newline at end of file
+    return HealthCheckResponse(status="ok")
+
+
+@router.get("/ready", tags=["health"], response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """
+    Readiness check: the database schema matched the bundled migrations at startup.
+
+    Served from the result cached by the startup check, so it does not touch the database.
+    """
+    ready = settings.DB_SCHEMA_CHECK == "off" or schema_status.up_to_date
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(
+        status="ready" if ready else "not_ready",
+        schema_revisions=sorted(schema_status.current),
+        expected_revisions=sorted(schema_status.expected),
+        detail=schema_status.error,
+    )
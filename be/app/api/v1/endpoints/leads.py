@@ -1,221 +1,753 @@
 from __future__ import annotations
 
-from io import BytesIO
-from typing import Optional, List, Tuple
+import functools
+import os
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Form, Depends, Header, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
-from openpyxl import load_workbook
 
-from app.db.database import get_db_session
-from app.db.models import Lead
-from app.schemas.leads import SMS, LeadBulkInsertResponse
+from app.core.config import settings
+from app.core.graphs.tools.siren import siren_client
+from app.core.leads.broadcast import SMS_MAX_LENGTH, SmsTemplateError, draft_sms_template, render_sms
+from app.core.leads.broadcast_stream import PreparedBroadcast, broadcast_stream_response
+from app.core.leads.components import component_registry
+from app.core.leads.copy_ingest import copy_import_rows
+from app.core.leads.dedup import create_deduplicator
+from app.core.leads.export import MEDIA_TYPES, export_campaign_results, export_leads
+from app.core.leads.fanout import SendOutcome, fan_out, siren_rate_limiter
+from app.core.leads.formats import XLSX, file_suffix, lead_file_batches
+from app.core.leads.importer import LeadImportError, import_rows, resolve_batch_size, spool_upload
+from app.core.leads.jobs import import_job_runner, job_source_path, lease_expiry, requeue_job
+from app.core.leads.lead_context import gather_linkedin_context
+from app.core.leads.ledger import ALREADY_SENT, content_scope, one_off_scope, sent_ledger
+from app.core.leads.listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, LeadFilters, list_leads
+from app.core.leads.outbox import OutboundMessage, campaign_progress, enqueue
+from app.core.leads.personalization import BatchPersonalizer, PersonalizationResult, PersonalizationTarget
+from app.core.leads.repository import lead_repository
+from app.core.leads.stream_ingest import NDJSONIngestResponse, ingest_ndjson
+from app.core.leads.uploads import (
+    assemble_upload, latest_job_for_file, list_parts, store_upload, write_part
+)
+from app.core.leads.validation import LeadValidator, report_path
+from app.db.database import get_db_session, get_read_db_session
+from app.db.models import Campaign, CampaignResult, ImportJob, LeadUpload
+from app.schemas.leads import (
+    SMS,
+    BroadcastDelivery,
+    BroadcastStreamFormat,
+    CampaignStatusResponse,
+    ImportJobResponse,
+    ImportJobStatus,
+    LeadBulkInsertResponse,
+    LeadExportFormat,
+    LeadIngestMode,
+    LeadListResponse,
+    LeadSearchMatch,
+    LeadUploadCreate,
+    LeadUploadPartResponse,
+    LeadUploadResponse,
+    ProductUpdateMode,
+    SmsMode,
+)
 
 
 router = APIRouter()
 
 
-def _normalize_header(s: Optional[str]) -> str:
-    return (s or "").strip().lower()
+def _suffix(filename: Optional[str]) -> str:
+    """File type of a lead file; uploads without a name are treated as workbooks."""
+    if not filename:
+        return XLSX
+    try:
+        return file_suffix(filename)
+    except LeadImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _resolve_source(file: Optional[UploadFile], file_path: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Return the path to import from and, for uploads, the spooled copy the caller must remove."""
+    if not file and not file_path:
+        raise HTTPException(status_code=400, detail="Either file or file_path must be provided")
+
+    if file is not None:
+        spooled_path = await spool_upload(file, suffix=_suffix(file.filename))
+        return spooled_path, spooled_path
 
+    _suffix(str(file_path))
+    return file_path, None
 
-def _extract_rows_from_sheet(ws) -> List[Tuple[str, str, Optional[str]]]:
-    # Expect headers: Lead Name, Lead Email, Lead Mobile (case-insensitive)
-    first_row = list(ws.iter_rows(min_row=1, max_row=1, values_only=True))[0]
-    header_map = {}
-    for idx, name in enumerate(first_row, start=1):
-        header_map[_normalize_header(name)] = idx
 
-    required = ["lead name", "lead email"]
-    for r in required:
-        if r not in header_map:
-            raise HTTPException(status_code=400, detail=f"Missing required column: {r}")
+@router.get("", response_model=LeadListResponse)
+async def get_leads(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    has_mobile: Optional[bool] = Query(None, description="Only leads with (true) or without (false) a mobile"),
+    email_domain: Optional[str] = Query(None, description="Only leads whose email is at this domain"),
+    created_after: Optional[datetime] = Query(None, description="Only leads created after this time"),
+    q: Optional[str] = Query(None, min_length=1, max_length=255, description="Search name and email"),
+    match: LeadSearchMatch = Query(LeadSearchMatch.PREFIX, description="How q matches: prefix or contains"),
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    """List leads newest first, one keyset-paginated page at a time."""
+    filters = LeadFilters(
+        has_mobile=has_mobile, email_domain=email_domain, created_after=created_after, q=q, match=match
+    )
+    try:
+        return await list_leads(db, filters, cursor=cursor, limit=limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/bulk-insert", response_model=LeadBulkInsertResponse, status_code=status.HTTP_201_CREATED)
+async def bulk_insert_leads(
+    file: Optional[UploadFile] = File(None, description="Lead file to upload (.xlsx, .csv, .parquet or .arrow)"),
+    file_path: Optional[str] = Form(None, description="Local server path to a lead file (.xlsx, .csv, .parquet or .arrow)"),
+    batch_size: Optional[int] = Form(None, description="Rows per INSERT batch (defaults to LEAD_IMPORT_BATCH_SIZE)"),
+    mode: LeadIngestMode = Form(LeadIngestMode.INSERT, description="Ingest path: batched INSERT or COPY via a staging table"),
+    strip_plus_tags: bool = Form(False, description="Treat user+tag@domain as user@domain when detecting duplicates"),
+    error_report: bool = Form(False, description="Write every failing row to a downloadable CSV"),
+    db: AsyncSession = Depends(get_db_session),
+):
+    spooled_path = None
+    try:
+        source_path, spooled_path = await _resolve_source(file, file_path)
+        dedup = create_deduplicator(strip_plus=strip_plus_tags)
+        validator = LeadValidator(write_report=error_report)
+        rows = lead_file_batches(source_path, resolve_batch_size(batch_size))
+        ingest = copy_import_rows if mode == LeadIngestMode.COPY else import_rows
+        return await ingest(db, rows, batch_size=batch_size, dedup=dedup, validator=validator)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to process file: {e}")
+    finally:
+        if spooled_path:
+            os.unlink(spooled_path)
 
-    name_idx = header_map.get("lead name")
-    email_idx = header_map.get("lead email")
-    mobile_idx = header_map.get("lead mobile")
 
-    rows: List[Tuple[str, str, Optional[str]]] = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        name = (row[name_idx - 1] if name_idx else None) or ""
-        email = (row[email_idx - 1] if email_idx else None) or ""
-        mobile = (row[mobile_idx - 1] if mobile_idx else None) if mobile_idx else None
-        if not str(name).strip() and not str(email).strip():
-            # skip completely empty lines
-            continue
-        rows.append((str(name).strip(), str(email).strip(), str(mobile).strip() if mobile is not None else None))
-    return rows
+@router.post("/stream", response_class=NDJSONIngestResponse)
+async def stream_leads(
+    request: Request,
+    batch_size: Optional[int] = Query(None, description="Rows per INSERT batch (defaults to LEAD_IMPORT_BATCH_SIZE)"),
+    strip_plus_tags: bool = Query(False, description="Treat user+tag@domain as user@domain when detecting duplicates"),
+):
+    """
+    Import leads sent as NDJSON, one ``LeadIn`` object per line.
 
+    The body is consumed as it arrives and committed batch by batch. The response is NDJSON
+    too: ``progress`` lines while the import runs and a final ``result`` (or ``error``)
+    line. Clients should read the response while still sending, otherwise the import
+    pauses once the unread progress lines fill the connection.
+    """
+    return NDJSONIngestResponse(ingest_ndjson(request.stream(), batch_size, strip_plus_tags))
 
-async def _bulk_insert_leads(rows: List[Tuple[str, str, Optional[str]]], db: AsyncSession) -> Tuple[int, int, int, List[str]]:
-    total = len(rows)
-    if total == 0:
-        return 0, 0, 0, []
 
-    payload = [
-        {"name": name, "email": email, "mobile": mobile}
-        for name, email, mobile in rows
-        if email  # ensure email is present
-    ]
+def _check_import_capacity() -> None:
+    if not import_job_runner.has_capacity():
+        raise HTTPException(status_code=429, detail="Too many lead imports in progress, retry later")
 
-    valid = len(payload)
-    if valid == 0:
-        return total, 0, 0, ["No valid rows with email found"]
 
-    stmt = insert(Lead).values(payload)
-    stmt = stmt.on_conflict_do_nothing(index_elements=[Lead.email]).returning(Lead.id)
+def _submit_job(job: ImportJob, path: str, cleanup: bool = False) -> None:
+    import_job_runner.submit(
+        job.id,
+        path,
+        LeadIngestMode(job.mode),
+        batch_size=job.batch_size,
+        strip_plus_tags=job.strip_plus_tags,
+        cleanup=cleanup,
+    )
 
-    result = await db.execute(stmt)
-    inserted_ids = result.fetchall()
-    inserted = len(inserted_ids)
-    duplicate = valid - inserted
-    failed = total - valid
 
-    return total, inserted, duplicate, []
+async def _import_stored_file(
+    db: AsyncSession,
+    response: Response,
+    sha256: str,
+    path: str,
+    filename: Optional[str],
+    mode: LeadIngestMode,
+    batch_size: Optional[int],
+    strip_plus_tags: bool,
+) -> ImportJobResponse:
+    """
+    Import a file from the content store, reusing earlier work on the same content.
 
+    A completed import is returned as-is (200) without parsing, an import in progress is
+    returned to poll, and a failed one, or one abandoned by a process that died, is resumed
+    from its last committed batch with this request's ``batch_size`` and
+    ``strip_plus_tags``. A resume must use the same ``mode`` (409 otherwise): the committed
+    batches it continues from were written by that ingest path.
+    """
+    previous = await latest_job_for_file(db, sha256)
+    if previous is not None and previous.status == ImportJobStatus.COMPLETED.value:
+        response.status_code = status.HTTP_200_OK
+        return ImportJobResponse.model_validate(previous)
 
-@router.post("/bulk-insert", response_model=LeadBulkInsertResponse, status_code=status.HTTP_201_CREATED)
-async def bulk_insert_leads(
-    file: Optional[UploadFile] = File(None, description="Excel file to upload (.xlsx)"),
-    file_path: Optional[str] = Form(None, description="Local server path to Excel file (.xlsx)"),
+    if previous is not None:
+        if previous.mode != mode.value:
+            raise HTTPException(
+                status_code=409,
+                detail=f"This file's earlier import (job {previous.id}) used mode '{previous.mode}'; "
+                "re-submit it with that mode to resume it",
+            )
+        if not await requeue_job(db, previous, batch_size=batch_size, strip_plus_tags=strip_plus_tags):
+            # still running in a live process
+            return ImportJobResponse.model_validate(previous)
+        job = previous
+    else:
+        job = ImportJob(
+            status=ImportJobStatus.QUEUED.value,
+            mode=mode.value,
+            batch_size=batch_size,
+            strip_plus_tags=strip_plus_tags,
+            filename=filename,
+            file_sha256=sha256,
+            lease_expires_at=lease_expiry(),
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+
+    _submit_job(job, path)
+    return ImportJobResponse.model_validate(job)
+
+
+@router.post("/imports", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_import_job(
+    response: Response,
+    file: Optional[UploadFile] = File(None, description="Lead file to upload (.xlsx, .csv, .parquet or .arrow)"),
+    file_path: Optional[str] = Form(None, description="Local server path to a lead file (.xlsx, .csv, .parquet or .arrow)"),
+    batch_size: Optional[int] = Form(None, description="Rows per INSERT batch (defaults to LEAD_IMPORT_BATCH_SIZE)"),
+    mode: LeadIngestMode = Form(LeadIngestMode.INSERT, description="Ingest path: batched INSERT or COPY via a staging table"),
+    strip_plus_tags: bool = Form(False, description="Treat user+tag@domain as user@domain when detecting duplicates"),
     db: AsyncSession = Depends(get_db_session),
 ):
-    if not file and not file_path:
-        raise HTTPException(status_code=400, detail="Either file or file_path must be provided")
+    """
+    Queue a lead import in the background and return the job to poll.
+
+    Uploads are kept in the content store, so re-posting a file that was already imported
+    returns the earlier result immediately.
+    """
+    _check_import_capacity()
+
+    if file is not None:
+        sha256, path = await store_upload(file, suffix=_suffix(file.filename))
+        return await _import_stored_file(
+            db, response, sha256, path, file.filename, mode, batch_size, strip_plus_tags
+        )
+
+    source_path, _ = await _resolve_source(None, file_path)
+    job = ImportJob(
+        status=ImportJobStatus.QUEUED.value,
+        mode=mode.value,
+        batch_size=batch_size,
+        strip_plus_tags=strip_plus_tags,
+        filename=file_path,
+        lease_expires_at=lease_expiry(),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    _submit_job(job, source_path)
+    return ImportJobResponse.model_validate(job)
+
+
+@router.get("/imports/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Report the status and progress of a background lead import."""
+    job = await db.get(ImportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return ImportJobResponse.model_validate(job)
+
+
+@router.post("/imports/{job_id}/resume", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resume_import_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Resume a failed import, or one abandoned by a process that died (its lease lapsed),
+    from its last committed batch.
+    """
+    _check_import_capacity()
+    job = await db.get(ImportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.status == ImportJobStatus.COMPLETED.value:
+        raise HTTPException(status_code=409, detail="This import has already completed")
+
+    path = job_source_path(job)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=409, detail="The source file for this import is no longer available")
+
+    if not await requeue_job(db, job):
+        raise HTTPException(status_code=409, detail=f"This import is still in progress (status: {job.status})")
 
+    _submit_job(job, path)
+    return ImportJobResponse.model_validate(job)
+
+
+@router.get("/validation-reports/{report_id}")
+async def download_validation_report(
+    report_id: str = Path(..., pattern="^[0-9a-f]{32}$", description="error_report_id from an import result"),
+):
+    """Download the CSV of rows that failed validation during an import."""
+    path = report_path(report_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Validation report not found")
+    return FileResponse(path, media_type="text/csv", filename=f"lead-import-errors-{report_id}.csv")
+
+
+def _export_response(chunks, export_format: LeadExportFormat, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
+
+
+@router.get("/export")
+async def export_lead_table(
+    format: LeadExportFormat = Query(LeadExportFormat.CSV, description="csv, ndjson, xlsx, parquet or arrow (IPC stream)"),
+):
+    """Stream every lead in creation order."""
+    return _export_response(export_leads(format), format, "leads")
+
+
+@router.get("/campaigns/{campaign_id}/results/export")
+async def export_campaign_result_table(
+    campaign_id: uuid.UUID,
+    format: LeadExportFormat = Query(LeadExportFormat.CSV, description="csv, ndjson, xlsx, parquet or arrow (IPC stream)"),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Stream the per-lead outcomes of a broadcast."""
+    if await db.get(Campaign, campaign_id) is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return _export_response(export_campaign_results(campaign_id, format), format, f"campaign-{campaign_id}")
+
+
+@router.post("/uploads", response_model=LeadUploadResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload_in: LeadUploadCreate,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Start a resumable chunked upload of a lead file."""
+    _suffix(upload_in.filename)
+    upload = LeadUpload(filename=upload_in.filename)
+    db.add(upload)
+    await db.commit()
+    await db.refresh(upload)
+    return LeadUploadResponse.model_validate(upload)
+
+
+async def _get_open_upload(db: AsyncSession, upload_id: uuid.UUID) -> LeadUpload:
+    upload = await db.get(LeadUpload, upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if upload.status != "open":
+        raise HTTPException(status_code=409, detail="Upload is already completed")
+    return upload
+
+
+@router.get("/uploads/{upload_id}", response_model=LeadUploadResponse)
+async def get_upload(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Report an upload, including which parts have arrived, so a client can resume it."""
+    upload = await db.get(LeadUpload, upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    result = LeadUploadResponse.model_validate(upload)
+    result.parts = list_parts(upload_id)
+    return result
+
+
+@router.put("/uploads/{upload_id}/parts/{part_number}", response_model=LeadUploadPartResponse)
+async def upload_part(
+    upload_id: uuid.UUID,
+    part_number: int = Path(..., ge=1, description="1-based part number"),
+    file: UploadFile = File(..., description="Part contents"),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Upload (or re-upload) one part of a chunked upload."""
+    await _get_open_upload(db, upload_id)
+    size = await write_part(upload_id, part_number, file)
+    return LeadUploadPartResponse(part_number=part_number, size_bytes=size)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def complete_upload(
+    upload_id: uuid.UUID,
+    response: Response,
+    total_parts: Optional[int] = Form(None, description="Number of parts the client sent"),
+    batch_size: Optional[int] = Form(None, description="Rows per INSERT batch (defaults to LEAD_IMPORT_BATCH_SIZE)"),
+    mode: LeadIngestMode = Form(LeadIngestMode.INSERT, description="Ingest path: batched INSERT or COPY via a staging table"),
+    strip_plus_tags: bool = Form(False, description="Treat user+tag@domain as user@domain when detecting duplicates"),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Assemble the uploaded parts, store the file by SHA-256 and import it."""
+    _check_import_capacity()
+    upload = await _get_open_upload(db, upload_id)
     try:
-        if file is not None:
-            if file.filename and not file.filename.lower().endswith(".xlsx"):
-                raise HTTPException(status_code=400, detail="Only .xlsx files are supported")
-            content = await file.read()
-            wb = load_workbook(filename=BytesIO(content), read_only=True, data_only=True)
+        sha256, path, size = await assemble_upload(upload_id, total_parts, suffix=_suffix(upload.filename))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    upload.status = "completed"
+    upload.file_sha256 = sha256
+    upload.size_bytes = size
+    upload.completed_at = func.now()
+    await db.commit()
+
+    return await _import_stored_file(
+        db, response, sha256, path, upload.filename, mode, batch_size, strip_plus_tags
+    )
+
+
+async def _create_campaign(
+    db: AsyncSession, channel: str, content: dict, total_leads: int, idempotency_key: Optional[str] = None
+) -> Campaign:
+    campaign = Campaign(channel=channel, content=content, total_leads=total_leads, idempotency_key=idempotency_key)
+    db.add(campaign)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # a concurrent request with the same key created it first
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is already in progress")
+    return campaign
+
+
+async def _campaign_status(db: AsyncSession, campaign: Campaign) -> CampaignStatusResponse:
+    result = CampaignStatusResponse.model_validate(campaign)
+    result.outbox = await campaign_progress(db, campaign.id)
+    return result
+
+
+def _campaign_result(campaign: Campaign, name: str, recipient: str, outcome: dict) -> CampaignResult:
+    return CampaignResult(
+        campaign_id=campaign.id,
+        lead_name=name,
+        recipient=recipient,
+        status=outcome["status"],
+        detail=outcome.get("agent_response") or outcome.get("error"),
+    )
+
+
+async def _finish_campaign(db: AsyncSession, campaign: Campaign, sent_count: int, failed_count: int) -> None:
+    campaign.sent_count = sent_count
+    campaign.failed_count = failed_count
+    campaign.finished_at = func.now()
+    await db.commit()
+
+
+def _record_outcomes(
+    db: AsyncSession, campaign: Campaign, leads, outcomes: List[SendOutcome], recipient_key: str, sent_status: str = "sent"
+) -> Tuple[int, int, int, List[dict]]:
+    """Turn fan-out outcomes into response entries and campaign results; returns (sent, failed, skipped, results)."""
+    sent_count = skipped_count = 0
+    results = []
+    for (name, recipient), outcome in zip(leads, outcomes):
+        if outcome.ok:
+            sent_count += 1
+            results.append({"name": name, recipient_key: recipient, "status": sent_status, "agent_response": outcome.value})
+        elif outcome.skipped:
+            skipped_count += 1
+            results.append({"name": name, recipient_key: recipient, "status": "skipped", "error": outcome.error})
         else:
-            if not str(file_path).lower().endswith(".xlsx"):
-                raise HTTPException(status_code=400, detail="Only .xlsx files are supported")
-            wb = load_workbook(filename=file_path, read_only=True, data_only=True)
-
-        ws = wb.active
-        rows = _extract_rows_from_sheet(ws)
-        total, inserted, duplicate, errors = await _bulk_insert_leads(rows, db)
-        return LeadBulkInsertResponse(
-            total_rows=total,
-            inserted_count=inserted,
-            duplicate_count=duplicate,
-            failed_count=total - (inserted + duplicate),
-            errors=errors,
+            results.append({"name": name, recipient_key: recipient, "status": "failed", "error": outcome.error})
+        db.add(_campaign_result(campaign, name, recipient, results[-1]))
+    return sent_count, len(leads) - sent_count - skipped_count, skipped_count, results
+
+
+def _broadcast_scope(channel: str, content, resend: bool) -> str:
+    """Ledger scope of a broadcast: its content, or a fresh scope when it is sent again on purpose."""
+    return one_off_scope() if resend else content_scope(channel, content)
+
+
+async def _exclude_contacted(read_db: AsyncSession, channel: str, leads):
+    """Drop the leads that were ever sent anything on ``channel``."""
+    contacted = await sent_ledger.contacted(read_db, channel, [recipient for _, recipient in leads])
+    return [lead for lead in leads if lead[1] not in contacted]
+
+
+async def _broadcast_inline(
+    db: AsyncSession,
+    channel: str,
+    leads,
+    recipient_key: str,
+    prepared: PreparedBroadcast,
+    idempotency_key: Optional[str] = None,
+    scope: Optional[str] = None,
+) -> dict:
+    """
+    Send a prepared broadcast during the request and return every lead's outcome. With a
+    ledger ``scope``, leads already sent that scope are skipped.
+    """
+    campaign = await _create_campaign(db, channel, prepared.content, len(leads), idempotency_key)
+    send = prepared.send
+    if scope is not None:
+        await sent_ledger.preload(db, scope, channel)
+        send = sent_ledger.guard(send, scope, channel, leads)
+    outcomes = await fan_out(
+        range(len(leads)),
+        send,
+        concurrency=prepared.concurrency,
+        timeout=prepared.timeout,
+        rate_limiter=prepared.rate_limiter,
+    )
+    sent_count, failed_count, skipped_count, results = _record_outcomes(
+        db, campaign, leads, outcomes, recipient_key, prepared.sent_status
+    )
+    await _finish_campaign(db, campaign, sent_count, failed_count)
+    return {
+        "campaign_id": str(campaign.id),
+        **prepared.stats,
+        "total_leads": len(leads),
+        "sent_count": sent_count,
+        "failed_count": failed_count,
+        "skipped_count": skipped_count,
+        "results": results,
+    }
+
+
+async def _prepare_sms_template(sms: SMS, leads) -> PreparedBroadcast:
+    """Draft one {name} template; each send renders it for the lead and sends it through Siren."""
+    try:
+        template = await draft_sms_template(sms.content, (name for name, _ in leads))
+    except SmsTemplateError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    async def send(index: int) -> str:
+        name, mobile = leads[index]
+        message = render_sms(template, name)
+        await siren_client.send_sms(mobile, message)
+        return message
+
+    return PreparedBroadcast(
+        {**sms.model_dump(mode="json"), "template": template}, send, {"template": template, "llm_calls": 1}
+    )
+
+
+def _personalized_sender(leads, personalized: PersonalizationResult, send):
+    """Send each lead the message written for it (keyed by its index) with ``send``."""
+
+    async def deliver(index: int) -> str:
+        message = personalized.messages.get(str(index))
+        if message is None:
+            raise ValueError(f"Personalization failed: {personalized.failures.get(str(index), 'no message')}")
+        await send(leads[index][1], message)
+        return f"{message.subject}\n\n{message.body}" if message.subject else message.body
+
+    return deliver
+
+
+async def _prepare_sms_batched(sms: SMS, leads) -> PreparedBroadcast:
+    """Write a personalized SMS per lead, many leads per LLM call; each is sent directly."""
+    personalizer = BatchPersonalizer(
+        "Write a friendly, conversational SMS for each lead based on the message below, "
+        f"mentioning them by name.\n\nMessage:\n{sms.content}",
+        max_length=SMS_MAX_LENGTH,
+    )
+    personalized = await personalizer.personalize(
+        [PersonalizationTarget(str(index), name) for index, (name, _) in enumerate(leads)]
+    )
+    send = _personalized_sender(
+        leads, personalized, lambda mobile, message: siren_client.send_sms(mobile, message.body)
+    )
+    return PreparedBroadcast(sms.model_dump(mode="json"), send, personalized.stats.as_dict())
+
+
+async def _prepare_sms_agent(sms: SMS, leads) -> PreparedBroadcast:
+    """Borrow the Siren SMS agent; each send has it write and send one lead's SMS."""
+    agent_executor = component_registry.sms_agent
+
+    async def send(index: int) -> str:
+        name, mobile = leads[index]
+        agent_input = f"""
+        Send a message using the following details:
+        - Channel: SMS
+        - Recipient mobile number: {mobile}
+        - Message content: Personalize this for "{name}": {sms.content}
+        
+        Make the message personal by adding their name naturally and keep it conversational and friendly.
+        Ensure you provide the recipient mobile number in the correct field for SMS channel.
+        """
+        result = await agent_executor.ainvoke({"input": agent_input})
+        return result.get("output", "Message sent successfully")
+
+    return PreparedBroadcast(
+        sms.model_dump(mode="json"), send, timeout=settings.BROADCAST_AGENT_TIMEOUT, rate_limiter=siren_rate_limiter
+    )
+
+
+_SMS_PREPARERS = {
+    SmsMode.AGENT: _prepare_sms_agent,
+    SmsMode.TEMPLATE: _prepare_sms_template,
+    SmsMode.BATCHED: _prepare_sms_batched,
+}
+
+
+async def _sms_outbox_broadcast(
+    db: AsyncSession, sms: SMS, leads, idempotency_key: Optional[str], scope: str
+) -> dict:
+    """
+    Write the messages up front and queue them in the outbox; workers deliver them. Leads
+    already sent ``scope`` get no message, and workers reserve each message in the sent
+    ledger before sending it, so overlapping broadcasts of the same content send it once.
+    """
+    messages: List[OutboundMessage] = []
+    rejected: List[Tuple[str, str, str]] = []
+    content = sms.model_dump(mode="json")
+    extra: dict = {}
+    total_leads = len(leads)
+    already_sent = await sent_ledger.sent_recipients(db, scope, "sms")
+    skipped = [lead for lead in leads if lead[1] in already_sent]
+    leads = [lead for lead in leads if lead[1] not in already_sent]
+
+    # no LLM call if every lead already got this content
+    if leads and sms.mode == SmsMode.TEMPLATE:
+        try:
+            template = await draft_sms_template(sms.content, (name for name, _ in leads))
+        except SmsTemplateError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+        content["template"] = template
+        extra = {"template": template, "llm_calls": 1}
+        for name, mobile in leads:
+            try:
+                messages.append(OutboundMessage(name, mobile, render_sms(template, name)))
+            except ValueError as e:
+                rejected.append((name, mobile, str(e)))
+    elif leads:
+        personalizer = BatchPersonalizer(
+            "Write a friendly, conversational SMS for each lead based on the message below, "
+            f"mentioning them by name.\n\nMessage:\n{sms.content}",
+            max_length=SMS_MAX_LENGTH,
         )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to process file: {e}")
+        personalized = await personalizer.personalize(
+            [PersonalizationTarget(str(index), name) for index, (name, _) in enumerate(leads)]
+        )
+        extra = personalized.stats.as_dict()
+        for index, (name, mobile) in enumerate(leads):
+            message = personalized.messages.get(str(index))
+            if message is None:
+                reason = personalized.failures.get(str(index), "no message")
+                rejected.append((name, mobile, f"Personalization failed: {reason}"))
+            else:
+                messages.append(OutboundMessage(name, mobile, message.body))
+
+    campaign = await _create_campaign(db, "sms", content, total_leads, idempotency_key)
+    for name, mobile, error in rejected:
+        db.add(_campaign_result(campaign, name, mobile, {"status": "failed", "error": error}))
+    for name, mobile in skipped:
+        db.add(_campaign_result(campaign, name, mobile, {"status": "skipped", "error": ALREADY_SENT}))
+    queued = await enqueue(db, campaign, messages, scope=scope)
+    campaign.failed_count = len(rejected)
+    if not queued:
+        campaign.finished_at = func.now()
+    await db.commit()
+    return {
+        "campaign_id": str(campaign.id),
+        "status": "queued",
+        "total_leads": total_leads,
+        "queued_count": queued,
+        "failed_count": len(rejected),
+        "skipped_count": len(skipped),
+        **extra,
+        "message": f"SMS broadcast queued: {queued} messages, {len(rejected)} failed, {len(skipped)} already sent",
+    }
+
+
+@router.get("/campaigns/{campaign_id}", response_model=CampaignStatusResponse)
+async def get_campaign(
+    campaign_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Report a broadcast's counters and, for queued broadcasts, its outbox progress."""
+    campaign = await db.get(Campaign, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return await _campaign_status(db, campaign)
+
+
+_STREAM_QUERY = Query(
+    None,
+    description="Stream each lead's outcome and periodic counters as they happen "
+    "(ndjson lines or sse events) instead of returning every result at the end",
+)
 
 
 @router.post("/sms", status_code=status.HTTP_200_OK)
 async def sms(
     sms: SMS,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", max_length=255,
+        description="Retries with the same key return the original campaign instead of sending again",
+    ),
+    stream: Optional[BroadcastStreamFormat] = _STREAM_QUERY,
     db: AsyncSession = Depends(get_db_session),
+    read_db: AsyncSession = Depends(get_read_db_session),
 ):
-    """Send personalized SMS to all leads using SirenAgentToolkit."""
+    """
+    Send personalized SMS to all leads.
+
+    In agent mode an LLM agent writes and sends each message with SirenAgentToolkit; in
+    template mode one LLM call drafts a {name} template that is rendered and sent per lead;
+    in batched mode every lead gets its own message, written many leads per LLM call.
+
+    With outbox delivery the messages are queued and the campaign id is returned at once;
+    progress is at GET /leads/campaigns/{campaign_id}. With ``stream`` the outcomes are
+    streamed as they finish instead of being collected into one response.
+
+    Leads that were already sent this content are skipped unless ``resend`` is set, so a
+    retried broadcast only reaches the leads the first attempt missed; with
+    ``exclude_contacted`` leads that were ever sent an SMS are left out.
+    """
     try:
-        from sqlalchemy import select
-        result = await db.execute(
-            select(Lead.name, Lead.mobile).where(Lead.mobile.isnot(None))
-        )
-        leads = result.fetchall()
+        if idempotency_key:
+            existing = await db.scalar(select(Campaign).where(Campaign.idempotency_key == idempotency_key))
+            if existing is not None:
+                status_ = await _campaign_status(db, existing)
+                return {"campaign_id": str(existing.id), "duplicate": True, **status_.model_dump(mode="json")}
+        if sms.delivery == BroadcastDelivery.OUTBOX and sms.mode == SmsMode.AGENT:
+            raise HTTPException(status_code=400, detail="Outbox delivery needs template or batched mode")
+        if sms.delivery == BroadcastDelivery.OUTBOX and stream:
+            raise HTTPException(status_code=400, detail="Streaming needs inline delivery")
+
+        leads = await lead_repository.mobile_recipients(read_db)
+        if sms.exclude_contacted:
+            leads = await _exclude_contacted(read_db, "sms", leads)
         
         if not leads:
             raise HTTPException(status_code=404, detail="No leads with mobile numbers found")
-        
-        from app.core.config import settings
-        from langchain_openai import ChatOpenAI
-        from langchain.agents import AgentExecutor, create_tool_calling_agent
-        from langchain_core.prompts import ChatPromptTemplate
-        from agenttoolkit.langchain import SirenAgentToolkit
-        
-        llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            api_key=settings.OPENAI_API_KEY
-        )
-        
-        siren_toolkit = SirenAgentToolkit(
-            api_key=settings.SIREN_API_KEY,
-            configuration={
-                "actions": {
-                    "messaging": {
-                        "create": True,
-                        "read": True,
-                    },
-                    "templates": {
-                        "read": True,
-                        "create": True,
-                    }
-                },
-            },
+
+        scope = _broadcast_scope("sms", sms.content, sms.resend)
+        if sms.delivery == BroadcastDelivery.OUTBOX:
+            response.status_code = status.HTTP_202_ACCEPTED
+            return await _sms_outbox_broadcast(db, sms, leads, idempotency_key, scope)
+
+        prepare = functools.partial(_SMS_PREPARERS[sms.mode], sms, leads)
+        if stream:
+            return broadcast_stream_response("sms", leads, "mobile", prepare, stream, idempotency_key, scope)
+
+        outcome = await _broadcast_inline(db, "sms", leads, "mobile", await prepare(), idempotency_key, scope)
+        outcome["message"] = (
+            f"SMS broadcast completed: {outcome['sent_count']} sent, {outcome['failed_count']} failed, "
+            f"{outcome['skipped_count']} already sent"
         )
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a helpful assistant that can send SMS messages using Siren. 
-            
-            IMPORTANT: For SMS channel, always provide:
-            - channel: "SMS"
-            - recipient_value: the mobile number (e.g., "+919188065817")
-            - body: the message content
-            
-            When sending messages, personalize them with the recipient's name and make them conversational and friendly. Keep SMS messages under 160 characters when possible."""),
-            ("human", "{input}"),
-            ("placeholder", "{agent_scratchpad}"),
-        ])
-        
-        tools = siren_toolkit.get_tools()
-        
-        
-        agent = create_tool_calling_agent(llm, tools, prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
-        
-        sent_count = 0
-        failed_count = 0
-        results = []
-        
-        for name, mobile in leads:
-            try:
-                agent_input = f"""
-                Send a message using the following details:
-                - Channel: SMS
-                - Recipient mobile number: {mobile}
-                - Message content: Personalize this for "{name}": {sms.content}
-                
-                Make the message personal by adding their name naturally and keep it conversational and friendly.
-                Ensure you provide the recipient mobile number in the correct field for SMS channel.
-                """
-                
-                result = agent_executor.invoke({"input": agent_input})
-                
-                sent_count += 1
-                results.append({
-                    "name": name,
-                    "mobile": mobile, 
-                    "status": "sent",
-                    "agent_response": result.get("output", "Message sent successfully")
-                })
-                    
-            except Exception as e:
-                failed_count += 1
-                results.append({
-                    "name": name,
-                    "mobile": mobile,
-                    "status": "failed", 
-                    "error": str(e)
-                })
-        
-        return {
-            "total_leads": len(leads),
-            "sent_count": sent_count,
-            "failed_count": failed_count,
-            "results": results,
-            "message": f"SMS broadcast completed: {sent_count} sent, {failed_count} failed"
-        }
+        return outcome
         
     except HTTPException:
         raise
@@ -223,136 +755,103 @@ async def sms(
         raise HTTPException(status_code=500, detail=f"SMS broadcast failed: {str(e)}")
 
 
+async def _prepare_product_batched(product_info: dict, leads) -> PreparedBroadcast:
+    """Fetch each lead's LinkedIn profile and posts, then write the emails in batched LLM calls."""
+    contexts = await gather_linkedin_context(leads)
+    personalizer = BatchPersonalizer(
+        "Write a personalized email announcing our new product to each lead. Connect the product "
+        "to the lead's professional interests and recent LinkedIn activity from their context "
+        "when available.\n\n"
+        f"PRODUCT INFO: {product_info}",
+        with_subject=True,
+    )
+    personalized = await personalizer.personalize(
+        [
+            PersonalizationTarget(str(index), name, context)
+            for index, ((name, _), context) in enumerate(zip(leads, contexts))
+        ]
+    )
+    send = _personalized_sender(
+        leads, personalized, lambda email, message: siren_client.send_email(email, message.subject, message.body)
+    )
+    return PreparedBroadcast(product_info, send, personalized.stats.as_dict())
+
+
+async def _prepare_product_agent(product_info: dict, leads) -> PreparedBroadcast:
+    """Borrow the LinkedIn + Siren agent; each send has it research and email one lead."""
+    agent_executor = component_registry.product_agent
+
+    async def send(index: int) -> str:
+        name, email = leads[index]
+        agent_input = f"""
+        Process lead: {name} (Email: {email})
+        
+        Steps:
+        1. Search LinkedIn for "{name}" using their email domain for context
+        2. Get their profile information and recent posts/activities
+        3. Analyze their professional interests and recent engagement
+        4. Create a personalized email about our product that connects with their interests
+        5. Send the personalized email to {email}
+        
+        Focus on making the product update relevant to their LinkedIn activity.
+        """
+        result = await agent_executor.ainvoke({"input": agent_input, "product_info": str(product_info)})
+        return result.get("output", "LinkedIn analysis and email sent successfully")
+
+    # one lead at a time: each run makes several LinkedIn calls of its own
+    return PreparedBroadcast(
+        product_info,
+        send,
+        sent_status="processed",
+        concurrency=1,
+        timeout=settings.BROADCAST_AGENT_TIMEOUT,
+        rate_limiter=siren_rate_limiter,
+    )
+
+
 @router.post("/linkedin-product-updates", status_code=status.HTTP_200_OK)
 async def linkedin_product_updates(
     product_info: dict,
+    mode: ProductUpdateMode = Query(
+        ProductUpdateMode.AGENT,
+        description="agent: an LLM agent researches and emails each lead; "
+        "batched: LinkedIn data is fetched directly and emails are written many leads per LLM call",
+    ),
+    stream: Optional[BroadcastStreamFormat] = _STREAM_QUERY,
+    resend: bool = Query(False, description="Email leads that were already sent this product update"),
+    exclude_contacted: bool = Query(False, description="Skip leads that were ever emailed"),
     db: AsyncSession = Depends(get_db_session),
+    read_db: AsyncSession = Depends(get_read_db_session),
 ):
-    """Crawl all leads' LinkedIn profiles, analyze their posts, and send personalized product updates."""
+    """
+    Crawl all leads' LinkedIn profiles, analyze their posts, and send personalized product updates.
+
+    Leads that were already sent this product update are skipped unless ``resend`` is set.
+    """
     try:
-        from sqlalchemy import select
-        result = await db.execute(
-            select(Lead.name, Lead.email).where(Lead.email.isnot(None))
-        )
-        leads = result.fetchall()
+        leads = await lead_repository.email_recipients(read_db)
+        if exclude_contacted:
+            leads = await _exclude_contacted(read_db, "email", leads)
         
         if not leads:
             raise HTTPException(status_code=404, detail="No leads found")
-            
-        from app.core.config import settings
-        from langchain_openai import ChatOpenAI
-        from langchain.agents import AgentExecutor, create_tool_calling_agent
-        from langchain_core.prompts import ChatPromptTemplate
-        from app.core.graphs.tools.linkedin.tool_registry import get_linkedin_tools
-        from agenttoolkit.langchain import SirenAgentToolkit
-        
-        # Set up LLM
-        llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            api_key=settings.OPENAI_API_KEY
-        )
-        
-        # Get LinkedIn tools for profile/post analysis
-        linkedin_tools = get_linkedin_tools()
-        
-        # Set up Siren toolkit for sending updates
-        siren_toolkit = SirenAgentToolkit(
-            api_key=settings.SIREN_API_KEY,
-            configuration={
-                "actions": {
-                    "messaging": {"create": True, "read": True},
-                    "templates": {"read": True, "create": True, "update": True, "delete": True},
-                    "users": {"create": True, "update": True, "delete": True, "read": True},
-                    "workflows": {"trigger": True, "schedule": True},
-                },
-            },
+
+        scope = _broadcast_scope("email", product_info, resend)
+        preparer = _prepare_product_batched if mode == ProductUpdateMode.BATCHED else _prepare_product_agent
+        prepare = functools.partial(preparer, product_info, leads)
+        if stream:
+            return broadcast_stream_response("email", leads, "email", prepare, stream, scope=scope)
+
+        outcome = await _broadcast_inline(db, "email", leads, "email", await prepare(), scope=scope)
+        outcome["processed_count"] = len(leads)
+        outcome["product_info"] = product_info
+        outcome["message"] = (
+            f"LinkedIn product updates completed: {outcome['sent_count']} sent, {outcome['failed_count']} failed, "
+            f"{outcome['skipped_count']} already sent"
         )
-        
-        # Combine LinkedIn and Siren tools
-        all_tools = linkedin_tools + siren_toolkit.get_tools()
-        
-        # Create comprehensive prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""You are an AI assistant that can analyze LinkedIn profiles and send personalized product updates.
-            
-            TASK: For each lead, you should:
-            1. Search for their LinkedIn profile using their name and email
-            2. Get their recent posts and activities
-            3. Analyze their interests and professional focus
-            4. Create a personalized email about our new product that resonates with their interests
-            5. Send the email via Siren API
-            
-            PRODUCT INFO: {product_info}
-            
-            For email sending, use:
-            - channel: "EMAIL"
-            - recipient_value: the email address
-            - subject: personalized subject line
-            - body: personalized product update message
-            
-            Make each message highly relevant to their LinkedIn activity and interests."""),
-            ("human", "{input}"),
-            ("placeholder", "{agent_scratchpad}"),
-        ])
-        
-        # Create agent
-        agent = create_tool_calling_agent(llm, all_tools, prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=all_tools, verbose=True)
-        
-        processed_count = 0
-        sent_count = 0
-        failed_count = 0
-        results = []
-        
-        # Process each lead
-        for name, email in leads:
-            try:
-                processed_count += 1
-                
-                agent_input = f"""
-                Process lead: {name} (Email: {email})
-                
-                Steps:
-                1. Search LinkedIn for "{name}" using their email domain for context
-                2. Get their profile information and recent posts/activities
-                3. Analyze their professional interests and recent engagement
-                4. Create a personalized email about our product that connects with their interests
-                5. Send the personalized email to {email}
-                
-                Focus on making the product update relevant to their LinkedIn activity.
-                """
-                
-                result = agent_executor.invoke({"input": agent_input})
-                
-                sent_count += 1
-                results.append({
-                    "name": name,
-                    "email": email,
-                    "status": "processed",
-                    "agent_response": result.get("output", "LinkedIn analysis and email sent successfully")
-                })
-                
-            except Exception as e:
-                failed_count += 1
-                results.append({
-                    "name": name,
-                    "email": email,
-                    "status": "failed",
-                    "error": str(e)
-                })
-        
-        return {
-            "total_leads": len(leads),
-            "processed_count": processed_count,
-            "sent_count": sent_count,
-            "failed_count": failed_count,
-            "product_info": product_info,
-            "results": results,
-            "message": f"LinkedIn product updates completed: {sent_count} sent, {failed_count} failed"
-        }
+        return outcome
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LinkedIn product updates failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"LinkedIn product updates failed: {str(e)}")
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+
+from app.core.outbound import GOVERNORS
+from app.db.database import engine, replica_router
+from app.db.pool import snapshot
+from app.schemas.metrics import DBPoolMetrics, DBReplicaMetrics, OutboundMetrics
+
+router = APIRouter()
+
+
+@router.get("/db", response_model=DBPoolMetrics)
+async def db_pool_metrics():
+    """
+    Connection pool state for this process, plus counters since startup.
+    """
+    return DBPoolMetrics(**snapshot(engine))
+
+
+@router.get("/db/replicas", response_model=DBReplicaMetrics)
+async def db_replica_metrics():
+    """
+    Read replica health and lag as last sampled by the read router.
+    """
+    return DBReplicaMetrics(**replica_router.status())
+
+
+@router.get("/outbound", response_model=OutboundMetrics)
+async def outbound_metrics():
+    """
+    Per-provider rate, adaptive concurrency and circuit state, plus counters since startup.
+    """
+    return OutboundMetrics(providers=[governor.snapshot() for governor in GOVERNORS])
@@ -4,10 +4,13 @@ Node functions for the LangGraph cold outreach workflow.
 
 import logging
 from textwrap import dedent
+import httpx
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_openai import ChatOpenAI
 from app.core.config import settings
 from app.core.graphs.tools.siren import siren_client
+from app.core.leads.ledger import content_scope, definitely_unsent, sent_ledger
+from app.core.outbound import GovernedTransport, openai_governor
 from .state import GraphState
 from .utils import send_sim_event
 
@@ -17,7 +20,8 @@ logger = logging.getLogger(__name__)
 llm = ChatOpenAI(
     model="gpt-4o-mini",
     temperature=0.1,
-    api_key=settings.OPENAI_API_KEY
+    api_key=settings.OPENAI_API_KEY,
+    http_client=httpx.Client(transport=GovernedTransport(openai_governor, httpx.HTTPTransport())),
 )
 
 
@@ -228,15 +232,23 @@ def send_email_node(state: GraphState) -> GraphState:
         
         logger.info(f"📋 SEND EMAIL NODE: Extracted - Recipient: {recipient}, Subject: {subject[:50]}...")
         
+        # Reserve the send in the sent ledger, so a retried graph step or another process
+        # sending the same email skips it
+        scope = content_scope("email", {"subject": subject, "body": body})
+        try:
+            reserved = sent_ledger.reserve_blocking(scope, "email", recipient)
+        except Exception as e:
+            error_message = f"❌ Failed to send email: {str(e)}"
+            logger.error(f"SEND EMAIL NODE: Sent ledger error: {str(e)}")
+            return {"messages": [AIMessage(content=error_message)]}
+        if not reserved:
+            logger.info("⏭️ SEND EMAIL NODE: Same email already sent, skipping")
+            return {"messages": [AIMessage(content=f"ℹ️ This email was already sent to {recipient}; not sending it again.")]}
+        
         # Send email using Siren client
         try:
             logger.info("📡 SEND EMAIL NODE: Calling Siren API")
-            siren_client.call_tool({
-                "recipient_value": recipient,
-                "channel": "EMAIL",
-                "subject": subject,
-                "body": body
-            })
+            siren_client.call_tool(recipient, subject, body)
             
             success_message = f"✅ Email sent successfully to {recipient}!\n\nSubject: {subject}\n\nThe email has been delivered via Siren API."
             logger.info("✅ SEND EMAIL NODE: Email sent successfully")
@@ -245,6 +257,14 @@ def send_email_node(state: GraphState) -> GraphState:
         except Exception as e:
             error_message = f"❌ Failed to send email: {str(e)}"
             logger.error(f"SEND EMAIL NODE: Siren API error: {str(e)}")
+            if not definitely_unsent(e):
+                # Siren may have taken it; keep the reservation rather than risk sending it twice
+                return {"messages": [AIMessage(content=error_message)]}
+            try:
+                sent_ledger.release_blocking(scope, "email", recipient)
+            except Exception as release_error:
+                # the reservation stays, so this email is not retried: better than sending it twice
+                logger.error(f"SEND EMAIL NODE: Could not release sent ledger reservation: {release_error}")
             return {"messages": [AIMessage(content=error_message)]}
             
     except Exception as e:
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -24,9 +26,34 @@ class Settings(BaseSettings):
 
     # API Keys
     LIX_API_KEY: str = Field(...)
+    LIX_API_URL: str = Field(default="https://api.lix-it.com/v1", description="Lix API root")
+    LIX_CONNECT_TIMEOUT: float = Field(default=5.0, description="Seconds to open a connection to Lix")
+    LIX_READ_TIMEOUT: float = Field(default=20.0, description="Seconds to wait for Lix to answer before the call fails (and is retried if idempotent)")
+    LIX_HTTP2: bool = Field(default=True, description="Use HTTP/2 for async Lix calls when the h2 package is installed")
 
     DATABASE_URL: str = Field(..., description="Full database connection URL")
 
+    # Database pool
+    DB_POOL_PROFILE: Literal["pooled", "pgbouncer", "none"] = Field(
+        default="pooled", description="pooled, pgbouncer (transaction mode, no server-side statement caching) or none"
+    )
+    DB_POOL_SIZE: int = Field(default=10, description="Connections kept open per process")
+    DB_MAX_OVERFLOW: int = Field(default=10, description="Extra connections allowed under load, closed when returned")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, description="Seconds to wait for a free connection")
+    DB_POOL_RECYCLE: int = Field(default=1800, description="Seconds after which a connection is replaced")
+    DB_POOL_PRE_PING: bool = Field(default=True, description="Check connections for liveness on checkout")
+    DB_SCHEMA_CHECK: Literal["strict", "warn", "off"] = Field(
+        default="warn", description="At startup, refuse to start (strict) or log (warn) when migrations are pending"
+    )
+
+    # Read replicas
+    DATABASE_REPLICA_URLS: Optional[str] = Field(
+        default=None, description="Comma-separated read replica connection URLs; reads use the primary if unset"
+    )
+    DB_REPLICA_MAX_LAG_SECONDS: float = Field(default=5.0, description="Replay lag above which a replica is skipped")
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = Field(default=2.0, description="Seconds between replica lag checks")
+    DB_REPLICA_CHECK_TIMEOUT: float = Field(default=1.0, description="Seconds a lag check may take before the replica is skipped")
+
     # Livekit
     LIVEKIT_API_KEY: str = Field(...)
     LIVEKIT_API_SECRET: str = Field(...)
@@ -37,9 +64,67 @@ class Settings(BaseSettings):
 
     # OpenAI
     OPENAI_API_KEY: str = Field(...)
+    PERSONALIZATION_MODEL: str = Field(default="gpt-4o-mini", description="Model for batched lead personalization")
+    PERSONALIZATION_BATCH_SIZE: int = Field(default=25, description="Leads packed into one personalization completion")
+    PERSONALIZATION_MAX_RETRIES: int = Field(default=2, description="Re-requests of leads whose generated message failed validation")
+    PERSONALIZATION_CONCURRENCY: int = Field(default=4, description="Personalization completions in flight at once across the process")
+    LLM_MAX_CONNECTIONS: int = Field(default=20, description="Connections in the OpenAI HTTP pool shared by the campaign components")
+    LLM_WARMUP: bool = Field(default=False, description="Make one OpenAI request at startup so DNS and TLS are done before the first broadcast")
 
     # Siren
     SIREN_API_KEY: str = Field(...)
+    SIREN_API_URL: str = Field(default="https://api.trysiren.io", description="Siren API root")
+    SIREN_MAX_CONCURRENCY: int = Field(default=20, description="Most Siren requests in flight (lowered automatically while Siren throttles or fails), and pooled keep-alive connections")
+    SIREN_TIMEOUT: float = Field(default=10.0, description="Seconds before a Siren request fails")
+    SIREN_SEND_RATE: float = Field(default=10.0, description="Siren requests per second across this process (0 disables)")
+    SIREN_SEND_BURST: int = Field(default=20, description="Sends allowed at once after an idle period")
+
+    # Outbound call governor (per provider: token bucket, adaptive concurrency, circuit breaker)
+    LIX_REQUEST_RATE: float = Field(default=5.0, description="Lix requests per second across this process (0 disables)")
+    LIX_REQUEST_BURST: int = Field(default=10, description="Lix requests allowed at once after an idle period")
+    LIX_MAX_CONCURRENCY: int = Field(default=8, description="Most Lix requests in flight; lowered automatically while Lix throttles or fails")
+    OPENAI_REQUEST_RATE: float = Field(default=0.0, description="OpenAI requests per second across this process (0 disables)")
+    OPENAI_REQUEST_BURST: int = Field(default=20, description="OpenAI requests allowed at once after an idle period")
+    OUTBOUND_MAX_RETRIES: int = Field(default=3, description="Retries of a throttled (429) call, or of a failed idempotent call")
+    OUTBOUND_RETRY_BACKOFF: float = Field(default=0.5, description="Seconds before the first retry of a failed call; doubles with each retry")
+    OUTBOUND_RETRY_AFTER_MAX: float = Field(default=60.0, description="Longest Retry-After pause honoured")
+    OUTBOUND_BREAKER_FAILURES: int = Field(default=5, description="Consecutive 5xx or connection failures that open a provider's circuit")
+    OUTBOUND_BREAKER_RESET_SECONDS: float = Field(default=30.0, description="Seconds an open circuit fails calls fast before letting a probe through")
+
+    # Broadcasts
+    BROADCAST_SEND_CONCURRENCY: int = Field(default=10, description="Broadcast sends in flight at once")
+    BROADCAST_SEND_TIMEOUT: float = Field(default=30.0, description="Seconds before a single direct send is recorded as failed")
+    BROADCAST_AGENT_TIMEOUT: float = Field(default=120.0, description="Seconds before a per-lead agent run is recorded as failed")
+    BROADCAST_STREAM_PROGRESS_INTERVAL: float = Field(default=2.0, description="Seconds between aggregate progress events of a streamed broadcast")
+
+    # Message outbox
+    OUTBOX_WORKERS: int = Field(default=1, description="Outbox worker coroutines started with the API (0 leaves delivery to separate worker processes)")
+    OUTBOX_CLAIM_BATCH: int = Field(default=20, description="Messages a worker claims per round")
+    OUTBOX_POLL_INTERVAL: float = Field(default=1.0, description="Seconds an idle worker waits before polling again")
+    OUTBOX_LEASE_SECONDS: int = Field(default=120, description="Seconds a claimed message stays reserved before another worker may retry it")
+    OUTBOX_MAX_ATTEMPTS: int = Field(default=5, description="Send attempts before a message is dead-lettered")
+    OUTBOX_BACKOFF_BASE: float = Field(default=5.0, description="Seconds before the first retry; doubles with each attempt")
+    OUTBOX_BACKOFF_MAX: float = Field(default=600.0, description="Longest delay between retries")
+
+    # Sent message ledger
+    SENT_LEDGER_CACHE_SIZE: int = Field(default=100_000, description="(scope, channel, recipient) keys of sent messages cached in memory")
+
+    # Lead import
+    LEAD_IMPORT_BATCH_SIZE: int = Field(default=1000, description="Rows upserted per INSERT statement")
+    LEAD_IMPORT_SPOOL_DIR: Optional[str] = Field(default=None, description="Directory for spooled uploads (system temp dir if unset)")
+    LEAD_FILE_STORE_DIR: str = Field(default="lead_files", description="Content-addressed store for uploaded lead files")
+    LEAD_IMPORT_MAX_CONCURRENT_JOBS: int = Field(default=2, description="Background imports allowed to run at once")
+    LEAD_IMPORT_PARSER_PROCESSES: int = Field(default=2, description="Spreadsheet parser processes (0 parses on the event loop)")
+    LEAD_IMPORT_MAX_QUEUED_JOBS: int = Field(default=20, description="Running plus waiting imports before new jobs are rejected")
+    LEAD_IMPORT_LEASE_SECONDS: int = Field(default=120, description="Seconds without a heartbeat before a queued or running import is presumed dead and can be resumed")
+    LEAD_VALIDATION_MAX_REPORTED: int = Field(default=1000, description="Failing rows listed inline in an import result")
+    LEAD_EMAIL_FILTER_ENABLED: bool = Field(default=False, description="Use the persisted Bloom filter of stored lead emails")
+    LEAD_EMAIL_FILTER_CAPACITY: int = Field(default=10_000_000, description="Emails the Bloom filter is sized for")
+    LEAD_EMAIL_FILTER_ERROR_RATE: float = Field(default=0.01, description="Target Bloom filter false-positive rate")
+    LEAD_STREAM_PROGRESS_INTERVAL: float = Field(default=2.0, description="Seconds between progress lines of an NDJSON lead stream")
+    LEAD_STREAM_MAX_LINE_BYTES: int = Field(default=64 * 1024, description="Longest accepted NDJSON line")
+    LEAD_STREAM_MAX_TRACKED_EMAILS: int = Field(default=1_000_000, description="Emails remembered for in-stream duplicate detection")
+    LEAD_EXPORT_BATCH_SIZE: int = Field(default=10_000, description="Rows fetched and encoded per chunk of a lead export")
 
 
 settings = Settings()
@@ -17,7 +17,8 @@ from . import contact_tools
 from . import job_tools
 
 # Import the base tool utilities
-from .base_langraph_lix_tool import lix_tool, make_lix_request
+from .base_langraph_lix_tool import lix_tool, make_lix_request, make_lix_request_async
+from .lix_client import client as lix_client
 
 __all__ = [
     # Main registry and access functions
@@ -37,5 +38,7 @@ __all__ = [
     
     # Base utilities
     'lix_tool',
-    'make_lix_request'
+    'make_lix_request',
+    'make_lix_request_async',
+    'lix_client',
 ]
\ No newline at end of file
@@ -1,12 +1,8 @@
 """Base LangGraph-compatible Lix tool interface."""
 
-import requests
 from typing import Dict, Any, Optional, Callable
 from functools import wraps
-from app.core.config import settings
-
-# Constants
-BASE_URL = "https://api.lix-it.com/v1"
+from app.core.graphs.tools.linkedin.lix_client import client as lix_client
 
 
 def lix_tool(name: str, description: str):
@@ -29,25 +25,16 @@ def lix_tool(name: str, description: str):
 
 def make_lix_request(endpoint: str, params: Optional[Dict[str, Any]] = None, 
                     method: str = "GET") -> Dict[str, Any]:
-    """Make a request to the Lix API."""
-    url = f"{BASE_URL}/{endpoint}"
-    headers = {
-        'Authorization': settings.LIX_API_KEY,
-        'Content-Type': 'application/json'
-    }
-    
-    try:
-        if method.upper() == "GET":
-            response = requests.get(url, headers=headers, params=params)
-        elif method.upper() == "POST":
-            response = requests.post(url, headers=headers, json=params)
-        elif method.upper() == "PUT":
-            response = requests.put(url, headers=headers, json=params)
-        else:
-            raise ValueError(f"Unsupported HTTP method: {method}")
-        
-        response.raise_for_status()
-        return response.json()
-    
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e), "status_code": getattr(e.response, 'status_code', None)}
+    """Make a request to the Lix API on the pooled client (sync facade for the tools).
+
+    Raises ProviderUnavailable when Lix keeps throttling or failing, or its circuit is
+    open, so an agent run stops instead of reasoning about the error. Other errors (e.g. a
+    profile that was not found) are returned as {"error": ..., "status_code": ...}.
+    """
+    return lix_client.request_blocking(endpoint, params, method)
+
+
+async def make_lix_request_async(endpoint: str, params: Optional[Dict[str, Any]] = None,
+                                 method: str = "GET") -> Dict[str, Any]:
+    """``make_lix_request`` for async callers."""
+    return await lix_client.request(endpoint, params, method)
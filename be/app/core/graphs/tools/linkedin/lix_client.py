@@ -0,0 +1,150 @@
+"""
+Pooled Lix API client.
+
+One long-lived client per process keeps connections to Lix open, over HTTP/2 when the
+``h2`` package is installed (HTTP/1.1 keep-alive otherwise). ``request`` is for async
+callers; ``request_blocking`` is the sync facade behind ``make_lix_request`` and the
+``@tool`` functions, on its own pooled ``httpx.Client``. Every call has connect and read
+timeouts (LIX_CONNECT_TIMEOUT, LIX_READ_TIMEOUT), so a hung Lix call fails instead of
+stalling an agent turn. Calls go through the Lix governor (``app.core.outbound``), which
+paces them and retries 429s, and retries timeouts, connection errors and 5xx of idempotent
+calls, with backoff and jitter.
+
+Persistent throttling or failure, and an open circuit, raise ``ProviderUnavailable``.
+Other error responses (e.g. a profile that was not found) are returned as
+``{"error": ..., "status_code": ...}`` for the caller, or the agent, to act on.
+"""
+from __future__ import annotations
+
+import importlib.util
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.outbound import (
+    IDEMPOTENT_METHODS,
+    GovernedAsyncTransport,
+    GovernedTransport,
+    ProviderUnavailable,
+    lix_governor,
+)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+SUPPORTED_METHODS = ("GET", "POST", "PUT")
+
+
+class LixClient:
+    """Calls the Lix API over pooled keep-alive connections, sync or async."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        *,
+        max_connections: int,
+        connect_timeout: float,
+        read_timeout: float,
+        http2: bool,
+    ):
+        self._api_key = api_key
+        self._base_url = base_url.rstrip("/")
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._http2 = http2 and HTTP2_AVAILABLE
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+
+    def _client_options(self) -> dict:
+        return {
+            "base_url": self._base_url,
+            "headers": {"Authorization": self._api_key, "Content-Type": "application/json"},
+            "timeout": self._timeout,
+        }
+
+    @property
+    def _async(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            transport = GovernedAsyncTransport(
+                lix_governor, httpx.AsyncHTTPTransport(limits=self._limits, http2=self._http2)
+            )
+            self._async_client = httpx.AsyncClient(transport=transport, **self._client_options())
+        return self._async_client
+
+    @property
+    def _sync(self) -> httpx.Client:
+        if self._sync_client is None:
+            # the sync transport speaks HTTP/1.1 only
+            transport = GovernedTransport(lix_governor, httpx.HTTPTransport(limits=self._limits))
+            self._sync_client = httpx.Client(transport=transport, **self._client_options())
+        return self._sync_client
+
+    @staticmethod
+    def _request_options(params: Optional[Dict[str, Any]], method: str) -> dict:
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        return {"params": params} if method == "GET" else {"json": params}
+
+    @staticmethod
+    def _result(response: httpx.Response, method: str) -> Dict[str, Any]:
+        if response.status_code == 429 or response.status_code >= 500:
+            # 429s are retried for every method, 5xx only for idempotent ones
+            retried = response.status_code == 429 or method in IDEMPOTENT_METHODS
+            raise ProviderUnavailable(
+                f"Lix returned {response.status_code}{' after retries' if retried else ''}",
+                "lix",
+                status_code=response.status_code,
+            )
+        try:
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPStatusError, ValueError) as e:
+            return {"error": str(e), "status_code": response.status_code}
+
+    @staticmethod
+    def _failed(endpoint: str, method: str, error: httpx.HTTPError) -> ProviderUnavailable:
+        retried = " after retries" if method in IDEMPOTENT_METHODS else ""
+        return ProviderUnavailable(f"Lix request to {endpoint} failed{retried}: {error!r}", "lix")
+
+    async def request(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None, method: str = "GET"
+    ) -> Dict[str, Any]:
+        """Call a Lix endpoint (path relative to the API root) and return its JSON."""
+        method = method.upper()
+        options = self._request_options(params, method)
+        try:
+            response = await self._async.request(method, endpoint, **options)
+        except httpx.HTTPError as e:
+            raise self._failed(endpoint, method, e) from e
+        return self._result(response, method)
+
+    def request_blocking(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None, method: str = "GET"
+    ) -> Dict[str, Any]:
+        """``request`` for synchronous callers, on the pooled sync client."""
+        method = method.upper()
+        options = self._request_options(params, method)
+        try:
+            response = self._sync.request(method, endpoint, **options)
+        except httpx.HTTPError as e:
+            raise self._failed(endpoint, method, e) from e
+        return self._result(response, method)
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+
+client = LixClient(
+    settings.LIX_API_KEY,
+    settings.LIX_API_URL,
+    max_connections=settings.LIX_MAX_CONCURRENCY,
+    connect_timeout=settings.LIX_CONNECT_TIMEOUT,
+    read_timeout=settings.LIX_READ_TIMEOUT,
+    http2=settings.LIX_HTTP2,
+)
@@ -1,4 +1,4 @@
-from app.core.graphs.tools.siren.siren import client as siren_client
+from app.core.graphs.tools.siren.siren import SirenMessage, SirenSendError, SirenSendResult, client as siren_client
 
-__all__ = ["siren_client"]
+__all__ = ["siren_client", "SirenMessage", "SirenSendError", "SirenSendResult"]
 
@@ -1,17 +1,203 @@
+"""
+Pooled Siren messaging client.
+
+One long-lived client per process sends through Siren's send-messages API over kept-alive
+connections: an ``httpx.AsyncClient`` for async callers (broadcasts, the outbox) and an
+``httpx.Client`` for synchronous ones (agent graph nodes). Both go through the Siren
+governor (``app.core.outbound``), which paces sends at SIREN_SEND_RATE, keeps at most
+SIREN_MAX_CONCURRENCY in flight, retries 429s after their Retry-After, and fails fast while
+Siren is down. ``send_bulk`` sends a list of messages concurrently and reports an id or an
+error for each.
+
+A failed send is ``rejected`` when Siren certainly did not take the message: it answered
+4xx, the circuit was open, or the connection was never made. Any other failure (a 5xx, a
+read timeout) may have been delivered, so callers that guard against duplicates must not
+treat it as unsent.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import httpx
+
 from app.core.config import settings
+from app.core.outbound import (
+    CircuitOpenError,
+    GovernedAsyncTransport,
+    GovernedTransport,
+    ProviderUnavailable,
+    siren_governor,
+)
+
+SEND_MESSAGES_PATH = "/api/v1/public/send-messages"
+
+# Siren's recipient field for each channel.
+RECIPIENT_KEYS = {"EMAIL": "email", "SMS": "sms"}
+
+# Transport errors raised before the request was written, so Siren never saw it.
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class SirenSendError(Exception):
+    """A send that Siren rejected or that did not reach it; ``rejected`` if it certainly was not sent."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[str] = None,
+        rejected: bool = False,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.rejected = rejected
+
+
+@dataclass
+class SirenMessage:
+    recipient: str
+    channel: str
+    body: str
+    subject: Optional[str] = None
+
+
+@dataclass
+class SirenSendResult:
+    recipient: str
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    rejected: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
-class SirenMCPClient:
-    def call_tool(self, to, subject, body):
-        from siren import SirenClient
+class SirenMessagingClient:
+    """Sends Siren messages over pooled keep-alive connections, sync or async."""
 
-        client = SirenClient(api_key=settings.SIREN_API_KEY)
+    def __init__(self, api_key: str, base_url: str, *, max_concurrency: int, timeout: float):
+        self._api_key = api_key
+        self._base_url = base_url.rstrip("/")
+        self._limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        self._timeout = httpx.Timeout(timeout)
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
 
-        message_id = client.message.send(
-            recipient_value=to,
-            channel="EMAIL",
-            body=body,
-            subject=subject
+    def _client_options(self) -> dict:
+        return {
+            "base_url": self._base_url,
+            "headers": {"Authorization": f"Bearer {self._api_key}"},
+            "timeout": self._timeout,
+        }
+
+    @property
+    def _async(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            transport = GovernedAsyncTransport(siren_governor, httpx.AsyncHTTPTransport(limits=self._limits))
+            self._async_client = httpx.AsyncClient(transport=transport, **self._client_options())
+        return self._async_client
+
+    @property
+    def _sync(self) -> httpx.Client:
+        if self._sync_client is None:
+            transport = GovernedTransport(siren_governor, httpx.HTTPTransport(limits=self._limits))
+            self._sync_client = httpx.Client(transport=transport, **self._client_options())
+        return self._sync_client
+
+    @staticmethod
+    def _payload(message: SirenMessage) -> dict:
+        channel = message.channel.upper()
+        recipient_key = RECIPIENT_KEYS.get(channel)
+        if recipient_key is None:
+            raise ValueError(f"Unsupported channel: {message.channel}")
+        payload = {"channel": channel, "recipient": {recipient_key: message.recipient}, "body": message.body}
+        if message.subject is not None:
+            payload["subject"] = message.subject
+        return payload
+
+    @staticmethod
+    def _message_id(response: httpx.Response) -> str:
+        try:
+            content = response.json()
+        except ValueError:
+            content = {}
+        data = content.get("data") if isinstance(content, dict) else None
+        if response.is_success and isinstance(data, dict) and data.get("notificationId"):
+            return data["notificationId"]
+
+        error = (content.get("error") or (content.get("errors") or [None])[0]) if isinstance(content, dict) else None
+        detail = error.get("message") if isinstance(error, dict) else response.text[:200]
+        raise SirenSendError(
+            f"Siren returned {response.status_code}: {detail}",
+            status_code=response.status_code,
+            retry_after=response.headers.get("Retry-After"),
+            rejected=response.is_client_error,
         )
-        return message_id
 
-client = SirenMCPClient()
+    @staticmethod
+    def _request_error(error: Exception) -> SirenSendError:
+        if isinstance(error, ProviderUnavailable):
+            rejected = isinstance(error, CircuitOpenError)
+            return SirenSendError(str(error), status_code=error.status_code, rejected=rejected)
+        return SirenSendError(f"Siren request failed: {error!r}", rejected=isinstance(error, _NOT_SENT_ERRORS))
+
+    async def send(self, message: SirenMessage) -> str:
+        """Send one message and return its Siren notification id."""
+        payload = self._payload(message)
+        try:
+            response = await self._async.post(SEND_MESSAGES_PATH, json=payload)
+        except (ProviderUnavailable, httpx.HTTPError) as e:
+            raise self._request_error(e) from e
+        return self._message_id(response)
+
+    async def send_email(self, to: str, subject: str, body: str) -> str:
+        return await self.send(SirenMessage(to, "EMAIL", body, subject))
+
+    async def send_sms(self, to: str, body: str) -> str:
+        return await self.send(SirenMessage(to, "SMS", body))
+
+    async def send_bulk(self, messages: Sequence[SirenMessage]) -> List[SirenSendResult]:
+        """Send every message concurrently (as fast as the governor allows); results are in input order."""
+
+        async def attempt(message: SirenMessage) -> SirenSendResult:
+            try:
+                return SirenSendResult(message.recipient, message_id=await self.send(message))
+            except SirenSendError as e:
+                return SirenSendResult(message.recipient, error=str(e), rejected=e.rejected)
+            except ValueError as e:
+                # an unsendable message, refused before any request
+                return SirenSendResult(message.recipient, error=str(e), rejected=True)
+
+        return list(await asyncio.gather(*(attempt(message) for message in messages)))
+
+    def send_blocking(self, message: SirenMessage) -> str:
+        """``send`` for synchronous callers, on the pooled sync client."""
+        try:
+            response = self._sync.post(SEND_MESSAGES_PATH, json=self._payload(message))
+        except (ProviderUnavailable, httpx.HTTPError) as e:
+            raise self._request_error(e) from e
+        return self._message_id(response)
+
+    def call_tool(self, to: str, subject: str, body: str) -> str:
+        """Send an email from synchronous code; returns the notification id."""
+        return self.send_blocking(SirenMessage(to, "EMAIL", body, subject))
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+
+client = SirenMessagingClient(
+    settings.SIREN_API_KEY,
+    settings.SIREN_API_URL,
+    max_concurrency=settings.SIREN_MAX_CONCURRENCY,
+    timeout=settings.SIREN_TIMEOUT,
+)
@@ -0,0 +1,89 @@
+"""
+Template-once SMS broadcasts.
+
+One LLM call turns the campaign content into a message template with ``{name}`` slots;
+every lead's SMS is then rendered locally and sent straight through Siren, so a broadcast
+costs one completion instead of an agent loop per recipient.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+from pydantic import BaseModel, Field
+
+from app.core.leads.components import component_registry
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SMS_MAX_LENGTH = 160
+NAME_SLOT = "{name}"
+
+
+class SmsTemplateError(ValueError):
+    """Raised when the drafted template cannot produce a valid SMS."""
+
+
+class SmsTooLong(ValueError):
+    """Raised when a rendered message does not fit in one SMS."""
+
+
+class _SmsTemplateDraft(BaseModel):
+    template: str = Field(..., description=f"The SMS text, with {NAME_SLOT} wherever the recipient's name goes")
+
+
+_TEMPLATE_PROMPT = """You write SMS broadcast templates.
+
+Rewrite the message below as one friendly, conversational SMS. Put the placeholder {slot} where the recipient's name belongs (at least once, usually in the greeting). Do not use any other placeholders or curly braces.
+
+The text excluding the placeholder must be at most {budget} characters so that the message with the name filled in fits in {limit} characters.
+
+Message:
+{content}"""
+
+
+def first_name(name: str) -> str:
+    return name.split()[0] if name.strip() else name
+
+
+def fixed_length(template: str) -> int:
+    """Length of the template without its name slots."""
+    return len(template.replace(NAME_SLOT, ""))
+
+
+def name_budget(names: Iterable[str]) -> int:
+    """Characters left for the template text once the longest first name is filled in."""
+    longest = max((len(first_name(name)) for name in names), default=0)
+    return SMS_MAX_LENGTH - longest
+
+
+async def draft_sms_template(content: str, names: Iterable[str]) -> str:
+    """Ask the LLM once for a ``{name}`` template of ``content`` that fits the SMS limit."""
+    budget = name_budget(names)
+    draft = await component_registry.structured(_SmsTemplateDraft).ainvoke(
+        _TEMPLATE_PROMPT.format(slot=NAME_SLOT, budget=budget, limit=SMS_MAX_LENGTH, content=content)
+    )
+    template = draft.template.strip()
+    if not template:
+        raise SmsTemplateError("The drafted SMS template is empty")
+    if fixed_length(template) > SMS_MAX_LENGTH:
+        raise SmsTemplateError(
+            f"The drafted SMS template is {fixed_length(template)} characters before names, "
+            f"over the {SMS_MAX_LENGTH}-character SMS limit"
+        )
+    if NAME_SLOT not in template:
+        logger.warning("Drafted SMS template has no name slot; messages will not be personalized")
+    return template
+
+
+def render_sms(template: str, name: str) -> str:
+    """
+    The template with ``name`` filled in, falling back to the first name if the full name
+    pushes it over SMS_MAX_LENGTH.
+    """
+    # plain replacement, so braces elsewhere in the text are left alone
+    for candidate in (name, first_name(name)):
+        message = template.replace(NAME_SLOT, candidate)
+        if len(message) <= SMS_MAX_LENGTH:
+            return message
+    raise SmsTooLong(f"Message is {len(message)} characters, over the {SMS_MAX_LENGTH}-character SMS limit")
@@ -0,0 +1,260 @@
+"""
+Streamed broadcast progress.
+
+A streamed broadcast reports every lead's outcome as soon as its send finishes, plus an
+aggregate ``progress`` event at least every BROADCAST_STREAM_PROGRESS_INTERVAL seconds
+(also while the messages are still being written), as NDJSON lines or Server-Sent Events.
+Outcomes are inserted into ``campaign_results`` RESULT_CHUNK rows at a time and then
+dropped, so the per-lead detail, agent responses included, is not accumulated anywhere.
+
+The broadcast runs as its own task. A client that disconnects stops receiving events but
+does not stop the sends; they finish and are recorded as usual, and the campaign can be
+followed at GET /leads/campaigns/{campaign_id}.
+
+With a ledger ``scope``, leads that were already sent that scope are skipped (see
+``app.core.leads.ledger``) and reported with status ``skipped``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from starlette.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.leads.fanout import TokenBucket, iter_fan_out
+from app.core.leads.ledger import sent_ledger
+from app.db.database import AsyncSessionLocal
+from app.db.models import Campaign, CampaignResult
+from app.schemas.leads import BroadcastStreamFormat
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RESULT_CHUNK = 500
+
+# Events waiting to be written; a client that stops reading them slows the sends down.
+EVENT_BUFFER = 64
+
+MEDIA_TYPES = {
+    BroadcastStreamFormat.NDJSON: "application/x-ndjson",
+    BroadcastStreamFormat.SSE: "text/event-stream",
+}
+
+# Streamed broadcasts outlive their response if the client goes away; keep them referenced.
+_running: Set[asyncio.Task] = set()
+
+
+@dataclass
+class PreparedBroadcast:
+    """
+    A broadcast ready to send: the campaign content and how to send to the lead at an index.
+    ``rate_limiter`` paces sends that do not go through the (already paced) Siren client.
+    """
+
+    content: Dict[str, Any]
+    send: Callable[[int], Awaitable[str]]
+    stats: Dict[str, Any] = field(default_factory=dict)
+    sent_status: str = "sent"
+    concurrency: Optional[int] = None
+    timeout: Optional[float] = None
+    rate_limiter: Optional[TokenBucket] = None
+
+
+@dataclass
+class BroadcastTally:
+    total: int
+    stage: str = "preparing"
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "total_leads": self.total,
+            "completed": self.sent + self.failed + self.skipped,
+            "sent_count": self.sent,
+            "failed_count": self.failed,
+            "skipped_count": self.skipped,
+            "elapsed_seconds": round(time.monotonic() - self.started, 1),
+        }
+
+
+def encode_event(kind: str, data: Dict[str, Any], fmt: BroadcastStreamFormat) -> bytes:
+    if fmt == BroadcastStreamFormat.SSE:
+        return f"event: {kind}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+    return (json.dumps({"type": kind, **data}, default=str) + "\n").encode()
+
+
+class _ResultWriter:
+    """Buffers campaign results and inserts them RESULT_CHUNK at a time."""
+
+    def __init__(self, db, campaign_id):
+        self._db = db
+        self._campaign_id = campaign_id
+        self._rows: List[dict] = []
+
+    async def add(self, name: str, recipient: str, status: str, detail: Optional[str]) -> None:
+        self._rows.append(
+            {
+                "campaign_id": self._campaign_id,
+                "lead_name": name,
+                "recipient": recipient,
+                "status": status,
+                "detail": detail,
+            }
+        )
+        if len(self._rows) >= RESULT_CHUNK:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._rows:
+            await self._db.execute(insert(CampaignResult), self._rows)
+            await self._db.commit()
+            self._rows = []
+
+
+async def _run(
+    channel: str,
+    leads: Sequence,
+    recipient_key: str,
+    prepare: Callable[[], Awaitable[PreparedBroadcast]],
+    idempotency_key: Optional[str],
+    scope: Optional[str],
+    tally: BroadcastTally,
+    emit: Callable[[str, Dict[str, Any]], Awaitable[None]],
+) -> None:
+    prepared = await prepare()
+    send = prepared.send
+    async with AsyncSessionLocal() as db:
+        if scope is not None:
+            await sent_ledger.preload(db, scope, channel)
+            send = sent_ledger.guard(send, scope, channel, leads)
+        campaign = Campaign(
+            channel=channel, content=prepared.content, total_leads=len(leads), idempotency_key=idempotency_key
+        )
+        db.add(campaign)
+        try:
+            await db.commit()
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is already in progress")
+        campaign_id = campaign.id
+        tally.stage = "sending"
+        await emit("campaign", {"campaign_id": str(campaign_id), "total_leads": len(leads), **prepared.stats})
+
+        writer = _ResultWriter(db, campaign_id)
+        async for index, outcome in iter_fan_out(
+            range(len(leads)),
+            send,
+            concurrency=prepared.concurrency,
+            timeout=prepared.timeout,
+            rate_limiter=prepared.rate_limiter,
+        ):
+            name, recipient = leads[index]
+            entry = {"name": name, recipient_key: recipient}
+            if outcome.ok:
+                tally.sent += 1
+                entry.update(status=prepared.sent_status, agent_response=outcome.value)
+            elif outcome.skipped:
+                tally.skipped += 1
+                entry.update(status="skipped", error=outcome.error)
+            else:
+                tally.failed += 1
+                entry.update(status="failed", error=outcome.error)
+            await writer.add(name, recipient, entry["status"], outcome.value if outcome.ok else outcome.error)
+            await emit("lead", entry)
+        await writer.flush()
+
+        campaign = await db.get(Campaign, campaign_id)
+        campaign.sent_count = tally.sent
+        campaign.failed_count = tally.failed
+        campaign.finished_at = func.now()
+        await db.commit()
+    tally.stage = "done"
+    await emit("result", {"campaign_id": str(campaign_id), **tally.as_dict(), **prepared.stats})
+
+
+async def stream_broadcast(
+    channel: str,
+    leads: Sequence,
+    recipient_key: str,
+    prepare: Callable[[], Awaitable[PreparedBroadcast]],
+    fmt: BroadcastStreamFormat,
+    idempotency_key: Optional[str] = None,
+    scope: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Prepare and send a broadcast in a background task and yield its events: ``campaign``
+    once the campaign exists, ``lead`` per outcome, ``progress`` counters, and a final
+    ``result`` (or ``error``).
+    """
+    events: asyncio.Queue = asyncio.Queue(maxsize=EVENT_BUFFER)
+    tally = BroadcastTally(len(leads))
+    attached = True
+
+    async def emit(kind: str, data: Dict[str, Any]) -> None:
+        if attached:
+            await events.put(encode_event(kind, data, fmt))
+
+    async def run() -> None:
+        try:
+            await _run(channel, leads, recipient_key, prepare, idempotency_key, scope, tally, emit)
+        except HTTPException as e:
+            await emit("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.exception(f"Streamed {channel} broadcast failed: {e}")
+            await emit("error", {"detail": str(e)})
+        finally:
+            if attached:
+                await events.put(None)
+
+    task = asyncio.create_task(run())
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+    interval = settings.BROADCAST_STREAM_PROGRESS_INTERVAL
+    last_progress = time.monotonic()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), max(interval - (time.monotonic() - last_progress), 0))
+            except asyncio.TimeoutError:
+                event = b""
+            if event is None:
+                break
+            if event:
+                yield event
+            if time.monotonic() - last_progress >= interval:
+                last_progress = time.monotonic()
+                yield encode_event("progress", tally.as_dict(), fmt)
+    finally:
+        attached = False
+        # unblock the task if it is waiting for room in the queue
+        while not events.empty():
+            events.get_nowait()
+        if not task.done():
+            logger.info(f"Client left a streamed {channel} broadcast; it continues in the background")
+
+
+def broadcast_stream_response(
+    channel: str,
+    leads: Sequence,
+    recipient_key: str,
+    prepare: Callable[[], Awaitable[PreparedBroadcast]],
+    fmt: BroadcastStreamFormat,
+    idempotency_key: Optional[str] = None,
+    scope: Optional[str] = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_broadcast(channel, leads, recipient_key, prepare, fmt, idempotency_key, scope),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
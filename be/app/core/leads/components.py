@@ -0,0 +1,211 @@
+"""
+Process-wide LLM and agent components for lead campaigns.
+
+Building a ``ChatOpenAI``, a ``SirenAgentToolkit``, the prompts and the agent executors
+costs tens of milliseconds (plus the langchain imports on first use), and every new
+``ChatOpenAI`` opens its own connection pool. The registry builds them once, during the
+app lifespan, on one shared pair of httpx clients; handlers borrow them. An agent executor
+holds no per-run state, so concurrent broadcasts share it safely. The clients send through
+the OpenAI governor (``app.core.outbound``), so every completion is paced and counted.
+
+Processes that do not run the lifespan (outbox workers, scripts) build the components on
+first use. With LLM_WARMUP the lifespan also makes one cheap OpenAI request, so DNS and the
+TLS handshake are done before the first broadcast needs them.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SMS_AGENT_SYSTEM_PROMPT = """You are a helpful assistant that can send SMS messages using Siren.
+
+            IMPORTANT: For SMS channel, always provide:
+            - channel: "SMS"
+            - recipient_value: the mobile number (e.g., "+919188065817")
+            - body: the message content
+
+            When sending messages, personalize them with the recipient's name and make them conversational and friendly. Keep SMS messages under 160 characters when possible."""
+
+# {product_info} is a prompt variable, filled per broadcast.
+PRODUCT_AGENT_SYSTEM_PROMPT = """You are an AI assistant that can analyze LinkedIn profiles and send personalized product updates.
+
+            TASK: For each lead, you should:
+            1. Search for their LinkedIn profile using their name and email
+            2. Get their recent posts and activities
+            3. Analyze their interests and professional focus
+            4. Create a personalized email about our new product that resonates with their interests
+            5. Send the email via Siren API
+
+            PRODUCT INFO: {product_info}
+
+            For email sending, use:
+            - channel: "EMAIL"
+            - recipient_value: the email address
+            - subject: personalized subject line
+            - body: personalized product update message
+
+            Make each message highly relevant to their LinkedIn activity and interests."""
+
+SMS_SIREN_ACTIONS = {
+    "messaging": {
+        "create": True,
+        "read": True,
+    },
+    "templates": {
+        "read": True,
+        "create": True,
+    },
+}
+
+PRODUCT_SIREN_ACTIONS = {
+    "messaging": {"create": True, "read": True},
+    "templates": {"read": True, "create": True, "update": True, "delete": True},
+    "users": {"create": True, "update": True, "delete": True, "read": True},
+    "workflows": {"trigger": True, "schedule": True},
+}
+
+WARMUP_URL = "https://api.openai.com/v1/models"
+WARMUP_TIMEOUT = 5.0
+
+
+class ComponentRegistry:
+    """Builds the campaign LLMs, toolkits and agent executors once and lends them out."""
+
+    def __init__(self):
+        self._components: Optional[Dict[str, Any]] = None
+        self._structured: Dict[Tuple[str, type, bool], Any] = {}
+        self._http_client = None
+        self._http_async_client = None
+
+    def _build(self) -> Dict[str, Any]:
+        import httpx
+        from agenttoolkit.langchain import SirenAgentToolkit
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_openai import ChatOpenAI
+
+        from app.core.graphs.tools.linkedin.tool_registry import get_linkedin_tools
+        from app.core.outbound import GovernedAsyncTransport, GovernedTransport, openai_governor
+
+        started = time.perf_counter()
+        limits = httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+        )
+        self._http_client = httpx.Client(
+            transport=GovernedTransport(openai_governor, httpx.HTTPTransport(limits=limits))
+        )
+        self._http_async_client = httpx.AsyncClient(
+            transport=GovernedAsyncTransport(openai_governor, httpx.AsyncHTTPTransport(limits=limits))
+        )
+
+        def chat_model(model: str) -> ChatOpenAI:
+            return ChatOpenAI(
+                model=model,
+                temperature=0.7,
+                api_key=settings.OPENAI_API_KEY,
+                http_client=self._http_client,
+                http_async_client=self._http_async_client,
+            )
+
+        def executor(system_prompt: str, tools) -> AgentExecutor:
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                ("human", "{input}"),
+                ("placeholder", "{agent_scratchpad}"),
+            ])
+            agent = create_tool_calling_agent(llm, tools, prompt)
+            return AgentExecutor(agent=agent, tools=tools, verbose=True)
+
+        llm = chat_model("gpt-4o-mini")
+        sms_tools = SirenAgentToolkit(
+            api_key=settings.SIREN_API_KEY, configuration={"actions": SMS_SIREN_ACTIONS}
+        ).get_tools()
+        product_tools = get_linkedin_tools() + SirenAgentToolkit(
+            api_key=settings.SIREN_API_KEY, configuration={"actions": PRODUCT_SIREN_ACTIONS}
+        ).get_tools()
+
+        components = {
+            "llm": llm,
+            "personalization_llm": (
+                llm if settings.PERSONALIZATION_MODEL == "gpt-4o-mini" else chat_model(settings.PERSONALIZATION_MODEL)
+            ),
+            "sms_agent": executor(SMS_AGENT_SYSTEM_PROMPT, sms_tools),
+            "product_agent": executor(PRODUCT_AGENT_SYSTEM_PROMPT, product_tools),
+        }
+        logger.info(f"Built campaign components in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return components
+
+    def _get(self, name: str) -> Any:
+        if self._components is None:
+            self._components = self._build()
+        return self._components[name]
+
+    @property
+    def llm(self):
+        """gpt-4o-mini chat model for template drafting and the agents."""
+        return self._get("llm")
+
+    @property
+    def personalization_llm(self):
+        """Chat model for batched personalization (PERSONALIZATION_MODEL)."""
+        return self._get("personalization_llm")
+
+    @property
+    def sms_agent(self):
+        """Agent executor that writes and sends one SMS per run; input: ``input``."""
+        return self._get("sms_agent")
+
+    @property
+    def product_agent(self):
+        """Agent executor that researches and emails one lead; inputs: ``input``, ``product_info``."""
+        return self._get("product_agent")
+
+    def structured(self, schema: type, *, personalization: bool = False, include_raw: bool = False):
+        """``with_structured_output(schema)`` of one of the chat models, built once per schema."""
+        key = ("personalization_llm" if personalization else "llm", schema, include_raw)
+        runnable = self._structured.get(key)
+        if runnable is None:
+            runnable = self._structured[key] = self._get(key[0]).with_structured_output(
+                schema, include_raw=include_raw
+            )
+        return runnable
+
+    async def start(self) -> None:
+        """Build the components and, with LLM_WARMUP, open a connection to OpenAI."""
+        self._get("llm")
+        if settings.LLM_WARMUP:
+            await self.warm_up()
+
+    async def warm_up(self) -> None:
+        """One cheap authenticated request on the shared pool; failures are only logged."""
+        started = time.perf_counter()
+        try:
+            response = await self._http_async_client.get(
+                WARMUP_URL,
+                headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"},
+                timeout=WARMUP_TIMEOUT,
+            )
+            logger.info(
+                f"OpenAI warm-up answered {response.status_code} in {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+        except Exception as e:
+            logger.warning(f"OpenAI warm-up failed: {e}")
+
+    async def aclose(self) -> None:
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+        self._components = None
+        self._structured = {}
+        self._http_client = self._http_async_client = None
+
+
+# Singleton instance for easy access
+component_registry = ComponentRegistry()
@@ -0,0 +1,113 @@
+"""
+COPY-based lead ingest.
+
+Rows are streamed with asyncpg's binary COPY into an unlogged, per-import staging table and
+merged into ``leads`` with a single set-based ``INSERT ... SELECT ... ON CONFLICT DO NOTHING``.
+The whole import runs in one transaction, so it either lands completely or not at all.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.leads.dedup import EmailDeduplicator
+from app.core.leads.importer import ProgressCallback, RowSource, resolve_batch_size, row_batches
+from app.core.leads.validation import LeadValidator
+from app.schemas.leads import LeadBulkInsertResponse
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STAGE_COLUMNS = ("row_number", "name", "email", "mobile")
+
+MERGE_SQL = """
+WITH inserted AS (
+    INSERT INTO leads (id, name, email, mobile)
+    SELECT gen_random_uuid(), s.name, s.email, s.mobile
+    FROM (
+        SELECT DISTINCT ON (email) row_number, name, email, mobile
+        FROM {stage}
+        ORDER BY email, row_number
+    ) AS s
+    ORDER BY s.row_number
+    ON CONFLICT (email) DO NOTHING
+    RETURNING 1
+)
+SELECT
+    (SELECT count(*) FROM {stage}) AS staged_rows,
+    (SELECT count(*) FROM inserted) AS inserted_rows
+"""
+
+
+async def copy_import_rows(
+    db: AsyncSession,
+    rows: RowSource,
+    batch_size: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    dedup: Optional[EmailDeduplicator] = None,
+    validator: Optional[LeadValidator] = None,
+) -> LeadBulkInsertResponse:
+    """
+    Bulk load rows through a staging table and merge them into ``leads``.
+
+    COPY does not go through bind parameters, so batches only bound how much of the
+    file is held in memory at once, not the statement size. Rows are validated,
+    normalized and deduplicated in-file before staging; the merge counts what was
+    already stored.
+    """
+    size = resolve_batch_size(batch_size)
+    dedup = dedup or EmailDeduplicator()
+    validator = validator or LeadValidator()
+    stage = f"lead_import_stage_{uuid.uuid4().hex}"
+
+    # Run the DDL through SQLAlchemy first so the asyncpg connection is inside the
+    # session's transaction before we use it directly for COPY.
+    await db.execute(text(
+        f"CREATE UNLOGGED TABLE {stage} (row_number integer, name text, email text, mobile text)"
+    ))
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+
+    totals = LeadBulkInsertResponse(total_rows=0, inserted_count=0, duplicate_count=0, failed_count=0)
+    try:
+        async for rows_batch in row_batches(rows, size):
+            valid = validator.validate(dedup.normalize(rows_batch))
+            unique, in_file = dedup.drop_seen(valid)
+            if unique:
+                await driver.copy_records_to_table(stage, records=unique, columns=STAGE_COLUMNS)
+                # stored or already present once the merge commits; a rollback only leaves
+                # the filter with extra bits
+                dedup.remember(row.email for row in unique)
+            totals.total_rows += len(rows_batch)
+            totals.failed_count += len(rows_batch) - len(valid)
+            totals.in_file_duplicate_count += in_file
+            totals.duplicate_count += in_file
+            if progress:
+                await progress(totals)
+
+        result = await db.execute(text(MERGE_SQL.format(stage=stage)))
+        staged, inserted = result.one()
+        await db.execute(text(f"DROP TABLE {stage}"))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        validator.close()
+
+    await dedup.save(db)
+
+    logger.info(f"COPY import merged {inserted} of {staged} staged rows via {stage}")
+    totals.inserted_count = inserted
+    totals.existing_duplicate_count = staged - inserted
+    totals.duplicate_count += staged - inserted
+    totals.validation_errors = validator.errors
+    totals.failure_reasons = dict(validator.reasons)
+    totals.error_report_id = validator.report_id
+    if totals.total_rows and totals.failed_count == totals.total_rows:
+        totals.errors.append("No valid rows with email found")
+    return totals
@@ -0,0 +1,281 @@
+"""
+Email normalization and duplicate detection for lead imports.
+
+Emails are stored trimmed and lowercased (``ck_leads_email_normalized`` enforces it), so the
+unique index on ``leads.email`` matches case-insensitively and every writer must normalize.
+Every import gets an in-memory hash set of the emails it has already seen, so repeated rows
+never reach Postgres. Optionally, a Bloom filter of stored emails is kept in
+``lead_email_filters`` next to the ``leads`` table: batches whose emails are all definitely
+new skip the existence lookup, and only possible matches are checked against the database.
+Every ingest path adds the emails it stores and then merges its filter into the stored one
+by OR-ing the bits under a row lock, so concurrent imports never drop each other's emails.
+The filter may still lag behind the table (e.g. after a crashed import); that only costs an
+extra ON CONFLICT skip, never a lost lead. Extra bits only cost an extra lookup.
+
+The process-wide filter is loaded in the background (``warm_email_filter``, at startup),
+building it by scanning ``leads`` if none is stored; imports that start before it is ready
+run without it rather than wait for the scan.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+from typing import TYPE_CHECKING, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.leads.repository import lead_repository
+from app.db.database import AsyncSessionLocal
+from app.db.models import Lead, LeadEmailFilter
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.core.leads.importer import LeadRow
+
+logger = get_logger(__name__)
+
+EMAIL_FILTER_NAME = "lead_emails"
+FILTER_BUILD_CHUNK = 10_000
+
+
+def normalize_email(email: str, strip_plus: bool = False) -> str:
+    """Trim and lowercase an email; with ``strip_plus`` drop a ``+tag`` from the local part."""
+    email = email.strip().lower()
+    if strip_plus and "@" in email:
+        local, _, domain = email.rpartition("@")
+        local = local.split("+", 1)[0]
+        email = f"{local}@{domain}"
+    return email
+
+
+class EmailBloomFilter:
+    """Fixed-size Bloom filter over normalized emails, using double hashing on blake2b."""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytes] = None, item_count: int = 0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((num_bits + 7) // 8)
+        self.item_count = item_count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> "EmailBloomFilter":
+        num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, email: str):
+        digest = hashlib.blake2b(email.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, email: str) -> None:
+        for pos in self._positions(email):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.item_count += 1
+
+    def __contains__(self, email: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(email))
+
+    def same_shape(self, num_bits: int, num_hashes: int) -> bool:
+        return self.num_bits == num_bits and self.num_hashes == num_hashes
+
+    def merge(self, bits: bytes, item_count: int) -> None:
+        """OR in the bits of a filter of the same shape; ``item_count`` stays an estimate."""
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(bits, "little")
+        self.bits = bytearray(merged.to_bytes(len(self.bits), "little"))
+        self.item_count = max(self.item_count, item_count)
+
+
+_email_filter: Optional[EmailBloomFilter] = None
+_email_filter_task: Optional[asyncio.Task] = None
+
+
+async def load_email_filter(db: AsyncSession) -> EmailBloomFilter:
+    """The stored filter, or one built by scanning ``leads`` and then stored."""
+    stored = await db.get(LeadEmailFilter, EMAIL_FILTER_NAME)
+    if stored is not None:
+        return EmailBloomFilter(stored.num_bits, stored.num_hashes, stored.bits, stored.item_count)
+
+    bloom = EmailBloomFilter.for_capacity(settings.LEAD_EMAIL_FILTER_CAPACITY, settings.LEAD_EMAIL_FILTER_ERROR_RATE)
+    emails = await db.stream_scalars(
+        select(Lead.email).execution_options(yield_per=FILTER_BUILD_CHUNK)
+    )
+    async for email in emails:
+        bloom.add(email)
+    logger.info(f"Built lead email filter from {bloom.item_count} stored leads")
+    # stored so other processes and restarts load it instead of scanning again
+    try:
+        await save_email_filter(db, bloom)
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Could not save the lead email filter: {e}")
+    return bloom
+
+
+async def _warm_email_filter() -> None:
+    global _email_filter
+    try:
+        async with AsyncSessionLocal() as db:
+            _email_filter = await load_email_filter(db)
+    except Exception as e:
+        # the next import starts another attempt
+        logger.warning(f"Could not load the lead email filter: {e}")
+
+
+def warm_email_filter() -> None:
+    """Start loading the process-wide filter in the background, unless it is loaded or loading."""
+    global _email_filter_task
+    if not settings.LEAD_EMAIL_FILTER_ENABLED or _email_filter is not None:
+        return
+    if _email_filter_task is None or _email_filter_task.done():
+        _email_filter_task = asyncio.create_task(_warm_email_filter(), name="lead-email-filter")
+
+
+def get_email_filter() -> Optional[EmailBloomFilter]:
+    """The process-wide filter, or None while it is still loading (or disabled)."""
+    warm_email_filter()
+    return _email_filter
+
+
+async def save_email_filter(db: AsyncSession, bloom: EmailBloomFilter) -> None:
+    """
+    Merge the filter with the stored one and persist it, so other processes and restarts
+    start from it. The stored row is locked while its bits are OR-ed in, so a concurrent
+    save is merged rather than overwritten; ``bloom`` picks up the other writers' bits too.
+    """
+    while True:
+        stored = (
+            await db.execute(
+                select(LeadEmailFilter)
+                .where(LeadEmailFilter.name == EMAIL_FILTER_NAME)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+        ).scalar_one_or_none()
+        if stored is not None:
+            break
+        created = await db.execute(
+            insert(LeadEmailFilter)
+            .values(
+                name=EMAIL_FILTER_NAME,
+                num_bits=bloom.num_bits,
+                num_hashes=bloom.num_hashes,
+                item_count=bloom.item_count,
+                bits=bytes(bloom.bits),
+            )
+            .on_conflict_do_nothing(index_elements=[LeadEmailFilter.name])
+            .returning(LeadEmailFilter.name)
+        )
+        if created.first() is not None:
+            await db.commit()
+            return
+        # another process created it first; lock and merge into theirs
+
+    if bloom.same_shape(stored.num_bits, stored.num_hashes):
+        bloom.merge(stored.bits, stored.item_count)
+    else:
+        # the filter settings changed; the stored filter cannot be merged and is replaced
+        logger.warning(
+            f"Replacing stored lead email filter of {stored.num_bits} bits with one of {bloom.num_bits} bits"
+        )
+        stored.num_bits = bloom.num_bits
+        stored.num_hashes = bloom.num_hashes
+    stored.bits = bytes(bloom.bits)
+    stored.item_count = bloom.item_count
+    await db.commit()
+
+
+class EmailDeduplicator:
+    """
+    Per-import normalization and duplicate tracking.
+
+    With ``max_seen`` the set of seen emails is reset once it reaches that size, bounding
+    memory for unbounded streams; a later repeat then reaches ON CONFLICT and is counted as
+    an existing duplicate instead of an in-file one.
+    """
+
+    def __init__(
+        self,
+        strip_plus: bool = False,
+        bloom: Optional[EmailBloomFilter] = None,
+        max_seen: Optional[int] = None,
+    ):
+        self.strip_plus = strip_plus
+        self.bloom = bloom
+        self.max_seen = max_seen
+        self._seen: Set[str] = set()
+        self._added = 0
+
+    def normalize(self, rows: Iterable[LeadRow]) -> List[LeadRow]:
+        """Return rows with trimmed, lowercased emails."""
+        return [row._replace(email=normalize_email(row.email)) if row.email else row for row in rows]
+
+    def _key(self, email: str) -> str:
+        return normalize_email(email, strip_plus=True) if self.strip_plus else email
+
+    def drop_seen(self, rows: List[LeadRow]) -> Tuple[List[LeadRow], int]:
+        """Remove rows whose email already appeared in this import; returns (unique rows, dropped)."""
+        if self.max_seen is not None and len(self._seen) >= self.max_seen:
+            self._seen.clear()
+        unique = []
+        for row in rows:
+            key = self._key(row.email)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            unique.append(row)
+        return unique, len(rows) - len(unique)
+
+    def forget(self, rows: Iterable[LeadRow]) -> None:
+        """Undo ``drop_seen`` for rows that were not written."""
+        for row in rows:
+            self._seen.discard(self._key(row.email))
+
+    async def stored_emails(self, db: AsyncSession, rows: List[LeadRow]) -> Set[str]:
+        """
+        Emails from ``rows`` that already exist in ``leads``.
+
+        Without a filter this returns an empty set and ON CONFLICT handles existing rows.
+        With one, only emails the filter reports as possibly present are looked up, and the
+        lookup is skipped entirely when there are none.
+        """
+        if self.bloom is None:
+            return set()
+        candidates = [row.email for row in rows if row.email in self.bloom]
+        return await lead_repository.existing_emails(db, candidates)
+
+    def remember(self, emails: Iterable[str]) -> None:
+        """Record emails that are now stored."""
+        if self.bloom is None:
+            return
+        for email in emails:
+            if email not in self.bloom:
+                self.bloom.add(email)
+                self._added += 1
+
+    async def save(self, db: AsyncSession) -> None:
+        """
+        Merge the emails remembered by this import into the stored filter. Best effort: a
+        failure is logged and rolled back, since a lagging filter only costs extra lookups.
+        """
+        if self.bloom is None or not self._added:
+            return
+        try:
+            await save_email_filter(db, self.bloom)
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Could not save the lead email filter: {e}")
+            return
+        self._added = 0
+
+
+def create_deduplicator(strip_plus: bool = False, max_seen: Optional[int] = None) -> EmailDeduplicator:
+    """Deduplicator for one import, backed by the stored-email filter once it is loaded."""
+    bloom = get_email_filter()
+    return EmailDeduplicator(strip_plus=strip_plus, bloom=bloom, max_seen=max_seen)
@@ -0,0 +1,284 @@
+"""
+Streaming exports of leads and campaign results.
+
+Rows are read through a server-side cursor in LEAD_EXPORT_BATCH_SIZE partitions and each
+partition is encoded and written to the response before the next one is fetched, so
+memory is bounded by one partition whatever the table size. The header (or the Parquet /
+Arrow preamble) is sent before the query runs, which keeps time-to-first-byte low.
+
+XLSX is the exception: a workbook is a zip whose directory is written last, so openpyxl's
+write-only mode spools the sheet to a temporary file and the file is streamed once complete.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import Select, select
+
+from app.core.config import settings
+from app.core.leads.importer import SPOOL_CHUNK_SIZE
+from app.db.database import read_session
+from app.db.models import CampaignResult, Lead
+from app.schemas.leads import LeadExportFormat
+
+MEDIA_TYPES = {
+    LeadExportFormat.CSV: "text/csv",
+    LeadExportFormat.NDJSON: "application/x-ndjson",
+    LeadExportFormat.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    LeadExportFormat.PARQUET: "application/vnd.apache.parquet",
+    LeadExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+# The first partition is split so its opening rows go out before the rest are encoded.
+FIRST_CHUNK_ROWS = 100
+
+STRING = "string"
+INTEGER = "integer"
+TIMESTAMP = "timestamp"
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    name: str
+    kind: str = STRING
+
+
+# Lead column names match what the importer accepts, so an export can be imported elsewhere.
+LEAD_COLUMNS = (
+    ExportColumn("id"),
+    ExportColumn("name"),
+    ExportColumn("email"),
+    ExportColumn("mobile"),
+    ExportColumn("created_at", TIMESTAMP),
+)
+
+CAMPAIGN_RESULT_COLUMNS = (
+    ExportColumn("id", INTEGER),
+    ExportColumn("lead_name"),
+    ExportColumn("recipient"),
+    ExportColumn("status"),
+    ExportColumn("detail"),
+    ExportColumn("created_at", TIMESTAMP),
+)
+
+
+def leads_query() -> Select:
+    return select(Lead.id, Lead.name, Lead.email, Lead.mobile, Lead.created_at).order_by(Lead.created_at, Lead.id)
+
+
+def campaign_results_query(campaign_id: uuid.UUID) -> Select:
+    return (
+        select(
+            CampaignResult.id,
+            CampaignResult.lead_name,
+            CampaignResult.recipient,
+            CampaignResult.status,
+            CampaignResult.detail,
+            CampaignResult.created_at,
+        )
+        .where(CampaignResult.campaign_id == campaign_id)
+        .order_by(CampaignResult.id)
+    )
+
+
+def _text(value):
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class _ChunkSink:
+    """Write-only file object that collects what a writer produces until drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _Encoder(abc.ABC):
+    """Turns row partitions into bytes; ``header`` and ``close`` frame the output."""
+
+    def __init__(self, columns: Sequence[ExportColumn]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b""
+
+    @abc.abstractmethod
+    def encode(self, rows: Sequence[Tuple]) -> bytes:
+        ...
+
+    def close(self) -> Iterator[bytes]:
+        return iter(())
+
+
+class _CsvEncoder(_Encoder):
+    def _write(self, rows) -> bytes:
+        out = io.StringIO()
+        csv.writer(out).writerows(rows)
+        return out.getvalue().encode()
+
+    def header(self) -> bytes:
+        return self._write([[column.name for column in self.columns]])
+
+    def encode(self, rows):
+        return self._write([_text(value) for value in row] for row in rows)
+
+
+class _NdjsonEncoder(_Encoder):
+    def encode(self, rows):
+        names = [column.name for column in self.columns]
+        return "".join(
+            json.dumps(dict(zip(names, row)), default=_text, separators=(",", ":")) + "\n" for row in rows
+        ).encode()
+
+
+class _XlsxEncoder(_Encoder):
+    def __init__(self, columns):
+        super().__init__(columns)
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append([column.name for column in columns])
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, datetime):
+            # Excel has no time zones; write UTC wall-clock time
+            return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+
+    def encode(self, rows):
+        for row in rows:
+            self._sheet.append([self._cell(value) for value in row])
+        return b""
+
+    def close(self):
+        fd, path = tempfile.mkstemp(suffix=".xlsx", dir=settings.LEAD_IMPORT_SPOOL_DIR)
+        os.close(fd)
+        try:
+            self._workbook.save(path)
+            with open(path, "rb") as f:
+                while chunk := f.read(SPOOL_CHUNK_SIZE):
+                    yield chunk
+        finally:
+            os.unlink(path)
+
+
+class _ArrowEncoder(_Encoder):
+    """Parquet and Arrow IPC stream output; one record batch per partition."""
+
+    def __init__(self, columns, export_format: LeadExportFormat):
+        super().__init__(columns)
+        import pyarrow as pa
+
+        types = {STRING: pa.string(), INTEGER: pa.int64(), TIMESTAMP: pa.timestamp("us", tz="UTC")}
+        self._schema = pa.schema([(column.name, types[column.kind]) for column in columns])
+        self._sink = _ChunkSink()
+        if export_format == LeadExportFormat.PARQUET:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self._sink, self._schema)
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, self._schema)
+
+    def header(self):
+        return self._sink.drain()
+
+    def encode(self, rows):
+        import pyarrow as pa
+
+        arrays = []
+        for column, values in zip(self.columns, zip(*rows)):
+            if column.kind == STRING:
+                values = [_text(value) for value in values]
+            arrays.append(pa.array(values, self._schema.field(column.name).type))
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self):
+        self._writer.close()
+        yield self._sink.drain()
+
+
+def _encoder(export_format: LeadExportFormat, columns: Sequence[ExportColumn]) -> _Encoder:
+    if export_format == LeadExportFormat.CSV:
+        return _CsvEncoder(columns)
+    if export_format == LeadExportFormat.NDJSON:
+        return _NdjsonEncoder(columns)
+    if export_format == LeadExportFormat.XLSX:
+        return _XlsxEncoder(columns)
+    return _ArrowEncoder(columns, export_format)
+
+
+async def export_rows(
+    stmt: Select, columns: Sequence[ExportColumn], export_format: LeadExportFormat
+) -> AsyncIterator[bytes]:
+    """
+    Yield the encoded result of ``stmt`` chunk by chunk.
+
+    The session is opened here rather than taken from a request dependency, because the
+    body is streamed after the endpoint has returned; it reads from a replica when one is
+    configured and within the lag limit. Encoding runs on a worker thread so
+    large partitions do not stall the event loop.
+    """
+    encoder = _encoder(export_format, columns)
+    if header := encoder.header():
+        yield header
+    async with read_session() as db:
+        result = await db.stream(stmt.execution_options(yield_per=settings.LEAD_EXPORT_BATCH_SIZE))
+        first = True
+        async for partition in result.partitions():
+            parts = [partition[:FIRST_CHUNK_ROWS], partition[FIRST_CHUNK_ROWS:]] if first else [partition]
+            first = False
+            for rows in parts:
+                if rows and (chunk := await asyncio.to_thread(encoder.encode, rows)):
+                    yield chunk
+    tail = encoder.close()
+    while (chunk := await asyncio.to_thread(next, tail, None)) is not None:
+        if chunk:
+            yield chunk
+
+
+def export_leads(export_format: LeadExportFormat) -> AsyncIterator[bytes]:
+    return export_rows(leads_query(), LEAD_COLUMNS, export_format)
+
+
+def export_campaign_results(campaign_id: uuid.UUID, export_format: LeadExportFormat) -> AsyncIterator[bytes]:
+    return export_rows(campaign_results_query(campaign_id), CAMPAIGN_RESULT_COLUMNS, export_format)
@@ -0,0 +1,104 @@
+"""
+Bounded-concurrency fan-out for broadcast sends.
+
+``fan_out`` runs a send per item with at most BROADCAST_SEND_CONCURRENCY in flight, a
+timeout on each, and an optional token bucket in front of each send. ``iter_fan_out``
+yields the outcomes as the sends finish, for callers that report progress instead of
+waiting for the whole broadcast.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.outbound import TokenBucket, siren_governor
+
+T = TypeVar("T")
+
+
+# Direct Siren sends are paced inside the Siren client (see app.core.outbound). Sends that
+# reach Siren another way, like the agents' toolkit, take a token from the same bucket here.
+siren_rate_limiter = siren_governor.bucket
+
+
+class SendSkipped(Exception):
+    """Raised by a send that decided not to send, e.g. because the message already went out."""
+
+
+@dataclass
+class SendOutcome:
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+    skipped: bool = False
+    # a failure that certainly did not reach the provider, so retrying cannot send twice
+    rejected: bool = False
+
+
+async def _attempt(send: Callable[[T], Awaitable[Any]], item: T, timeout: float) -> SendOutcome:
+    try:
+        return SendOutcome(True, await asyncio.wait_for(send(item), timeout))
+    except SendSkipped as e:
+        return SendOutcome(False, error=str(e), skipped=True)
+    except asyncio.TimeoutError:
+        return SendOutcome(False, error=f"Timed out after {timeout:g}s")
+    except Exception as e:
+        return SendOutcome(False, error=str(e))
+
+
+async def fan_out(
+    items: Sequence[T],
+    send: Callable[[T], Awaitable[Any]],
+    *,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    rate_limiter: Optional[TokenBucket] = None,
+) -> List[SendOutcome]:
+    """
+    ``send`` every item and return the outcomes in item order; a failure or timeout is
+    recorded in its outcome instead of stopping the others.
+
+    A fixed set of workers pulls items in order, so memory stays flat for large broadcasts.
+    """
+    outcomes: List[Optional[SendOutcome]] = [None] * len(items)
+    async for index, outcome in iter_fan_out(
+        items, send, concurrency=concurrency, timeout=timeout, rate_limiter=rate_limiter
+    ):
+        outcomes[index] = outcome
+    return outcomes
+
+
+async def iter_fan_out(
+    items: Sequence[T],
+    send: Callable[[T], Awaitable[Any]],
+    *,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    rate_limiter: Optional[TokenBucket] = None,
+) -> AsyncIterator[Tuple[int, SendOutcome]]:
+    """
+    Like ``fan_out``, but yield ``(index, outcome)`` as each send finishes instead of
+    collecting them. Workers wait while the consumer lags, so at most ``concurrency``
+    outcomes are held; closing the iterator cancels the sends still in flight.
+    """
+    concurrency = max(1, concurrency or settings.BROADCAST_SEND_CONCURRENCY)
+    timeout = timeout or settings.BROADCAST_SEND_TIMEOUT
+    finished: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    next_index = iter(range(len(items)))
+
+    async def worker() -> None:
+        for index in next_index:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            await finished.put((index, await _attempt(send, items[index], timeout)))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))]
+    try:
+        for _ in range(len(items)):
+            yield await finished.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
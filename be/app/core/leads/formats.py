@@ -0,0 +1,204 @@
+"""
+Lead file formats and the columnar (CSV / Parquet / Arrow) reader.
+
+Workbooks go through openpyxl in the parser pool (``app.core.leads.parsing``). The columnar
+formats are read with pyarrow instead: files are decoded a record batch at a time in C++,
+only the name, email and mobile columns are materialised, and each batch is turned into
+``LeadRow`` tuples column by column, so they feed the same insert / COPY paths as sheets.
+Rows are numbered as in a sheet: the header counts as row 1, the first record is row 2.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import os
+from itertools import repeat
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, List, Optional
+
+from app.core.leads.importer import LeadImportError, LeadRow, estimate_workbook_rows, resolve_columns
+from app.core.leads.parsing import workbook_batches
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+XLSX = ".xlsx"
+CSV = ".csv"
+PARQUET = ".parquet"
+ARROW = ".arrow"
+FEATHER = ".feather"
+
+SUPPORTED_SUFFIXES = (XLSX, CSV, PARQUET, ARROW, FEATHER)
+COLUMNAR_SUFFIXES = (CSV, PARQUET, ARROW, FEATHER)
+
+FIRST_DATA_ROW = 2
+
+
+def file_suffix(filename: Optional[str]) -> str:
+    """Lowercased extension of a lead file; raises LeadImportError for unsupported ones."""
+    suffix = os.path.splitext(filename or "")[1].lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise LeadImportError(f"Unsupported file type, expected one of: {', '.join(SUPPORTED_SUFFIXES)}")
+    return suffix
+
+
+def _select_columns(names: List[str]) -> Dict[str, str]:
+    """Map lead fields to the file's column names."""
+    return {field: names[idx] for field, idx in resolve_columns(names).items()}
+
+
+def _csv_header(path: str) -> List[str]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def _csv_record_batches(path: str) -> Iterator[pa.RecordBatch]:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    columns = _select_columns(_csv_header(path))
+    # Read everything as text: type inference would turn a column of digits into integers.
+    convert_options = pacsv.ConvertOptions(
+        include_columns=list(columns.values()),
+        column_types={name: pa.string() for name in columns.values()},
+        strings_can_be_null=False,
+    )
+    reader = pacsv.open_csv(path, convert_options=convert_options)
+    try:
+        for batch in reader:
+            yield _rename(batch, columns)
+    finally:
+        reader.close()
+
+
+def _parquet_record_batches(path: str, batch_size: int) -> Iterator[pa.RecordBatch]:
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    try:
+        columns = _select_columns(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=list(columns.values())):
+            yield _rename(batch, columns)
+    finally:
+        parquet.close()
+
+
+def _arrow_record_batches(path: str) -> Iterator[pa.RecordBatch]:
+    import pyarrow as pa
+
+    with pa.memory_map(path) as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # not the random-access file format; read it as an IPC stream
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            batches = iter(reader)
+        columns = _select_columns(reader.schema.names)
+        for batch in batches:
+            yield _rename(batch.select(list(columns.values())), columns)
+
+
+def _rename(batch: pa.RecordBatch, columns: Dict[str, str]) -> pa.RecordBatch:
+    import pyarrow as pa
+
+    return pa.RecordBatch.from_arrays(
+        [batch.column(name) for name in columns.values()], names=list(columns.keys())
+    )
+
+
+def _record_batches(path: str, suffix: str, batch_size: int) -> Iterator[pa.RecordBatch]:
+    """Record batches of at most ``batch_size`` rows with ``name``, ``email`` and maybe ``mobile``."""
+    if suffix == CSV:
+        batches = _csv_record_batches(path)
+    elif suffix == PARQUET:
+        batches = _parquet_record_batches(path, batch_size)
+    else:
+        batches = _arrow_record_batches(path)
+    for batch in batches:
+        # CSV blocks and IPC batches are sized by the writer; re-slice them (zero-copy).
+        for offset in range(0, batch.num_rows, batch_size):
+            yield batch.slice(offset, batch_size)
+
+
+def _text(column: pa.Array) -> pa.Array:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+        column = pc.cast(column, pa.string())
+    return pc.utf8_trim_whitespace(pc.fill_null(column, ""))
+
+
+def _batch_rows(batch: pa.RecordBatch, first_row: int) -> List[LeadRow]:
+    """Turn a record batch into lead rows, skipping rows with neither name nor email."""
+    import pyarrow.compute as pc
+
+    names = _text(batch.column("name"))
+    emails = _text(batch.column("email"))
+    mobiles = _text(batch.column("mobile")) if "mobile" in batch.schema.names else None
+
+    numbers = range(first_row, first_row + batch.num_rows)
+    present = pc.or_(pc.not_equal(names, ""), pc.not_equal(emails, ""))
+    if not pc.all(present).as_py():
+        keep = pc.indices_nonzero(present)
+        names, emails = names.take(keep), emails.take(keep)
+        mobiles = mobiles.take(keep) if mobiles is not None else None
+        numbers = pc.add(keep, first_row).to_pylist()
+
+    mobile_values = mobiles.to_pylist() if mobiles is not None else repeat(None)
+    return list(map(LeadRow._make, zip(numbers, names.to_pylist(), emails.to_pylist(), mobile_values)))
+
+
+def iter_columnar_batches(path: str, batch_size: int) -> Iterator[List[LeadRow]]:
+    """Stream lead row batches from a CSV, Parquet or Arrow IPC file."""
+    suffix = file_suffix(path)
+    next_row = FIRST_DATA_ROW
+    for batch in _record_batches(path, suffix, batch_size):
+        rows = _batch_rows(batch, next_row)
+        next_row += batch.num_rows
+        if rows:
+            yield rows
+
+
+async def columnar_batches(path: str, batch_size: int) -> AsyncIterator[List[LeadRow]]:
+    """
+    Async wrapper over ``iter_columnar_batches``.
+
+    Decoding happens in pyarrow with the GIL released, so batches are produced on a worker
+    thread rather than in the parser processes.
+    """
+    batches = iter_columnar_batches(path, batch_size)
+    try:
+        while (rows := await asyncio.to_thread(next, batches, None)) is not None:
+            yield rows
+    finally:
+        batches.close()
+
+
+def lead_file_batches(path: str, batch_size: int) -> AsyncIterator[List[LeadRow]]:
+    """Stream row batches from any supported lead file, chosen by its extension."""
+    if file_suffix(path) == XLSX:
+        return workbook_batches(path, batch_size)
+    return columnar_batches(path, batch_size)
+
+
+def estimate_rows(path: str) -> Optional[int]:
+    """Data row count from file metadata where the format has it (not for CSV)."""
+    suffix = file_suffix(path)
+    if suffix == XLSX:
+        return estimate_workbook_rows(path)
+    if suffix == PARQUET:
+        import pyarrow.parquet as pq
+
+        return pq.read_metadata(path).num_rows
+    if suffix in (ARROW, FEATHER):
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            try:
+                reader = pa.ipc.open_file(source)
+            except pa.ArrowInvalid:
+                return None
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    return None
@@ -0,0 +1,315 @@
+"""
+Streaming lead import pipeline.
+
+Uploads are spooled to disk, the worksheet is read lazily with ``iter_rows`` and rows are
+upserted in fixed-size batches, so memory stays flat regardless of the file size.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from itertools import islice
+from typing import (
+    AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TypeVar, Union
+)
+
+from fastapi import UploadFile
+from openpyxl import load_workbook
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.leads.dedup import EmailDeduplicator
+from app.core.leads.repository import lead_repository
+from app.core.leads.validation import LeadValidator
+from app.schemas.leads import LeadBulkInsertResponse, LeadImportBatch
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Upper bound on rows written per transaction. The upsert passes columns as arrays, so
+# this is not a bind-parameter limit, only a cap on transaction and memory size.
+MAX_BATCH_SIZE = 50_000
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+# Either plain rows (batched here) or row batches already sized by the producer, such as
+# the parser pool in ``app.core.leads.parsing``.
+RowSource = Union[Iterable["LeadRow"], AsyncIterable[List["LeadRow"]]]
+
+# Called after every batch with the running totals of the import.
+ProgressCallback = Callable[[LeadBulkInsertResponse], Awaitable[None]]
+
+
+class LeadImportError(ValueError):
+    """Raised when an import file cannot be interpreted as a lead sheet."""
+
+
+class LeadBatchError(RuntimeError):
+    """Raised by ``import_rows(stop_on_failure=True)`` when a batch could not be written."""
+
+
+class LeadRow(NamedTuple):
+    row_number: int
+    name: str
+    email: str
+    mobile: Optional[str]
+
+
+# Accepted header names per field: the sheet template's names and the plain names used
+# by the export, so an exported file can be imported as-is.
+HEADER_ALIASES = {
+    "name": ("lead name", "name"),
+    "email": ("lead email", "email"),
+    "mobile": ("lead mobile", "mobile"),
+}
+
+
+def _normalize_header(s: Optional[str]) -> str:
+    return (s or "").strip().lower()
+
+
+def resolve_columns(headers: Iterable[Optional[str]]) -> Dict[str, int]:
+    """
+    Map ``name``, ``email`` and (if present) ``mobile`` to their column indexes.
+
+    Raises LeadImportError when the name or email column is missing.
+    """
+    header_map: Dict[str, int] = {}
+    for idx, header in enumerate(headers):
+        header_map.setdefault(_normalize_header(header), idx)
+
+    columns = {}
+    for field, aliases in HEADER_ALIASES.items():
+        idx = next((header_map[alias] for alias in aliases if alias in header_map), None)
+        if idx is not None:
+            columns[field] = idx
+        elif field != "mobile":
+            raise LeadImportError(f"Missing required column: {aliases[0]}")
+    return columns
+
+
+def resolve_batch_size(batch_size: Optional[int] = None) -> int:
+    """Clamp the requested batch size to MAX_BATCH_SIZE."""
+    size = batch_size or settings.LEAD_IMPORT_BATCH_SIZE
+    return max(1, min(size, MAX_BATCH_SIZE))
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield lists of at most ``size`` items without materialising the iterable."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def batched_async(iterable: AsyncIterable[T], size: int) -> AsyncIterator[List[T]]:
+    """Async counterpart of ``batched``."""
+    batch: List[T] = []
+    async for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def row_batches(rows: RowSource, size: int) -> AsyncIterator[List[LeadRow]]:
+    """Iterate a row source as batches of at most ``size`` rows."""
+    if hasattr(rows, "__aiter__"):
+        async for rows_batch in rows:
+            yield rows_batch
+    else:
+        for rows_batch in batched(rows, size):
+            yield rows_batch
+
+
+async def spool_upload(file: UploadFile, suffix: str = ".xlsx") -> str:
+    """
+    Copy an upload to a temporary file on disk in fixed-size chunks.
+
+    The caller owns the returned path and must remove it once the import is done.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="lead-import-", dir=settings.LEAD_IMPORT_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(SPOOL_CHUNK_SIZE):
+                out.write(chunk)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def iter_sheet_rows(ws) -> Iterator[LeadRow]:
+    """
+    Lazily yield lead rows from a worksheet.
+
+    Expects headers ``Lead Name``, ``Lead Email`` and optionally ``Lead Mobile``
+    (case-insensitive, the ``Lead`` prefix may be omitted) in the first row.
+    """
+    rows = ws.iter_rows(values_only=True)
+    columns = resolve_columns(next(rows, None) or ())
+    name_idx = columns["name"]
+    email_idx = columns["email"]
+    mobile_idx = columns.get("mobile")
+
+    for row_number, row in enumerate(rows, start=2):
+        name = _cell(row, name_idx)
+        email = _cell(row, email_idx)
+        mobile = _cell(row, mobile_idx) if mobile_idx is not None else ""
+        if not name and not email:
+            # skip completely empty lines
+            continue
+        yield LeadRow(row_number, name, email, mobile or None)
+
+
+def _cell(row: tuple, idx: int) -> str:
+    value = row[idx] if idx < len(row) else None
+    return str(value).strip() if value is not None else ""
+
+
+def estimate_workbook_rows(path: str) -> Optional[int]:
+    """Data row count according to the sheet's stored dimensions, without reading the rows."""
+    wb = load_workbook(filename=path, read_only=True, data_only=True)
+    try:
+        max_row = wb.active.max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        wb.close()
+
+
+def iter_workbook_rows(path: str) -> Iterator[LeadRow]:
+    """Open a workbook in read-only mode and stream rows from its active sheet."""
+    wb = load_workbook(filename=path, read_only=True, data_only=True)
+    try:
+        yield from iter_sheet_rows(wb.active)
+    finally:
+        wb.close()
+
+
+async def upsert_batch(
+    db: AsyncSession,
+    batch_no: int,
+    rows: List[LeadRow],
+    dedup: EmailDeduplicator,
+    validator: LeadValidator,
+) -> LeadImportBatch:
+    """Insert one batch of valid rows, skipping emails already seen or stored, and commit it."""
+    valid = validator.validate(dedup.normalize(rows))
+    unique, in_file = dedup.drop_seen(valid)
+
+    inserted = 0
+    try:
+        stored = await dedup.stored_emails(db, unique)
+        new_rows = [row for row in unique if row.email not in stored]
+        if new_rows:
+            inserted = await lead_repository.upsert(db, new_rows)
+            await db.commit()
+    except Exception:
+        # let later occurrences of these emails be retried
+        dedup.forget(unique)
+        raise
+
+    dedup.remember(row.email for row in unique)
+    existing = len(unique) - inserted
+    return LeadImportBatch(
+        batch=batch_no,
+        first_row=rows[0].row_number,
+        last_row=rows[-1].row_number,
+        total_rows=len(rows),
+        inserted_count=inserted,
+        duplicate_count=in_file + existing,
+        in_file_duplicate_count=in_file,
+        existing_duplicate_count=existing,
+        failed_count=len(rows) - len(valid),
+    )
+
+
+async def import_rows(
+    db: AsyncSession,
+    rows: RowSource,
+    batch_size: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    dedup: Optional[EmailDeduplicator] = None,
+    validator: Optional[LeadValidator] = None,
+    keep_batches: bool = True,
+    stop_on_failure: bool = False,
+) -> LeadBulkInsertResponse:
+    """
+    Upsert rows in fixed-size batches, committing after each one.
+
+    Rows failing validation are reported and skipped. A batch that fails in the database
+    is rolled back and counted as failed; the import carries on with the next batch, or,
+    with ``stop_on_failure``, stops with ``LeadBatchError`` so that every batch before
+    the failed one is committed and none after it is.
+    Without ``keep_batches`` only the latest batch is kept in ``batches``.
+    """
+    size = resolve_batch_size(batch_size)
+    dedup = dedup or EmailDeduplicator()
+    validator = validator or LeadValidator()
+    response = LeadBulkInsertResponse(total_rows=0, inserted_count=0, duplicate_count=0, failed_count=0)
+
+    batch_no = 0
+    try:
+        async for rows_batch in row_batches(rows, size):
+            batch_no += 1
+            batch = await _import_batch(db, batch_no, rows_batch, dedup, validator, response, stop_on_failure)
+            if keep_batches:
+                response.batches.append(batch)
+            else:
+                response.batches = [batch]
+            response.total_rows += batch.total_rows
+            response.inserted_count += batch.inserted_count
+            response.duplicate_count += batch.duplicate_count
+            response.in_file_duplicate_count += batch.in_file_duplicate_count
+            response.existing_duplicate_count += batch.existing_duplicate_count
+            response.failed_count += batch.failed_count
+            _apply_validation(response, validator)
+            if progress:
+                await progress(response)
+    finally:
+        validator.close()
+        # committed batches are stored even if a later one stopped the import
+        await dedup.save(db)
+
+    if response.total_rows and response.failed_count == response.total_rows:
+        response.errors.append("No valid rows with email found")
+    return response
+
+
+def _apply_validation(response: LeadBulkInsertResponse, validator: LeadValidator) -> None:
+    response.validation_errors = validator.errors
+    response.failure_reasons = dict(validator.reasons)
+    response.error_report_id = validator.report_id
+
+
+async def _import_batch(
+    db: AsyncSession,
+    batch_no: int,
+    rows_batch: List[LeadRow],
+    dedup: EmailDeduplicator,
+    validator: LeadValidator,
+    response: LeadBulkInsertResponse,
+    stop_on_failure: bool = False,
+) -> LeadImportBatch:
+    try:
+        return await upsert_batch(db, batch_no, rows_batch, dedup, validator)
+    except Exception as e:
+        await db.rollback()
+        logger.exception(f"Lead import batch {batch_no} failed: {e}")
+        error = f"Batch {batch_no} (rows {rows_batch[0].row_number}-{rows_batch[-1].row_number}) failed: {e}"
+        if stop_on_failure:
+            raise LeadBatchError(error) from e
+        response.errors.append(error)
+        return LeadImportBatch(
+            batch=batch_no,
+            first_row=rows_batch[0].row_number,
+            last_row=rows_batch[-1].row_number,
+            total_rows=len(rows_batch),
+            inserted_count=0,
+            duplicate_count=0,
+            failed_count=len(rows_batch),
+        )
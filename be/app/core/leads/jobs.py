@@ -0,0 +1,371 @@
+"""
+Background lead import jobs.
+
+Jobs are persisted in ``import_jobs`` and executed by an in-process runner that caps how
+many imports run at once. Progress is written back to the job row after every batch.
+
+A queued or running job holds a lease (``lease_expires_at``) that its process renews every
+third of LEAD_IMPORT_LEASE_SECONDS. If the process dies, the lease lapses and the job is
+resumable like a failed one: at the next startup, by re-submitting the same file, or with
+POST /leads/imports/{job_id}/resume.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import time
+import uuid
+from datetime import timedelta
+from typing import AsyncIterator, List, Optional, Set
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.leads.copy_ingest import copy_import_rows
+from app.core.leads.dedup import create_deduplicator
+from app.core.leads.formats import XLSX, estimate_rows, file_suffix, lead_file_batches
+from app.core.leads.importer import LeadImportError, LeadRow, import_rows, resolve_batch_size
+from app.core.leads.uploads import stored_file_path
+from app.core.leads.validation import LeadValidator
+from app.db.database import AsyncSessionLocal
+from app.db.models import ImportJob
+from app.schemas.leads import ImportJobStatus, LeadBulkInsertResponse, LeadIngestMode
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Only the first errors are kept on the job row; the counters carry the totals.
+MAX_STORED_ERRORS = 100
+
+# Backoff between attempts to resume abandoned jobs while the database is unreachable.
+RECOVERY_RETRY_SECONDS = 1.0
+RECOVERY_RETRY_MAX_SECONDS = 60.0
+
+
+ACTIVE_STATUSES = (ImportJobStatus.QUEUED.value, ImportJobStatus.RUNNING.value)
+
+
+async def update_job(job_id: uuid.UUID, **values) -> None:
+    """Persist job fields in a short transaction of their own."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+        await db.commit()
+
+
+def lease_expiry():
+    """``lease_expires_at`` of a lease taken now."""
+    return func.now() + timedelta(seconds=settings.LEAD_IMPORT_LEASE_SECONDS)
+
+
+# Queued or running, but no live process has renewed the lease.
+_ABANDONED = and_(
+    ImportJob.status.in_(ACTIVE_STATUSES),
+    or_(ImportJob.lease_expires_at.is_(None), ImportJob.lease_expires_at < func.now()),
+)
+
+
+async def requeue_job(db: AsyncSession, job: ImportJob, **values) -> bool:
+    """
+    Queue a failed or abandoned job again under a fresh lease, setting any other job
+    ``values`` given, and refresh ``job``. Returns False, changing nothing, if the job is
+    alive in some process or was requeued first by another caller.
+    """
+    result = await db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id, or_(ImportJob.status == ImportJobStatus.FAILED.value, _ABANDONED))
+        .values(status=ImportJobStatus.QUEUED.value, lease_expires_at=lease_expiry(), **values)
+        .returning(ImportJob.id)
+    )
+    requeued = result.first() is not None
+    await db.commit()
+    await db.refresh(job)
+    return requeued
+
+
+def job_source_path(job: ImportJob) -> Optional[str]:
+    """File a job imports: its copy in the content store, or the server path it was given."""
+    if not job.file_sha256:
+        return job.filename
+    try:
+        suffix = file_suffix(job.filename) if job.filename else XLSX
+    except LeadImportError:
+        return None
+    return stored_file_path(job.file_sha256, suffix)
+
+
+class ImportJobRunner:
+    """Runs queued import jobs as asyncio tasks, at most ``max_concurrent`` at a time."""
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._max_queued = max_queued
+        self._tasks: Set[asyncio.Task] = set()
+        self._recovery: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Jobs that are running or waiting for a slot."""
+        return len(self._tasks)
+
+    def has_capacity(self) -> bool:
+        return self.pending < self._max_queued
+
+    def submit(
+        self,
+        job_id: uuid.UUID,
+        path: str,
+        mode: LeadIngestMode,
+        batch_size: Optional[int] = None,
+        strip_plus_tags: bool = False,
+        cleanup: bool = False,
+    ) -> None:
+        """
+        Schedule an import of ``path`` for an existing job row.
+
+        With ``cleanup`` the runner takes ownership of the file and removes it when done.
+        """
+        task = asyncio.create_task(self._run(job_id, path, mode, batch_size, strip_plus_tags, cleanup), name=f"lead-import-{job_id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def recover(self) -> int:
+        """
+        Resume the jobs abandoned by processes that died; returns how many were resumed.
+        Jobs whose file is gone are marked failed.
+        """
+        async with AsyncSessionLocal() as db:
+            jobs = (await db.scalars(select(ImportJob).where(_ABANDONED))).all()
+            resumed = 0
+            for job in jobs:
+                path = job_source_path(job)
+                if not path or not os.path.exists(path):
+                    await db.execute(
+                        update(ImportJob)
+                        .where(ImportJob.id == job.id, _ABANDONED)
+                        .values(
+                            status=ImportJobStatus.FAILED.value,
+                            error="Import interrupted and its source file is no longer available",
+                            finished_at=func.now(),
+                        )
+                    )
+                    await db.commit()
+                    continue
+                if await requeue_job(db, job):
+                    logger.info(f"Resuming lead import job {job.id} abandoned by a stopped process")
+                    self.submit(job.id, path, LeadIngestMode(job.mode), job.batch_size, job.strip_plus_tags)
+                    resumed += 1
+        return resumed
+
+    def start_recovery(self) -> None:
+        """
+        Run ``recover`` in the background, retrying with backoff until it succeeds, so a
+        database that is slow or down at startup neither blocks nor fails the startup.
+        """
+        if self._recovery is None or self._recovery.done():
+            self._recovery = asyncio.create_task(self._recover_until_done(), name="lead-import-recovery")
+
+    async def _recover_until_done(self) -> None:
+        delay = RECOVERY_RETRY_SECONDS
+        while True:
+            try:
+                resumed = await self.recover()
+            except Exception as e:
+                logger.exception(f"Could not resume abandoned lead imports, retrying in {delay:g}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECOVERY_RETRY_MAX_SECONDS)
+                continue
+            if resumed:
+                logger.info(f"Resumed {resumed} abandoned lead import job(s)")
+            return
+
+    async def shutdown(self) -> None:
+        """Stop recovery and cancel outstanding jobs; each one is marked failed before its task exits."""
+        if self._recovery is not None:
+            self._recovery.cancel()
+            await asyncio.gather(self._recovery, return_exceptions=True)
+            self._recovery = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(
+        self,
+        job_id: uuid.UUID,
+        path: str,
+        mode: LeadIngestMode,
+        batch_size: Optional[int],
+        strip_plus_tags: bool,
+        cleanup: bool,
+    ) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            async with self._slots:
+                await self._execute(job_id, path, mode, batch_size, strip_plus_tags)
+        except asyncio.CancelledError:
+            await update_job(
+                job_id,
+                status=ImportJobStatus.FAILED.value,
+                error="Import interrupted by shutdown",
+                finished_at=func.now(),
+            )
+            raise
+        finally:
+            heartbeat.cancel()
+            if cleanup:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    async def _heartbeat(job_id: uuid.UUID) -> None:
+        """Renew the job's lease while it waits for a slot and while it runs."""
+        interval = settings.LEAD_IMPORT_LEASE_SECONDS / 3
+        while True:
+            try:
+                await update_job(job_id, lease_expires_at=lease_expiry())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not renew the lease of lead import job {job_id}: {e}")
+            await asyncio.sleep(interval)
+
+    async def _execute(
+        self,
+        job_id: uuid.UUID,
+        path: str,
+        mode: LeadIngestMode,
+        batch_size: Optional[int],
+        strip_plus_tags: bool,
+    ) -> None:
+        started = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            job = await db.get(ImportJob, job_id)
+        if job is None:
+            logger.warning(f"Lead import job {job_id} no longer exists; nothing to run")
+            return
+        # A resumed job keeps its counters and skips rows already committed. COPY imports
+        # commit all at once, so they always start over.
+        resumable = mode == LeadIngestMode.INSERT
+        base = _Counters.from_job(job) if resumable else _Counters()
+        resume_after = job.last_committed_row if resumable else 0
+
+        try:
+            estimated = estimate_rows(path)
+        except Exception:
+            estimated = None
+        await update_job(
+            job_id,
+            status=ImportJobStatus.RUNNING.value,
+            rows_estimated=estimated,
+            error=None,
+            started_at=func.now(),
+            finished_at=None,
+            **base.values(),
+        )
+
+        async def progress(totals: LeadBulkInsertResponse) -> None:
+            elapsed = time.monotonic() - started
+            rate = totals.total_rows / elapsed if elapsed > 0 else None
+            parsed = base.rows_parsed + totals.total_rows
+            eta = None
+            if rate and estimated is not None:
+                eta = max(estimated - parsed, 0) / rate
+            values = base.plus(totals)
+            if totals.batches:
+                values["last_committed_row"] = totals.batches[-1].last_row
+            await update_job(
+                job_id,
+                rows_per_second=rate,
+                eta_seconds=eta,
+                failure_reasons=dict(validator.reasons),
+                error_report_id=validator.report_id,
+                **values,
+            )
+
+        # Stop at the first batch that fails to commit, so last_committed_row never moves
+        # past rows that were rolled back; resuming retries from that batch.
+        if mode == LeadIngestMode.COPY:
+            ingest = copy_import_rows
+        else:
+            ingest = functools.partial(import_rows, stop_on_failure=True)
+        validator = LeadValidator(write_report=True)
+        try:
+            async with AsyncSessionLocal() as db:
+                dedup = create_deduplicator(strip_plus=strip_plus_tags)
+                rows = lead_file_batches(path, resolve_batch_size(batch_size))
+                if resume_after:
+                    logger.info(f"Resuming lead import job {job_id} after row {resume_after}")
+                    rows = _skip_rows(rows, resume_after)
+                result = await ingest(
+                    db, rows, batch_size=batch_size, progress=progress, dedup=dedup, validator=validator
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Lead import job {job_id} failed: {e}")
+            await update_job(job_id, status=ImportJobStatus.FAILED.value, error=str(e), finished_at=func.now())
+            return
+
+        elapsed = time.monotonic() - started
+        values = base.plus(result)
+        if result.batches:
+            values["last_committed_row"] = result.batches[-1].last_row
+        await update_job(
+            job_id,
+            status=ImportJobStatus.COMPLETED.value,
+            rows_per_second=result.total_rows / elapsed if elapsed > 0 else None,
+            eta_seconds=0,
+            errors=(base.errors + result.errors)[:MAX_STORED_ERRORS],
+            validation_errors=[error.model_dump() for error in result.validation_errors],
+            failure_reasons=result.failure_reasons,
+            error_report_id=result.error_report_id,
+            finished_at=func.now(),
+            **values,
+        )
+        logger.info(f"Lead import job {job_id} completed: {values['inserted_count']} inserted of {values['rows_parsed']}")
+
+
+class _Counters:
+    """Counters carried over from an earlier, interrupted run of the same job."""
+
+    FIELDS = ("inserted_count", "duplicate_count", "in_file_duplicate_count", "existing_duplicate_count", "failed_count")
+
+    def __init__(self, rows_parsed: int = 0, errors: Optional[List[str]] = None, **counts: int):
+        self.rows_parsed = rows_parsed
+        self.errors = errors or []
+        self.counts = {field: counts.get(field, 0) for field in self.FIELDS}
+
+    @classmethod
+    def from_job(cls, job: ImportJob) -> "_Counters":
+        return cls(
+            rows_parsed=job.rows_parsed,
+            errors=list(job.errors or []),
+            **{field: getattr(job, field) for field in cls.FIELDS},
+        )
+
+    def values(self) -> dict:
+        return {"rows_parsed": self.rows_parsed, **self.counts}
+
+    def plus(self, totals: LeadBulkInsertResponse) -> dict:
+        values = {field: self.counts[field] + getattr(totals, field) for field in self.FIELDS}
+        values["rows_parsed"] = self.rows_parsed + totals.total_rows
+        return values
+
+
+async def _skip_rows(batches: AsyncIterator[List[LeadRow]], after_row: int) -> AsyncIterator[List[LeadRow]]:
+    """Drop rows at or before ``after_row``; they were committed by an earlier run."""
+    async for rows_batch in batches:
+        remaining = [row for row in rows_batch if row.row_number > after_row]
+        if remaining:
+            yield remaining
+
+
+# Singleton instance for easy access
+import_job_runner = ImportJobRunner(
+    max_concurrent=settings.LEAD_IMPORT_MAX_CONCURRENT_JOBS,
+    max_queued=settings.LEAD_IMPORT_MAX_QUEUED_JOBS,
+)
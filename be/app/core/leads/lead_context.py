@@ -0,0 +1,70 @@
+"""
+LinkedIn context for batched personalization.
+
+The agent path lets the LLM decide which Lix calls to make for each lead. For batched
+personalization the calls are fixed and made directly, on the async Lix client: look the
+lead up by email, then read their recent posts. The responses are compacted into a short
+text the batch prompt can carry.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Iterable, List, Optional, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LINKEDIN_CONTEXT_CONCURRENCY = 8
+CONTEXT_MAX_CHARS = 1500
+RECENT_POSTS = 3
+
+
+def _profile_url(data: Any) -> Optional[str]:
+    """First LinkedIn profile URL anywhere in a Lix response."""
+    if isinstance(data, str):
+        return data if "linkedin.com/in/" in data else None
+    values = data.values() if isinstance(data, dict) else data if isinstance(data, list) else ()
+    for value in values:
+        url = _profile_url(value)
+        if url:
+            return url
+    return None
+
+
+def _compact(data: Any, limit: int) -> str:
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+async def linkedin_context(name: str, email: str) -> str:
+    """Profile and recent posts of a lead as compact text; empty if nothing was found."""
+    from app.core.graphs.tools.linkedin import make_lix_request_async
+
+    person = await make_lix_request_async("lookc/person/by-email", {"email": email})
+    if not person or "error" in person:
+        logger.debug(f"No LinkedIn profile found for {name}: {person}")
+        return ""
+    parts = [f"profile: {_compact(person, CONTEXT_MAX_CHARS // 2)}"]
+    profile_url = _profile_url(person)
+    if profile_url:
+        posts = await make_lix_request_async("activity/posts", {"profile_url": profile_url, "count": RECENT_POSTS})
+        if posts and "error" not in posts:
+            parts.append(f"recent posts: {_compact(posts, CONTEXT_MAX_CHARS // 2)}")
+    return "\n".join(parts)
+
+
+async def gather_linkedin_context(leads: Iterable[Tuple[str, str]]) -> List[str]:
+    """``linkedin_context`` for each ``(name, email)``, fetched concurrently; failures give ''."""
+    semaphore = asyncio.Semaphore(LINKEDIN_CONTEXT_CONCURRENCY)
+
+    async def fetch(name: str, email: str) -> str:
+        async with semaphore:
+            try:
+                return await linkedin_context(name, email)
+            except Exception as e:
+                logger.warning(f"LinkedIn lookup failed for {name}: {e}")
+                return ""
+
+    return await asyncio.gather(*(fetch(name, email) for name, email in leads))
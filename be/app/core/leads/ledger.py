@@ -0,0 +1,259 @@
+"""
+Ledger of sent messages.
+
+Every broadcast send is recorded in ``sent_messages`` under (scope, channel, recipient),
+where the scope is a hash of what the request asked to send. A retried broadcast computes
+the same scope, so its recipients that were already messaged are skipped without an API
+call. Lookups go through an in-process LRU of SENT_LEDGER_CACHE_SIZE keys first; the
+unique index on the table settles everything the cache has not seen, including races
+between processes.
+
+A send reserves its row before it goes out and releases it only if the send definitely did
+not go out (see ``definitely_unsent``); synchronous senders such as graph nodes use
+``reserve_blocking`` and ``release_blocking``. A send that timed out, was cancelled, or
+failed in a way that may have reached the provider keeps its reservation, as does a process
+that dies mid-send, so that message is not retried: the ledger errs towards not messaging a
+lead twice.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, List, Sequence, Set, Tuple
+
+from sqlalchemy import String, any_, bindparam, delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.graphs.tools.siren import SirenSendError
+from app.core.leads.fanout import SendSkipped
+from app.core.outbound import CircuitOpenError
+from app.core.leads.repository import CompiledQuery
+from app.db.database import AsyncSessionLocal, blocking_db
+from app.db.models import SentMessage
+
+ALREADY_SENT = "already sent"
+
+_RESERVE = CompiledQuery(
+    insert(SentMessage)
+    .values(scope=bindparam("scope"), channel=bindparam("channel"), recipient=bindparam("recipient"))
+    .on_conflict_do_nothing(index_elements=["scope", "channel", "recipient"])
+    .returning(SentMessage.id)
+)
+
+_RELEASE = CompiledQuery(
+    delete(SentMessage).where(
+        SentMessage.scope == bindparam("scope"),
+        SentMessage.channel == bindparam("channel"),
+        SentMessage.recipient == bindparam("recipient"),
+    )
+)
+
+_keys = (
+    func.unnest(
+        bindparam("scopes", type_=ARRAY(String)),
+        bindparam("channels", type_=ARRAY(String)),
+        bindparam("recipients", type_=ARRAY(String)),
+    )
+    .table_valued("scope", "channel", "recipient")
+    .render_derived(name="k")
+)
+
+_RESERVE_MANY = CompiledQuery(
+    insert(SentMessage)
+    .from_select(["scope", "channel", "recipient"], select(_keys.c.scope, _keys.c.channel, _keys.c.recipient))
+    .on_conflict_do_nothing(index_elements=["scope", "channel", "recipient"])
+    .returning(SentMessage.scope, SentMessage.channel, SentMessage.recipient)
+)
+
+_RELEASE_MANY = CompiledQuery(
+    delete(SentMessage).where(
+        tuple_(SentMessage.scope, SentMessage.channel, SentMessage.recipient).in_(
+            select(_keys.c.scope, _keys.c.channel, _keys.c.recipient)
+        )
+    )
+)
+
+_SCOPE_RECIPIENTS = CompiledQuery(
+    select(SentMessage.recipient).where(
+        SentMessage.scope == bindparam("scope"), SentMessage.channel == bindparam("channel")
+    )
+)
+
+_CONTACTED = CompiledQuery(
+    select(SentMessage.recipient)
+    .where(
+        SentMessage.channel == bindparam("channel"),
+        SentMessage.recipient == any_(bindparam("recipients", type_=ARRAY(String))),
+    )
+    .distinct()
+)
+
+
+def content_scope(channel: str, content: Any) -> str:
+    """Ledger scope of sending ``content`` on ``channel``: the same request gives the same scope."""
+    canonical = json.dumps([channel, content], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def definitely_unsent(error: BaseException) -> bool:
+    """
+    Whether a failed send certainly did not reach the provider: Siren rejected it (4xx, or
+    never connected), its circuit was open, or the message was refused before sending
+    (``ValueError``, e.g. a template that does not render).
+    """
+    if isinstance(error, SirenSendError):
+        return error.rejected
+    return isinstance(error, (CircuitOpenError, ValueError))
+
+
+def one_off_scope() -> str:
+    """A scope no other send shares, for sends that must go out even if repeated."""
+    return uuid.uuid4().hex
+
+
+class SentLedger:
+    """``sent_messages`` behind an LRU of keys known to be sent."""
+
+    def __init__(self, cache_size: int):
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
+        # graph nodes check the cache from worker threads
+        self._lock = threading.Lock()
+
+    def seen(self, scope: str, channel: str, recipient: str) -> bool:
+        """Whether this process knows the message was sent; O(1), no I/O."""
+        key = (scope, channel, recipient)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return True
+        return False
+
+    def remember(self, scope: str, channel: str, recipient: str) -> None:
+        with self._lock:
+            self._cache[(scope, channel, recipient)] = None
+            self._cache.move_to_end((scope, channel, recipient))
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, scope: str, channel: str, recipient: str) -> None:
+        with self._lock:
+            self._cache.pop((scope, channel, recipient), None)
+
+    async def preload(self, db: AsyncSession, scope: str, channel: str) -> int:
+        """Cache every recipient already sent ``scope``, so a retry skips them without queries."""
+        count = 0
+        for (recipient,) in await _SCOPE_RECIPIENTS.execute(db, scope=scope, channel=channel):
+            self.remember(scope, channel, recipient)
+            count += 1
+        return count
+
+    @staticmethod
+    async def _insert_reservation(db: AsyncSession, scope: str, channel: str, recipient: str) -> bool:
+        reserved = (await _RESERVE.execute(db, scope=scope, channel=channel, recipient=recipient)).first()
+        await db.commit()
+        return reserved is not None
+
+    @staticmethod
+    async def _delete_reservation(db: AsyncSession, scope: str, channel: str, recipient: str) -> None:
+        await _RELEASE.execute(db, scope=scope, channel=channel, recipient=recipient)
+        await db.commit()
+
+    async def reserve(self, scope: str, channel: str, recipient: str) -> bool:
+        """Claim the send; False if it was already sent (or is being sent elsewhere)."""
+        if self.seen(scope, channel, recipient):
+            return False
+        async with AsyncSessionLocal() as db:
+            reserved = await self._insert_reservation(db, scope, channel, recipient)
+        self.remember(scope, channel, recipient)
+        return reserved
+
+    async def release(self, scope: str, channel: str, recipient: str) -> None:
+        """Undo a reservation whose send definitely did not go out, so a retry sends it."""
+        self._forget(scope, channel, recipient)
+        async with AsyncSessionLocal() as db:
+            await self._delete_reservation(db, scope, channel, recipient)
+
+    def reserve_blocking(self, scope: str, channel: str, recipient: str) -> bool:
+        """``reserve`` for synchronous callers."""
+        if self.seen(scope, channel, recipient):
+            return False
+        reserved = blocking_db.run(lambda db: self._insert_reservation(db, scope, channel, recipient))
+        self.remember(scope, channel, recipient)
+        return reserved
+
+    def release_blocking(self, scope: str, channel: str, recipient: str) -> None:
+        """``release`` for synchronous callers."""
+        self._forget(scope, channel, recipient)
+        blocking_db.run(lambda db: self._delete_reservation(db, scope, channel, recipient))
+
+    async def reserve_many(
+        self, db: AsyncSession, keys: Iterable[Tuple[str, str, str]]
+    ) -> Set[Tuple[str, str, str]]:
+        """
+        Reserve ``(scope, channel, recipient)`` keys in the caller's transaction, in one
+        statement; returns the keys this call reserved. Keys already sent, or reserved by
+        another sender, are left out.
+        """
+        pending = {key for key in keys if not self.seen(*key)}
+        if not pending:
+            return set()
+        scopes, channels, recipients = (list(column) for column in zip(*pending))
+        result = await _RESERVE_MANY.execute(db, scopes=scopes, channels=channels, recipients=recipients)
+        reserved = {tuple(row) for row in result}
+        for key in pending:
+            self.remember(*key)
+        return reserved
+
+    async def release_many(self, db: AsyncSession, keys: Iterable[Tuple[str, str, str]]) -> None:
+        """``release`` for reservations made with ``reserve_many``, in the caller's transaction."""
+        keys = list(keys)
+        if not keys:
+            return
+        for key in keys:
+            self._forget(*key)
+        scopes, channels, recipients = (list(column) for column in zip(*keys))
+        await _RELEASE_MANY.execute(db, scopes=scopes, channels=channels, recipients=recipients)
+
+    async def sent_recipients(self, db: AsyncSession, scope: str, channel: str) -> Set[str]:
+        """Recipients already sent ``scope`` on ``channel``."""
+        return {recipient for (recipient,) in await _SCOPE_RECIPIENTS.execute(db, scope=scope, channel=channel)}
+
+    async def contacted(self, db: AsyncSession, channel: str, recipients: List[str]) -> Set[str]:
+        """The subset of ``recipients`` that were ever sent anything on ``channel``."""
+        if not recipients:
+            return set()
+        result = await _CONTACTED.execute(db, channel=channel, recipients=recipients)
+        return {recipient for (recipient,) in result}
+
+    def guard(
+        self, send: Callable[[int], Awaitable[str]], scope: str, channel: str, leads: Sequence
+    ) -> Callable[[int], Awaitable[str]]:
+        """
+        Wrap a per-lead ``send(index)`` so it runs only if the lead's reservation succeeds;
+        a lead already sent is reported as skipped. A failed send is released only if it
+        definitely did not go out; after a timeout, a cancellation or a failure that may have
+        reached the provider the reservation stays, so the lead is not messaged twice.
+        """
+
+        async def guarded(index: int) -> str:
+            recipient = leads[index][1]
+            if not await self.reserve(scope, channel, recipient):
+                raise SendSkipped(ALREADY_SENT)
+            try:
+                return await send(index)
+            except Exception as e:
+                if definitely_unsent(e):
+                    await self.release(scope, channel, recipient)
+                raise
+
+        return guarded
+
+
+# Singleton instance for easy access
+sent_ledger = SentLedger(cache_size=settings.SENT_LEDGER_CACHE_SIZE)
@@ -0,0 +1,94 @@
+"""
+Keyset-paginated lead listing.
+
+Pages are ordered newest first by ``(created_at, id)`` and continue from an opaque cursor
+holding the last row's key, so fetching page N costs the same as page 1. Every filter has an
+index that ends in ``(created_at, id)`` (see ``app.db.models``); text search uses the
+trigram GIN indexes on name and email.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Lead, lead_email_domain
+from app.schemas.leads import LeadListResponse, LeadOut, LeadSearchMatch
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+@dataclass
+class LeadFilters:
+    has_mobile: Optional[bool] = None
+    email_domain: Optional[str] = None
+    created_after: Optional[datetime] = None
+    q: Optional[str] = None
+    match: LeadSearchMatch = LeadSearchMatch.PREFIX
+
+
+def encode_cursor(created_at: datetime, lead_id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(lead_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, lead_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), uuid.UUID(lead_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def _like_pattern(q: str, match: LeadSearchMatch) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if match == LeadSearchMatch.PREFIX else f"%{escaped}%"
+
+
+def _apply_filters(stmt: Select, filters: LeadFilters) -> Select:
+    if filters.has_mobile is True:
+        stmt = stmt.where(Lead.mobile.isnot(None))
+    elif filters.has_mobile is False:
+        stmt = stmt.where(Lead.mobile.is_(None))
+    if filters.email_domain:
+        stmt = stmt.where(lead_email_domain == filters.email_domain.strip().lower().lstrip("@"))
+    if filters.created_after is not None:
+        stmt = stmt.where(Lead.created_at > filters.created_after)
+    if filters.q:
+        pattern = _like_pattern(filters.q.strip(), filters.match)
+        stmt = stmt.where(or_(Lead.name.ilike(pattern, escape="\\"), Lead.email.ilike(pattern, escape="\\")))
+    return stmt
+
+
+async def list_leads(
+    db: AsyncSession,
+    filters: LeadFilters,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> LeadListResponse:
+    """One page of leads matching ``filters``, after ``cursor`` if given."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = _apply_filters(select(Lead), filters)
+    if cursor:
+        stmt = stmt.where(tuple_(Lead.created_at, Lead.id) < tuple_(*decode_cursor(cursor)))
+    # one extra row tells whether there is a next page
+    stmt = stmt.order_by(Lead.created_at.desc(), Lead.id.desc()).limit(limit + 1)
+
+    leads: List[Lead] = list((await db.execute(stmt)).scalars())
+    next_cursor = None
+    if len(leads) > limit:
+        leads = leads[:limit]
+        next_cursor = encode_cursor(leads[-1].created_at, leads[-1].id)
+    return LeadListResponse(items=[LeadOut.model_validate(lead) for lead in leads], next_cursor=next_cursor)
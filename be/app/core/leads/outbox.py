@@ -0,0 +1,519 @@
+"""
+Postgres-backed outbox for broadcast messages.
+
+A queued broadcast writes one ``message_outbox`` row per recipient, keyed by
+``<campaign>:<channel>:<recipient>`` so a recipient is enqueued at most once per campaign.
+Workers claim due rows with ``FOR UPDATE SKIP LOCKED``, so any number of them, in this
+process or in others started with ``python -m app.core.leads.outbox``, can share the queue
+without double-claiming. A claim is a lease: if a worker dies mid-send, the row becomes
+claimable again after OUTBOX_LEASE_SECONDS, unless that was its final attempt, in which
+case it is dead-lettered. Outcomes are written only while the claim's lease is still held
+(the row is still sending, with the attempt count it was claimed at), so a worker that
+stalled past its lease cannot overwrite the outcome of the worker that reclaimed the row.
+Failed sends are retried with exponential backoff and jitter and dead-lettered after
+OUTBOX_MAX_ATTEMPTS.
+
+Delivery is at-least-once for messages queued without a ledger scope: a worker that dies
+after the provider accepted a message but before recording it will have that message sent
+again once the lease expires. A message queued with a scope is at-most-once instead: it is
+reserved in ``sent_messages`` in the transaction that claims it, and a message whose
+reservation is already taken (by an overlapping broadcast of the same content, or by a claim
+that died mid-send) is marked skipped rather than sent. Its reservation is released only if
+Siren definitely did not take it; a failure that may have been delivered is dead-lettered
+at once instead of retried.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Integer,
+    Row,
+    String,
+    Text,
+    and_,
+    bindparam,
+    case,
+    exists,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.graphs.tools.siren import SirenMessage, siren_client
+from app.core.leads.fanout import SendOutcome
+from app.core.leads.ledger import ALREADY_SENT, sent_ledger
+from app.db.database import AsyncSessionLocal
+from app.db.models import Campaign, CampaignResult, OutboxMessage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+SKIPPED = "skipped"
+
+ENQUEUE_CHUNK = 1000
+
+
+@dataclass
+class OutboundMessage:
+    lead_name: str
+    recipient: str
+    body: str
+    subject: Optional[str] = None
+
+
+def idempotency_key(campaign_id: uuid.UUID, channel: str, recipient: str) -> str:
+    return f"{campaign_id}:{channel}:{recipient}"
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retrying after ``attempts`` failed sends: doubling, capped, with full jitter."""
+    ceiling = min(settings.OUTBOX_BACKOFF_MAX, settings.OUTBOX_BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+async def enqueue(
+    db: AsyncSession, campaign: Campaign, messages: Iterable[OutboundMessage], scope: Optional[str] = None
+) -> int:
+    """
+    Add one outbox row per message to the caller's transaction; returns rows queued. With a
+    ledger ``scope``, sent messages are recorded in the ledger under it.
+    """
+    queued = 0
+    chunk: List[dict] = []
+
+    async def flush() -> int:
+        stmt = (
+            insert(OutboxMessage)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=[OutboxMessage.idempotency_key])
+            .returning(OutboxMessage.id)
+        )
+        return len((await db.execute(stmt)).fetchall())
+
+    for message in messages:
+        payload = {"body": message.body}
+        if message.subject is not None:
+            payload["subject"] = message.subject
+        if scope is not None:
+            payload["scope"] = scope
+        chunk.append(
+            {
+                "campaign_id": campaign.id,
+                "idempotency_key": idempotency_key(campaign.id, campaign.channel, message.recipient),
+                "channel": campaign.channel,
+                "lead_name": message.lead_name,
+                "recipient": message.recipient,
+                "payload": payload,
+                "status": PENDING,
+                "attempts": 0,
+            }
+        )
+        if len(chunk) >= ENQUEUE_CHUNK:
+            queued += await flush()
+            chunk = []
+    if chunk:
+        queued += await flush()
+    return queued
+
+
+_CLAIMED_COLUMNS = (
+    OutboxMessage.id,
+    OutboxMessage.campaign_id,
+    OutboxMessage.channel,
+    OutboxMessage.lead_name,
+    OutboxMessage.recipient,
+    OutboxMessage.payload,
+    OutboxMessage.attempts,
+)
+
+
+async def _claim_where(db: AsyncSession, condition, order_by, limit: int) -> List[Row]:
+    ids = (
+        select(OutboxMessage.id)
+        .where(condition)
+        .order_by(order_by)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids.scalar_subquery()))
+        .values(
+            status=SENDING,
+            attempts=OutboxMessage.attempts + 1,
+            locked_until=func.now() + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+        )
+        .returning(*_CLAIMED_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    return list((await db.execute(stmt)).fetchall())
+
+
+_LEASE_EXPIRED = and_(OutboxMessage.status == SENDING, OutboxMessage.locked_until < func.now())
+
+
+async def claim(db: AsyncSession, limit: int) -> List[Row]:
+    """
+    Lease up to ``limit`` messages: expired leases of crashed workers first (unless their
+    attempts are used up; see ``dead_letter_expired``), then due pending messages in
+    ``next_attempt_at`` order. Each query is served by its own partial index.
+    """
+    rows = await _claim_where(
+        db,
+        and_(_LEASE_EXPIRED, OutboxMessage.attempts < settings.OUTBOX_MAX_ATTEMPTS),
+        OutboxMessage.locked_until,
+        limit,
+    )
+    if len(rows) < limit:
+        rows += await _claim_where(
+            db,
+            and_(OutboxMessage.status == PENDING, OutboxMessage.next_attempt_at <= func.now()),
+            OutboxMessage.next_attempt_at,
+            limit - len(rows),
+        )
+    return rows
+
+
+def _ledger_key(row: Row) -> Optional[Tuple[str, str, str]]:
+    scope = row.payload.get("scope")
+    return (scope, row.channel, row.recipient) if scope else None
+
+
+async def reserve(db: AsyncSession, rows: List[Row]) -> List[Row]:
+    """
+    Reserve the scoped messages of a claimed batch in the sent ledger, in the claim's
+    transaction, and mark those whose reservation is already taken as skipped. Returns the
+    rows to deliver.
+    """
+    reserved = await sent_ledger.reserve_many(db, {key for key in map(_ledger_key, rows) if key})
+    deliverable, skipped = [], []
+    for row in rows:
+        key = _ledger_key(row)
+        if key is None or key in reserved:
+            # a recipient queued twice under one scope (two campaigns) is sent once
+            reserved.discard(key)
+            deliverable.append(row)
+        else:
+            skipped.append(row)
+    if not skipped:
+        return deliverable
+
+    await db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_([row.id for row in skipped]))
+        .values(status=SKIPPED, locked_until=None, last_error=ALREADY_SENT)
+        .execution_options(synchronize_session=False)
+    )
+    db.add_all(
+        CampaignResult(
+            campaign_id=row.campaign_id,
+            lead_name=row.lead_name,
+            recipient=row.recipient,
+            status="skipped",
+            detail=ALREADY_SENT,
+        )
+        for row in skipped
+    )
+    await _settle_campaigns(db, Counter(), Counter(), {row.campaign_id for row in skipped})
+    return deliverable
+
+
+def _message(row: Row) -> SirenMessage:
+    return SirenMessage(row.recipient, row.channel.upper(), row.payload["body"], row.payload.get("subject"))
+
+
+def _sent_text(message: SirenMessage) -> str:
+    return f"{message.subject}\n\n{message.body}" if message.subject else message.body
+
+
+async def deliver(rows: List[Row]) -> List[SendOutcome]:
+    """Send a claimed batch as one Siren bulk send; the outcome of a sent message is its text."""
+    messages = [_message(row) for row in rows]
+    results = await siren_client.send_bulk(messages)
+    return [
+        SendOutcome(True, _sent_text(message))
+        if result.ok
+        else SendOutcome(False, error=result.error, rejected=result.rejected)
+        for message, result in zip(messages, results)
+    ]
+
+
+_table = OutboxMessage.__table__
+
+_outcomes = (
+    func.unnest(
+        bindparam("ids", type_=ARRAY(BigInteger)),
+        bindparam("claimed_attempts", type_=ARRAY(Integer)),
+        bindparam("statuses", type_=ARRAY(String)),
+        bindparam("next_attempts", type_=ARRAY(DateTime(timezone=True))),
+        bindparam("errors", type_=ARRAY(Text)),
+    )
+    .table_valued("id", "attempts", "status", "next_attempt_at", "error")
+    .render_derived(name="o")
+)
+
+# Only a worker that still holds the lease may write the outcome: if the lease expired and
+# another worker reclaimed the message, ``attempts`` has moved on and the row is skipped.
+_RECORD_OUTCOMES = (
+    _table.update()
+    .where(_table.c.id == _outcomes.c.id, _table.c.status == SENDING, _table.c.attempts == _outcomes.c.attempts)
+    .values(
+        status=_outcomes.c.status,
+        sent_at=case((_outcomes.c.status == SENT, func.now()), else_=_table.c.sent_at),
+        next_attempt_at=_outcomes.c.next_attempt_at,
+        last_error=_outcomes.c.error,
+        locked_until=None,
+    )
+    .returning(_table.c.id)
+)
+
+LEASE_EXPIRED_ERROR = "Worker lease expired during the final attempt"
+MAYBE_DELIVERED = "not retried, as Siren may have accepted it"
+
+
+async def _settle_campaigns(
+    db: AsyncSession, sent_by_campaign: Counter, dead_by_campaign: Counter, skipped: Iterable[uuid.UUID] = ()
+) -> None:
+    """
+    Add final outcomes to the campaign counters and finish campaigns with nothing left to
+    deliver; ``skipped`` campaigns had messages skipped, which no counter tracks.
+    """
+    finished: Set[uuid.UUID] = set(sent_by_campaign) | set(dead_by_campaign) | set(skipped)
+    for campaign_id in finished:
+        await db.execute(
+            update(Campaign)
+            .where(Campaign.id == campaign_id)
+            .values(
+                sent_count=Campaign.sent_count + sent_by_campaign[campaign_id],
+                failed_count=Campaign.failed_count + dead_by_campaign[campaign_id],
+            )
+        )
+        outstanding = exists().where(
+            OutboxMessage.campaign_id == campaign_id, OutboxMessage.status.in_((PENDING, SENDING))
+        )
+        await db.execute(
+            update(Campaign)
+            .where(Campaign.id == campaign_id, Campaign.finished_at.is_(None), ~outstanding)
+            .values(finished_at=func.now())
+        )
+
+
+async def record(db: AsyncSession, rows: List[Row], outcomes: List[SendOutcome]) -> Dict[str, int]:
+    """
+    Write the outcome of each claimed message: sent, rescheduled, or dead-lettered. Final
+    outcomes also go to ``campaign_results`` and the campaign counters, and a campaign with
+    nothing left to deliver is marked finished. Messages whose lease was lost to another
+    worker are left to that worker and counted as ``lost``. A scoped message's ledger
+    reservation is released if Siren definitely did not take it; if it may have, the message
+    keeps its reservation and is dead-lettered. Returns counts by resulting status.
+    """
+    now = datetime.now(timezone.utc)
+    statuses, next_attempts, errors = [], [], []
+    for row, outcome in zip(rows, outcomes):
+        if outcome.ok:
+            statuses.append(SENT)
+            next_attempts.append(now)
+            errors.append(None)
+        elif _ledger_key(row) and not outcome.rejected:
+            statuses.append(DEAD)
+            next_attempts.append(now)
+            errors.append(f"{outcome.error}; {MAYBE_DELIVERED}")
+        else:
+            dead = row.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+            statuses.append(DEAD if dead else PENDING)
+            next_attempts.append(now + timedelta(seconds=0 if dead else backoff_seconds(row.attempts)))
+            errors.append(outcome.error)
+
+    result = await db.execute(
+        _RECORD_OUTCOMES,
+        {
+            "ids": [row.id for row in rows],
+            "claimed_attempts": [row.attempts for row in rows],
+            "statuses": statuses,
+            "next_attempts": next_attempts,
+            "errors": errors,
+        },
+    )
+    held = {message_id for (message_id,) in result}
+
+    results, unsent = [], []
+    sent_by_campaign: Counter = Counter()
+    dead_by_campaign: Counter = Counter()
+    counts: Counter = Counter()
+    for row, outcome, status, error in zip(rows, outcomes, statuses, errors):
+        if row.id not in held:
+            counts["lost"] += 1
+            continue
+        counts[status] += 1
+        if not outcome.ok and outcome.rejected and _ledger_key(row):
+            unsent.append(_ledger_key(row))
+        if status == SENT:
+            sent_by_campaign[row.campaign_id] += 1
+        elif status == DEAD:
+            dead_by_campaign[row.campaign_id] += 1
+        else:
+            continue
+        results.append(
+            CampaignResult(
+                campaign_id=row.campaign_id,
+                lead_name=row.lead_name,
+                recipient=row.recipient,
+                status="sent" if status == SENT else "failed",
+                detail=outcome.value if outcome.ok else error,
+            )
+        )
+
+    if counts["lost"]:
+        logger.warning(f"{counts['lost']} outbox message(s) were reclaimed by another worker before being recorded")
+    await sent_ledger.release_many(db, unsent)
+    db.add_all(results)
+    await _settle_campaigns(db, sent_by_campaign, dead_by_campaign)
+    return dict(counts)
+
+
+async def dead_letter_expired(db: AsyncSession) -> int:
+    """
+    Dead-letter messages whose lease expired on their final attempt: the worker sending them
+    died or stalled, and claiming them again would exceed OUTBOX_MAX_ATTEMPTS. Returns how
+    many were dead-lettered.
+    """
+    ids = (
+        select(OutboxMessage.id)
+        .where(_LEASE_EXPIRED, OutboxMessage.attempts >= settings.OUTBOX_MAX_ATTEMPTS)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids.scalar_subquery()))
+        .values(status=DEAD, locked_until=None, last_error=LEASE_EXPIRED_ERROR)
+        .returning(OutboxMessage.campaign_id, OutboxMessage.lead_name, OutboxMessage.recipient)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.fetchall()
+    dead_by_campaign: Counter = Counter(row.campaign_id for row in rows)
+    db.add_all(
+        CampaignResult(
+            campaign_id=row.campaign_id,
+            lead_name=row.lead_name,
+            recipient=row.recipient,
+            status="failed",
+            detail=LEASE_EXPIRED_ERROR,
+        )
+        for row in rows
+    )
+    await _settle_campaigns(db, Counter(), dead_by_campaign)
+    return len(rows)
+
+
+async def campaign_progress(db: AsyncSession, campaign_id: uuid.UUID) -> Dict[str, int]:
+    """Outbox rows of a campaign by status."""
+    result = await db.execute(
+        select(OutboxMessage.status, func.count())
+        .where(OutboxMessage.campaign_id == campaign_id)
+        .group_by(OutboxMessage.status)
+    )
+    return {status: count for status, count in result}
+
+
+class OutboxWorker:
+    """Outbox worker coroutines; each claims a batch, sends it, records it, and repeats."""
+
+    def __init__(self, workers: int, batch_size: int, poll_interval: float):
+        self._workers = workers
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks or self._workers <= 0:
+            return
+        self._tasks = [asyncio.create_task(self._run(number)) for number in range(self._workers)]
+        logger.info(f"Started {self._workers} outbox worker(s)")
+
+    async def shutdown(self) -> None:
+        """Stop the workers; messages they had claimed are retried once their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def process_batch(self) -> int:
+        """Claim, reserve, deliver and record one batch; returns how many messages were claimed."""
+        async with AsyncSessionLocal() as db:
+            dead = await dead_letter_expired(db)
+            claimed = await claim(db, self._batch_size)
+            rows = await reserve(db, claimed)
+            await db.commit()
+        if dead:
+            logger.warning(f"Dead-lettered {dead} outbox message(s) whose final attempt's lease expired")
+        if len(rows) < len(claimed):
+            logger.info(f"Skipped {len(claimed) - len(rows)} outbox message(s) already sent")
+        if not rows:
+            return len(claimed)
+
+        outcomes = await deliver(rows)
+        async with AsyncSessionLocal() as db:
+            counts = await record(db, rows, outcomes)
+            await db.commit()
+        logger.info(f"Outbox batch of {len(rows)}: {counts}")
+        return len(claimed)
+
+    async def _run(self, number: int) -> None:
+        while True:
+            try:
+                claimed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Outbox worker {number} failed a round: {e}")
+                claimed = 0
+            if not claimed:
+                await asyncio.sleep(self._poll_interval)
+
+
+# Singleton instance for easy access
+outbox_worker = OutboxWorker(
+    workers=settings.OUTBOX_WORKERS,
+    batch_size=settings.OUTBOX_CLAIM_BATCH,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+)
+
+
+async def _serve(workers: int) -> None:
+    from app.db.database import close_db
+
+    worker = OutboxWorker(workers, settings.OUTBOX_CLAIM_BATCH, settings.OUTBOX_POLL_INTERVAL)
+    worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker.shutdown()
+        await close_db()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run outbox workers without the API.")
+    parser.add_argument("--workers", type=int, default=max(settings.OUTBOX_WORKERS, 1))
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.workers))
+    except KeyboardInterrupt:
+        pass
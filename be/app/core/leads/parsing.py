@@ -0,0 +1,126 @@
+"""
+Process-pool execution layer for spreadsheet parsing.
+
+openpyxl parsing is CPU-bound pure Python, so running it inside a request handler stalls
+every other request on the worker. Here the sheet is parsed in a separate process and row
+batches are streamed back through a bounded queue, which also throttles the parser when the
+database side falls behind.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterator, List, Optional
+
+from app.core.config import settings
+from app.core.leads.importer import LeadRow, batched, iter_workbook_rows
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Parsed batches buffered between the parser process and the inserter.
+PREFETCH_BATCHES = 4
+PUT_TIMEOUT_SECONDS = 0.5
+GET_TIMEOUT_SECONDS = 0.5
+
+_pool: Optional[ProcessPoolExecutor] = None
+_manager = None
+
+
+class _ParseFailed:
+    """Marker sent through the queue when the parser process raises."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _get_pool():
+    global _pool, _manager
+    if _pool is None:
+        # spawn rather than fork: the parent runs an event loop and driver threads.
+        ctx = multiprocessing.get_context("spawn")
+        _manager = ctx.Manager()
+        _pool = ProcessPoolExecutor(max_workers=settings.LEAD_IMPORT_PARSER_PROCESSES, mp_context=ctx)
+    return _pool, _manager
+
+
+def _put(out, stop, item) -> bool:
+    """Put with a timeout so an abandoned stream releases the parser process."""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=PUT_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _parse_worker(path: str, batch_size: int, out, stop) -> None:
+    """Runs in the pool: parse the sheet and push row batches, then ``None``."""
+    try:
+        for rows_batch in batched(iter_workbook_rows(path), batch_size):
+            if not _put(out, stop, rows_batch):
+                return
+    except Exception as e:
+        _put(out, stop, _ParseFailed(e))
+        return
+    _put(out, stop, None)
+
+
+async def _inline_batches(path: str, batch_size: int) -> AsyncIterator[List[LeadRow]]:
+    for rows_batch in batched(iter_workbook_rows(path), batch_size):
+        yield rows_batch
+        # give other requests a turn between batches
+        await asyncio.sleep(0)
+
+
+async def _pooled_batches(path: str, batch_size: int) -> AsyncIterator[List[LeadRow]]:
+    pool, manager = _get_pool()
+    loop = asyncio.get_running_loop()
+    out = manager.Queue(maxsize=PREFETCH_BATCHES)
+    stop = manager.Event()
+    future = asyncio.wrap_future(pool.submit(_parse_worker, path, batch_size, out, stop))
+    get = partial(out.get, timeout=GET_TIMEOUT_SECONDS)
+    try:
+        while True:
+            try:
+                item = await loop.run_in_executor(None, get)
+            except queue.Empty:
+                if future.done():
+                    await future
+                    raise RuntimeError("Parser process exited before finishing the sheet")
+                continue
+            if item is None:
+                break
+            if isinstance(item, _ParseFailed):
+                raise item.error
+            yield item
+        await future
+    finally:
+        stop.set()
+
+
+def workbook_batches(path: str, batch_size: int) -> AsyncIterator[List[LeadRow]]:
+    """
+    Stream row batches from a workbook.
+
+    Parsing happens in the process pool unless LEAD_IMPORT_PARSER_PROCESSES is 0, in which
+    case it runs inline on the event loop, yielding between batches.
+    """
+    if settings.LEAD_IMPORT_PARSER_PROCESSES > 0:
+        return _pooled_batches(path, batch_size)
+    return _inline_batches(path, batch_size)
+
+
+def shutdown_parser_pool() -> None:
+    """Stop the parser processes; called on application shutdown."""
+    global _pool, _manager
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _manager.shutdown()
+        _pool = None
+        _manager = None
+        logger.info("Lead parser pool shut down")
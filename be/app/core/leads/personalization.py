@@ -0,0 +1,208 @@
+"""
+Batched LLM personalization.
+
+Instead of one LLM conversation per lead, PERSONALIZATION_BATCH_SIZE leads are packed into
+a single structured-output completion that returns one message per lead id. Every entry is
+validated on its own; only the leads whose entries are missing or invalid are sent again,
+in smaller follow-up batches, up to PERSONALIZATION_MAX_RETRIES times. At most
+PERSONALIZATION_CONCURRENCY completions are in flight across the process, however many
+broadcasts personalize at once.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.core.leads.components import component_registry
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Placeholders the model sometimes leaves in instead of the recipient's details.
+UNFILLED_MARKERS = ("{name}", "[name]", "[Name]", "{{", "}}")
+
+
+@dataclass
+class PersonalizationTarget:
+    """One lead to write for; ``lead_id`` only has to be unique within a call."""
+
+    lead_id: str
+    name: str
+    context: str = ""
+
+
+@dataclass
+class PersonalizedMessage:
+    lead_id: str
+    body: str
+    subject: Optional[str] = None
+
+
+@dataclass
+class PersonalizationStats:
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retried_entries: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "retried_entries": self.retried_entries,
+        }
+
+
+@dataclass
+class PersonalizationResult:
+    messages: Dict[str, PersonalizedMessage] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+    stats: PersonalizationStats = field(default_factory=PersonalizationStats)
+
+
+class _Message(BaseModel):
+    lead_id: str = Field(..., description="The id of the lead this message is for, exactly as given")
+    body: str = Field(..., description="The personalized message text")
+
+
+class _MessageWithSubject(_Message):
+    subject: str = Field(..., description="The personalized subject line")
+
+
+class _Batch(BaseModel):
+    messages: List[_Message]
+
+
+class _BatchWithSubject(BaseModel):
+    messages: List[_MessageWithSubject]
+
+
+_SYSTEM_PROMPT = """You write personalized outreach messages in bulk.
+
+{instructions}
+
+You receive a JSON array of leads, each with an "id", a "name" and optionally "context" about them. Return exactly one message per lead, using the lead's "id" verbatim as "lead_id". Write the recipient's actual name; never leave placeholders such as {{name}} or [Name].{length_rule}"""
+
+
+# Shared by every personalizer, so concurrent broadcasts do not multiply the limit.
+_completion_slots = asyncio.Semaphore(settings.PERSONALIZATION_CONCURRENCY)
+
+
+class BatchPersonalizer:
+    """Writes one message per target with batched structured-output completions."""
+
+    def __init__(
+        self,
+        instructions: str,
+        *,
+        with_subject: bool = False,
+        max_length: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        llm=None,
+    ):
+        self.instructions = instructions
+        self.with_subject = with_subject
+        self.max_length = max_length
+        self.batch_size = max(1, batch_size or settings.PERSONALIZATION_BATCH_SIZE)
+        self.max_retries = settings.PERSONALIZATION_MAX_RETRIES if max_retries is None else max_retries
+        schema: Type[BaseModel] = _BatchWithSubject if with_subject else _Batch
+        if llm is None:
+            self._llm = component_registry.structured(schema, personalization=True, include_raw=True)
+        else:
+            self._llm = llm.with_structured_output(schema, include_raw=True)
+
+    def _system_prompt(self) -> str:
+        length_rule = (
+            f" Each message body must be at most {self.max_length} characters." if self.max_length else ""
+        )
+        return _SYSTEM_PROMPT.format(instructions=self.instructions.strip(), length_rule=length_rule)
+
+    def _entry_error(self, entry: _Message) -> Optional[str]:
+        body = entry.body.strip()
+        if not body:
+            return "empty message"
+        if self.max_length and len(body) > self.max_length:
+            return f"message is {len(body)} characters, over the {self.max_length}-character limit"
+        if self.with_subject and not getattr(entry, "subject", "").strip():
+            return "empty subject"
+        text = body + getattr(entry, "subject", "")
+        if any(marker in text for marker in UNFILLED_MARKERS):
+            return "message contains an unfilled placeholder"
+        return None
+
+    async def _complete(
+        self, batch: Sequence[PersonalizationTarget], stats: PersonalizationStats
+    ) -> Tuple[Dict[str, PersonalizedMessage], Dict[str, str]]:
+        leads = [
+            {"id": target.lead_id, "name": target.name, **({"context": target.context} if target.context else {})}
+            for target in batch
+        ]
+        pending = {target.lead_id for target in batch}
+        async with _completion_slots:
+            try:
+                response = await self._llm.ainvoke(
+                    [("system", self._system_prompt()), ("human", json.dumps(leads, ensure_ascii=False))]
+                )
+            except Exception as e:
+                logger.warning(f"Personalization batch of {len(batch)} failed: {e}")
+                return {}, {lead_id: f"completion failed: {e}" for lead_id in pending}
+            finally:
+                stats.llm_calls += 1
+
+        usage = getattr(response.get("raw"), "usage_metadata", None) or {}
+        stats.prompt_tokens += usage.get("input_tokens", 0)
+        stats.completion_tokens += usage.get("output_tokens", 0)
+
+        parsed = response.get("parsed")
+        if parsed is None:
+            error = response.get("parsing_error") or "no structured output"
+            return {}, {lead_id: f"invalid response: {error}" for lead_id in pending}
+
+        messages: Dict[str, PersonalizedMessage] = {}
+        failures: Dict[str, str] = {}
+        for entry in parsed.messages:
+            lead_id = entry.lead_id.strip()
+            if lead_id not in pending or lead_id in messages:
+                continue
+            error = self._entry_error(entry)
+            if error:
+                failures[lead_id] = error
+                continue
+            subject = getattr(entry, "subject", None)
+            messages[lead_id] = PersonalizedMessage(lead_id, entry.body.strip(), subject.strip() if subject else None)
+        for lead_id in pending - messages.keys() - failures.keys():
+            failures[lead_id] = "missing from response"
+        return messages, failures
+
+    async def personalize(self, targets: Sequence[PersonalizationTarget]) -> PersonalizationResult:
+        """Write a message for every target; leads still failing after the retries are reported."""
+        result = PersonalizationResult()
+        by_id = {target.lead_id: target for target in targets}
+        pending: List[PersonalizationTarget] = list(by_id.values())
+
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                result.stats.retried_entries += len(pending)
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            outcomes = await asyncio.gather(*(self._complete(batch, result.stats) for batch in batches))
+            failed: Dict[str, str] = {}
+            for messages, failures in outcomes:
+                result.messages.update(messages)
+                failed.update(failures)
+            result.failures = failed
+            pending = [by_id[lead_id] for lead_id in failed]
+
+        logger.info(
+            f"Personalized {len(result.messages)} of {len(by_id)} messages in {result.stats.llm_calls} "
+            f"completions ({result.stats.prompt_tokens} prompt / {result.stats.completion_tokens} completion tokens)"
+        )
+        return result
@@ -0,0 +1,108 @@
+"""
+Query layer for the hot lead statements.
+
+Each statement is built once at import time and compiled once per dialect; executions go
+straight to the driver with ``exec_driver_sql``, skipping statement construction, cache-key
+generation and the compiled-cache lookup. Statements take arrays instead of one bind
+parameter per value (``unnest`` for the upsert, ``= ANY`` for lookups), so the SQL text is
+the same for every batch size and asyncpg's per-connection prepared-statement cache is hit
+on every call instead of preparing a new statement for each distinct batch length.
+
+Under the ``pgbouncer`` pool profile that cache is disabled (see ``app.db.pool``): the SQL
+is still compiled once here, but asyncpg prepares it per execution under a unique name,
+which is safe with transaction pooling.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from sqlalchemy import Row, String, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
+
+from app.db.models import Lead
+
+
+class CompiledQuery:
+    """A statement compiled once per dialect and executed with positional parameters."""
+
+    def __init__(self, statement: Executable):
+        self.statement = statement
+        self._compiled: Dict[str, Tuple[str, Sequence[str]]] = {}
+
+    def sql(self, dialect) -> Tuple[str, Sequence[str]]:
+        """SQL text and parameter order for ``dialect``."""
+        key = f"{dialect.name}+{dialect.driver}"
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            result = self.statement.compile(dialect=dialect)
+            compiled = self._compiled[key] = (result.string, tuple(result.positiontup or ()))
+        return compiled
+
+    async def execute(self, db: AsyncSession, **params: Any):
+        conn = await db.connection()
+        sql, order = self.sql(conn.dialect)
+        return await conn.exec_driver_sql(sql, tuple(params[name] for name in order))
+
+
+def _text_array(name: str):
+    return bindparam(name, type_=ARRAY(String))
+
+
+_upsert_source = (
+    func.unnest(_text_array("names"), _text_array("emails"), _text_array("mobiles"))
+    .table_valued("name", "email", "mobile")
+    .render_derived(name="u")
+)
+
+UPSERT_LEADS = CompiledQuery(
+    insert(Lead)
+    .from_select(
+        ["id", "name", "email", "mobile"],
+        select(func.gen_random_uuid(), _upsert_source.c.name, _upsert_source.c.email, _upsert_source.c.mobile),
+    )
+    .on_conflict_do_nothing(index_elements=[Lead.email])
+    .returning(Lead.id)
+)
+
+EXISTING_EMAILS = CompiledQuery(select(Lead.email).where(Lead.email == any_(_text_array("emails"))))
+
+MOBILE_RECIPIENTS = CompiledQuery(select(Lead.name, Lead.mobile).where(Lead.mobile.isnot(None)))
+
+EMAIL_RECIPIENTS = CompiledQuery(select(Lead.name, Lead.email).where(Lead.email.isnot(None)))
+
+
+class LeadRepository:
+    """Hot-path reads and writes on ``leads``."""
+
+    async def upsert(self, db: AsyncSession, rows: Iterable) -> int:
+        """Insert ``(name, email, mobile)`` rows, skipping stored emails; returns rows inserted."""
+        names, emails, mobiles = [], [], []
+        for row in rows:
+            names.append(row.name)
+            emails.append(row.email)
+            mobiles.append(row.mobile)
+        if not emails:
+            return 0
+        result = await UPSERT_LEADS.execute(db, names=names, emails=emails, mobiles=mobiles)
+        return len(result.fetchall())
+
+    async def existing_emails(self, db: AsyncSession, emails: List[str]) -> Set[str]:
+        """The subset of ``emails`` already stored."""
+        if not emails:
+            return set()
+        result = await EXISTING_EMAILS.execute(db, emails=emails)
+        return {email for email, in result}
+
+    async def mobile_recipients(self, db: AsyncSession) -> List[Row]:
+        """``(name, mobile)`` of every lead with a mobile number."""
+        return (await MOBILE_RECIPIENTS.execute(db)).fetchall()
+
+    async def email_recipients(self, db: AsyncSession) -> List[Row]:
+        """``(name, email)`` of every lead."""
+        return (await EMAIL_RECIPIENTS.execute(db)).fetchall()
+
+
+# Singleton instance for easy access
+lead_repository = LeadRepository()
@@ -0,0 +1,202 @@
+"""
+NDJSON lead ingest over a single long-lived request.
+
+The request body is read incrementally, one ``LeadIn`` per line, and fed to ``import_rows``
+in batches. The body is only pulled when the previous batch has been committed, so a client
+sending faster than Postgres accepts is held back by TCP flow control, and memory stays at
+about one batch. Progress is written back on the same connection as NDJSON lines, at most
+every LEAD_STREAM_PROGRESS_INTERVAL seconds, followed by a final ``result`` line.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.leads.dedup import create_deduplicator
+from app.core.leads.importer import LeadRow, batched_async, import_rows, resolve_batch_size
+from app.core.leads.validation import INVALID_EMAIL, LeadValidator
+from app.db.database import AsyncSessionLocal
+from app.schemas.leads import LeadBulkInsertResponse, LeadIn, LeadRowError
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LINE_TOO_LONG = "line exceeds LEAD_STREAM_MAX_LINE_BYTES"
+INVALID_JSON = "invalid JSON"
+MAX_REPORTED_VALUE = 200
+
+# Progress lines waiting to be written; a client that stops reading them pauses the import.
+PROGRESS_BUFFER = 4
+
+
+class NDJSONIngestResponse(StreamingResponse):
+    """
+    Streaming response that may be sent while the request body is still being read.
+
+    StreamingResponse normally watches ``receive`` for a disconnect, which would swallow
+    body chunks the ingest has not read yet; here the ingest itself sees the disconnect.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+class _Line:
+    __slots__ = ("number", "data")
+
+    def __init__(self, number: int, data: Optional[bytes]):
+        self.number = number
+        self.data = data
+
+
+async def ndjson_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[_Line]:
+    """
+    Split a byte stream into numbered lines.
+
+    Blank lines are skipped. A line longer than ``max_line_bytes`` is yielded with ``data``
+    set to None and the rest of it is discarded without buffering.
+    """
+    buffer = bytearray()
+    number = 0
+    overflow = False
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            number += 1
+            if overflow:
+                overflow = False
+                yield _Line(number, None)
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield _Line(number, None)
+                elif buffer.strip():
+                    yield _Line(number, bytes(buffer))
+            buffer.clear()
+            start = end + 1
+        if not overflow:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                overflow = True
+                buffer.clear()
+    if overflow or buffer.strip():
+        number += 1
+        yield _Line(number, None if overflow else bytes(buffer))
+
+
+def _line_errors(number: int, error: ValidationError) -> List[LeadRowError]:
+    errors = []
+    for detail in error.errors():
+        field = ".".join(str(part) for part in detail["loc"]) or "line"
+        if detail["type"] == "json_invalid":
+            reason = INVALID_JSON
+        elif detail["type"] == "missing":
+            reason = f"missing {field}"
+        elif field == "email":
+            reason = INVALID_EMAIL
+        else:
+            reason = detail["msg"]
+        value = detail.get("input")
+        value = value[:MAX_REPORTED_VALUE] if isinstance(value, str) else ""
+        errors.append(LeadRowError(row=number, field=field, reason=reason, value=value))
+    return errors
+
+
+class _Rejected:
+    """Lines rejected before reaching the import, added to its totals when reporting."""
+
+    def __init__(self):
+        self.count = 0
+
+    def apply(self, totals: LeadBulkInsertResponse) -> LeadBulkInsertResponse:
+        return totals.model_copy(update={
+            "total_rows": totals.total_rows + self.count,
+            "failed_count": totals.failed_count + self.count,
+        })
+
+
+async def _lead_rows(lines: AsyncIterator[_Line], validator: LeadValidator, rejected: _Rejected) -> AsyncIterator[LeadRow]:
+    async for line in lines:
+        if line.data is None:
+            rejected.count += 1
+            validator.reject([LeadRowError(row=line.number, field="line", reason=LINE_TOO_LONG)])
+            continue
+        try:
+            lead = LeadIn.model_validate_json(line.data)
+        except ValidationError as e:
+            rejected.count += 1
+            validator.reject(_line_errors(line.number, e))
+            continue
+        yield LeadRow(line.number, lead.name.strip(), lead.email, lead.mobile)
+
+
+def _progress_line(kind: str, totals: LeadBulkInsertResponse) -> bytes:
+    exclude = {"batches"} if kind == "result" else {"batches", "validation_errors"}
+    return (json.dumps({"type": kind, **totals.model_dump(mode="json", exclude=exclude)}) + "\n").encode()
+
+
+async def ingest_ndjson(
+    chunks: AsyncIterable[bytes],
+    batch_size: Optional[int] = None,
+    strip_plus_tags: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Import leads from an NDJSON byte stream and yield NDJSON progress lines.
+
+    The import runs as a task next to the generator: it reports through a small queue, so
+    output that is not being consumed eventually stops the import, and closing the
+    generator (client gone) cancels it.
+    """
+    validator = LeadValidator()
+    rejected = _Rejected()
+    lines: asyncio.Queue = asyncio.Queue(maxsize=PROGRESS_BUFFER)
+    last_sent = time.monotonic()
+
+    async def progress(totals: LeadBulkInsertResponse) -> None:
+        nonlocal last_sent
+        now = time.monotonic()
+        if now - last_sent >= settings.LEAD_STREAM_PROGRESS_INTERVAL:
+            last_sent = now
+            await lines.put(_progress_line("progress", rejected.apply(totals)))
+
+    async def run() -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                dedup = create_deduplicator(
+                    strip_plus=strip_plus_tags, max_seen=settings.LEAD_STREAM_MAX_TRACKED_EMAILS
+                )
+                size = resolve_batch_size(batch_size)
+                rows = _lead_rows(ndjson_lines(chunks, settings.LEAD_STREAM_MAX_LINE_BYTES), validator, rejected)
+                totals = await import_rows(
+                    db,
+                    batched_async(rows, size),
+                    batch_size=size,
+                    progress=progress,
+                    dedup=dedup,
+                    validator=validator,
+                    keep_batches=False,
+                )
+            await lines.put(_progress_line("result", rejected.apply(totals)))
+        except Exception as e:
+            logger.exception(f"NDJSON lead stream failed: {e}")
+            await lines.put((json.dumps({"type": "error", "detail": str(e)}) + "\n").encode())
+        finally:
+            await lines.put(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while (line := await lines.get()) is not None:
+            yield line
+    finally:
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
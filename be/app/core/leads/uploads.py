@@ -0,0 +1,147 @@
+"""
+Content-addressed storage and resumable chunked uploads for lead files.
+
+Files are kept under LEAD_FILE_STORE_DIR named by their SHA-256, so the same workbook
+uploaded twice maps to one stored file and its earlier import can be looked up by hash.
+Chunked uploads write each part to ``uploads/<upload_id>/`` and are assembled and hashed on
+completion. The store directory must be shared between API workers.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from typing import List, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.leads.importer import SPOOL_CHUNK_SIZE
+from app.db.models import ImportJob
+
+PART_SUFFIX = ".part"
+
+
+def _store_dir() -> str:
+    os.makedirs(settings.LEAD_FILE_STORE_DIR, exist_ok=True)
+    return settings.LEAD_FILE_STORE_DIR
+
+
+def stored_file_path(sha256: str, suffix: str = ".xlsx") -> str:
+    return os.path.join(_store_dir(), f"{sha256}{suffix}")
+
+
+def upload_dir(upload_id: uuid.UUID) -> str:
+    return os.path.join(_store_dir(), "uploads", str(upload_id))
+
+
+def _move_into_store(tmp_path: str, sha256: str, suffix: str) -> str:
+    path = stored_file_path(sha256, suffix)
+    if os.path.exists(path):
+        os.unlink(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    return path
+
+
+async def store_upload(file: UploadFile, suffix: str = ".xlsx") -> Tuple[str, str]:
+    """Stream an upload into the content store; returns ``(sha256, path)``."""
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix, dir=_store_dir())
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(SPOOL_CHUNK_SIZE):
+                digest.update(chunk)
+                out.write(chunk)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    sha256 = digest.hexdigest()
+    return sha256, _move_into_store(tmp_path, sha256, suffix)
+
+
+async def write_part(upload_id: uuid.UUID, part_number: int, file: UploadFile) -> int:
+    """
+    Store one part of a chunked upload and return its size.
+
+    The part is written to a temporary name and renamed, so a part is either complete or
+    absent and a client can safely re-send it after a dropped connection.
+    """
+    directory = upload_dir(upload_id)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(SPOOL_CHUNK_SIZE):
+                size += len(chunk)
+                out.write(chunk)
+        os.replace(tmp_path, os.path.join(directory, f"{part_number:06d}{PART_SUFFIX}"))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return size
+
+
+def list_parts(upload_id: uuid.UUID) -> List[int]:
+    """Part numbers received so far, in order."""
+    directory = upload_dir(upload_id)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[: -len(PART_SUFFIX)]) for name in os.listdir(directory) if name.endswith(PART_SUFFIX))
+
+
+def _assemble(upload_id: uuid.UUID, parts: List[int], suffix: str) -> Tuple[str, str, int]:
+    directory = upload_dir(upload_id)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix, dir=_store_dir())
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for part in parts:
+                with open(os.path.join(directory, f"{part:06d}{PART_SUFFIX}"), "rb") as src:
+                    while chunk := src.read(SPOOL_CHUNK_SIZE):
+                        digest.update(chunk)
+                        size += len(chunk)
+                        out.write(chunk)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    sha256 = digest.hexdigest()
+    path = _move_into_store(tmp_path, sha256, suffix)
+    shutil.rmtree(directory, ignore_errors=True)
+    return sha256, path, size
+
+
+async def assemble_upload(upload_id: uuid.UUID, total_parts: Optional[int] = None, suffix: str = ".xlsx") -> Tuple[str, str, int]:
+    """
+    Concatenate and hash the parts of an upload; returns ``(sha256, path, size)``.
+
+    Parts must be numbered contiguously from 1; ``total_parts`` additionally checks that
+    none are missing at the end.
+    """
+    parts = list_parts(upload_id)
+    if not parts:
+        raise ValueError("No parts have been uploaded")
+    expected = list(range(1, (total_parts or parts[-1]) + 1))
+    if parts != expected:
+        missing = sorted(set(expected) - set(parts))
+        raise ValueError(f"Missing parts: {missing}" if missing else f"Unexpected parts beyond {total_parts}")
+    return await asyncio.to_thread(_assemble, upload_id, parts, suffix)
+
+
+async def latest_job_for_file(db: AsyncSession, sha256: str) -> Optional[ImportJob]:
+    """Most recent import of a stored file, if any."""
+    result = await db.execute(
+        select(ImportJob)
+        .where(ImportJob.file_sha256 == sha256)
+        .order_by(ImportJob.created_at.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
@@ -0,0 +1,139 @@
+"""
+Column-wise validation of lead rows.
+
+Instead of matching each cell in a Python loop, every batch validates a whole column at once:
+the column is joined into one newline-separated string, formatting characters are removed
+with a single ``str.translate`` and one multiline regex scan finds the lines that do *not*
+match. Python-level work is then proportional to the number of bad rows, which keeps
+validation well above 100k rows/s on one core.
+"""
+from __future__ import annotations
+
+import csv
+import os
+import re
+import uuid
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.leads import LeadRowError
+
+if TYPE_CHECKING:
+    from app.core.leads.importer import LeadRow
+
+EMAIL_PATTERN = (
+    r"[a-z0-9.!#$%&'*+/=?^_`{|}~-]+"
+    r"@[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?)+"
+)
+E164_PATTERN = r"\+[1-9][0-9]{6,14}"
+
+_VALID_EMAIL = re.compile(EMAIL_PATTERN, re.IGNORECASE)
+_VALID_MOBILE = re.compile(rf"(?:{E164_PATTERN})?")  # blank is fine, mobile is optional
+
+# Each matches the lines of a column that are NOT valid values.
+_INVALID_EMAIL_LINES = re.compile(rf"^(?!(?:{EMAIL_PATTERN})$).*$", re.MULTILINE | re.IGNORECASE)
+_INVALID_MOBILE_LINES = re.compile(rf"^(?!(?:{E164_PATTERN})?$).*$", re.MULTILINE)
+
+# Separators people type into phone numbers; removed before the E.164 check.
+_MOBILE_FORMATTING = str.maketrans("", "", " -().\t")
+
+MISSING_EMAIL = "missing email"
+INVALID_EMAIL = "invalid email syntax"
+INVALID_MOBILE = "mobile is not in E.164 format (+<country code><number>)"
+
+
+def _invalid_lines(invalid: re.Pattern, valid: re.Pattern, values: List[str]) -> List[Tuple[int, str]]:
+    """Return ``(index, value)`` for every invalid value, scanning the column once."""
+    joined = "\n".join(values)
+    if joined.count("\n") != len(values) - 1:
+        # a value contains a newline of its own; check this column value by value
+        return [(i, v) for i, v in enumerate(values) if not valid.fullmatch(v)]
+
+    # start offset of every line, to map match positions back to row indexes
+    starts = [0, *accumulate(len(v) + 1 for v in values)]
+    return [(bisect_right(starts, m.start()) - 1, m.group()) for m in invalid.finditer(joined)]
+
+
+class LeadValidator:
+    """
+    Validates batches of lead rows and accumulates a report for the whole import.
+
+    The report keeps a count per reason, the first LEAD_VALIDATION_MAX_REPORTED failing rows
+    and, when ``write_report`` is set, every failing row in a CSV file that can be downloaded
+    by its ``report_id``.
+    """
+
+    def __init__(self, write_report: bool = False):
+        self.write_report = write_report
+        self.report_id: Optional[str] = None
+        self.reasons: Counter = Counter()
+        self.errors: List[LeadRowError] = []
+        self.invalid_rows = 0
+        self._report_file = None
+        self._report_writer = None
+
+    def validate(self, rows: List[LeadRow]) -> List[LeadRow]:
+        """Return the valid rows, with mobiles stripped of formatting characters."""
+        if not rows:
+            return rows
+
+        emails = [row.email for row in rows]
+        mobiles = "\n".join(row.mobile or "" for row in rows).translate(_MOBILE_FORMATTING).split("\n")
+        if len(mobiles) != len(rows):
+            mobiles = [(row.mobile or "").translate(_MOBILE_FORMATTING) for row in rows]
+
+        problems: Dict[int, List[LeadRowError]] = {}
+        for idx, value in _invalid_lines(_INVALID_EMAIL_LINES, _VALID_EMAIL, emails):
+            reason = MISSING_EMAIL if not value else INVALID_EMAIL
+            problems.setdefault(idx, []).append(
+                LeadRowError(row=rows[idx].row_number, field="email", reason=reason, value=value)
+            )
+        for idx, _ in _invalid_lines(_INVALID_MOBILE_LINES, _VALID_MOBILE, mobiles):
+            row = rows[idx]
+            problems.setdefault(idx, []).append(
+                LeadRowError(row=row.row_number, field="mobile", reason=INVALID_MOBILE, value=row.mobile or "")
+            )
+
+        if problems:
+            self._record(problems)
+        return [
+            row._replace(mobile=mobile or None)
+            for idx, (row, mobile) in enumerate(zip(rows, mobiles))
+            if idx not in problems
+        ]
+
+    def reject(self, errors: List[LeadRowError]) -> None:
+        """Record a row that failed before reaching ``validate``, such as a malformed NDJSON line."""
+        self._record({errors[0].row: errors})
+
+    def _record(self, problems: Dict[int, List[LeadRowError]]) -> None:
+        self.invalid_rows += len(problems)
+        for idx in sorted(problems):
+            for error in problems[idx]:
+                self.reasons[error.reason] += 1
+                if len(self.errors) < settings.LEAD_VALIDATION_MAX_REPORTED:
+                    self.errors.append(error)
+                if self.write_report:
+                    self._write(error)
+
+    def _write(self, error: LeadRowError) -> None:
+        if self._report_writer is None:
+            self.report_id = uuid.uuid4().hex
+            self._report_file = open(report_path(self.report_id), "w", newline="")
+            self._report_writer = csv.writer(self._report_file)
+            self._report_writer.writerow(["row", "field", "reason", "value"])
+        self._report_writer.writerow([error.row, error.field, error.reason, error.value])
+
+    def close(self) -> None:
+        if self._report_file is not None:
+            self._report_file.close()
+            self._report_file = None
+
+
+def report_path(report_id: str) -> str:
+    directory = os.path.join(settings.LEAD_FILE_STORE_DIR, "reports")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{report_id}.csv")
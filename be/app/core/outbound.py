@@ -0,0 +1,469 @@
+"""
+Outbound call governor for third-party providers (Lix, Siren, OpenAI).
+
+Each provider has one ``ProviderGovernor`` per process, shared by every caller (request
+handlers, broadcasts, outbox workers, agent threads). A call through it:
+
+- takes a token from the provider's bucket, so requests are paced at a configured rate;
+- takes a concurrency slot. The limit follows AIMD: it grows by about one per round of
+  successful calls, up to the configured maximum, and halves (at most once a second) on a
+  429 or 5xx;
+- honours ``Retry-After``. A 429 pauses the whole bucket for that long, so every caller
+  waits instead of hammering the provider. The throttled call is retried (it was not
+  processed), and a 5xx or connection error is retried with backoff and jitter only if
+  the call is idempotent;
+- passes a circuit breaker. After OUTBOUND_BREAKER_FAILURES consecutive 5xx or
+  connection failures, calls fail at once with ``CircuitOpenError`` for
+  OUTBOUND_BREAKER_RESET_SECONDS. A single probe is then let through, and its outcome
+  closes or reopens the circuit.
+
+The governors' counters are served at GET /metrics/outbound. httpx clients are governed by
+building them on ``GovernedAsyncTransport`` / ``GovernedTransport``.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import httpx
+
+from app.core.config import settings
+
+R = TypeVar("R")
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# A 429 without Retry-After pauses the provider this long.
+DEFAULT_THROTTLE_PAUSE = 1.0
+# The concurrency limit is halved at most this often, so one burst of errors counts once.
+DECREASE_INTERVAL = 1.0
+# Waiting for a concurrency slot polls, backing off between these bounds.
+SLOT_POLL_MIN = 0.01
+SLOT_POLL_MAX = 0.2
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(Exception):
+    """A provider call that could not be completed: throttled past the retries, failing, or unreachable."""
+
+    def __init__(self, message: str, provider: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+
+
+class CircuitOpenError(ProviderUnavailable):
+    """Raised without calling the provider while its circuit is open."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), settings.OUTBOUND_RETRY_AFTER_MAX)
+
+
+class TokenBucket:
+    """
+    Token bucket of ``rate`` tokens per second holding at most ``capacity``, usable from
+    threads and event loops alike. Callers reserve a token and then sleep until it is due, so
+    they are served in arrival order. A non-positive rate means unlimited, though ``pause``
+    still applies.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            pause = max(self._paused_until - now, 0.0)
+            if self.rate <= 0:
+                return pause
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(-self._tokens / self.rate if self._tokens < 0 else 0.0, pause)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds`` (extends, never shortens, a pause in effect)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns how long that took."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def acquire_blocking(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class _Call:
+    """Outcome of one governed call, reported by the caller with ``observe``."""
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+        self.retry_after: Optional[str] = None
+
+    def observe(self, status_code: int, retry_after: Optional[str] = None) -> None:
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ProviderGovernor:
+    """Rate, concurrency, retry and circuit-breaker policy for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        max_retries: int,
+        failure_threshold: int,
+        reset_seconds: float,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self._max_limit = max(max_concurrency, 1)
+        self._min_limit = min(max(min_concurrency, 1), self._max_limit)
+        self._limit = float(self._max_limit)
+        self._max_retries = max_retries
+        self._failure_threshold = max(failure_threshold, 1)
+        self._reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._counters: Counter = Counter()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    # circuit breaker and concurrency slots
+
+    def _reject(self) -> CircuitOpenError:
+        self._counters["rejected"] += 1
+        return CircuitOpenError(f"{self.name} circuit is open; failing fast", self.name)
+
+    def _check_circuit(self) -> None:
+        with self._lock:
+            if self._opened_at is not None and time.monotonic() - self._opened_at < self._reset_seconds:
+                raise self._reject()
+
+    def _try_enter(self) -> Optional[bool]:
+        """
+        Take a slot if one is free and return whether the call is the half-open probe, or
+        None if no slot is free; raises ``CircuitOpenError`` while the circuit is open.
+        """
+        with self._lock:
+            probe = False
+            if self._opened_at is not None:
+                if time.monotonic() - self._opened_at < self._reset_seconds or self._probing:
+                    raise self._reject()
+                probe = True
+            if self._in_flight >= int(self._limit):
+                return None
+            self._in_flight += 1
+            if probe:
+                self._probing = True
+            self._counters["calls"] += 1
+            return probe
+
+    def _exit(self, probe: bool, status_code: Optional[int], retry_after: Optional[str], failed: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            if probe:
+                self._probing = False
+            if failed or (status_code is not None and status_code >= 500):
+                self._counters["server_errors" if status_code else "connection_errors"] += 1
+                self._decrease(now)
+                self._consecutive_failures += 1
+                if probe or self._consecutive_failures >= self._failure_threshold:
+                    if self._opened_at is None or probe:
+                        self._counters["circuit_opened"] += 1
+                    self._opened_at = now
+                return
+            # any other answer means the provider is up
+            self._consecutive_failures = 0
+            self._opened_at = None
+            if status_code == 429:
+                self._counters["rate_limited"] += 1
+                self._decrease(now)
+                pause = parse_retry_after(retry_after)
+                self.bucket.pause(DEFAULT_THROTTLE_PAUSE if pause is None else pause)
+            else:
+                self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+
+    def _decrease(self, now: float) -> None:
+        if now - self._last_decrease >= DECREASE_INTERVAL:
+            self._limit = max(self._min_limit, self._limit / 2)
+            self._last_decrease = now
+
+    def _release(self, probe: bool) -> None:
+        """Give a slot back without judging the provider (the caller was cancelled)."""
+        with self._lock:
+            self._in_flight -= 1
+            if probe:
+                self._probing = False
+
+    async def _enter(self) -> bool:
+        """Wait for a token and a slot; returns whether the call is the half-open probe."""
+        self._check_circuit()
+        throttled = await self.bucket.acquire() > 0
+        delay = SLOT_POLL_MIN
+        while (probe := self._try_enter()) is None:
+            throttled = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SLOT_POLL_MAX)
+        if throttled:
+            self._count("throttled")
+        return probe
+
+    def _enter_blocking(self) -> bool:
+        self._check_circuit()
+        throttled = self.bucket.acquire_blocking() > 0
+        delay = SLOT_POLL_MIN
+        while (probe := self._try_enter()) is None:
+            throttled = True
+            time.sleep(delay)
+            delay = min(delay * 2, SLOT_POLL_MAX)
+        if throttled:
+            self._count("throttled")
+        return probe
+
+    @asynccontextmanager
+    async def call(self) -> AsyncIterator[_Call]:
+        """
+        Hold a token and a slot for one request. Report its status with ``observe``; an
+        exception out of the block counts as a connection failure.
+        """
+        probe = await self._enter()
+        call = _Call()
+        try:
+            yield call
+        except asyncio.CancelledError:
+            self._release(probe)
+            raise
+        except Exception:
+            self._exit(probe, None, None, failed=True)
+            raise
+        self._exit(probe, call.status_code, call.retry_after, failed=False)
+
+    @contextmanager
+    def call_blocking(self) -> Iterator[_Call]:
+        """``call`` for synchronous callers."""
+        probe = self._enter_blocking()
+        call = _Call()
+        try:
+            yield call
+        except Exception:
+            self._exit(probe, None, None, failed=True)
+            raise
+        self._exit(probe, call.status_code, call.retry_after, failed=False)
+
+    # retries
+
+    def retry_delay(self, attempt: int, status_code: Optional[int], idempotent: bool) -> Optional[float]:
+        """
+        Seconds to wait before retrying after ``attempt`` retries, or None to stop. A 429 is
+        retried at once: its Retry-After already paused the bucket the retry waits on.
+        """
+        if attempt >= self._max_retries:
+            return None
+        if status_code == 429:
+            return 0.0
+        if idempotent and (status_code is None or status_code >= 500):
+            ceiling = settings.OUTBOUND_RETRY_BACKOFF * 2 ** attempt
+            return random.uniform(ceiling / 2, ceiling)
+        return None
+
+    async def request(self, send: Callable[[], Awaitable[R]], *, idempotent: bool) -> R:
+        """
+        Make a request with ``send`` (returning a response with ``status_code`` and
+        ``headers``) under the governor, retrying as ``retry_delay`` allows. The last
+        response is returned even if it is an error; the last exception is raised.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.call() as call:
+                    response = await send()
+                    call.observe(response.status_code, response.headers.get("Retry-After"))
+            except CircuitOpenError:
+                raise
+            except Exception:
+                delay = self.retry_delay(attempt, None, idempotent)
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry_delay(attempt, response.status_code, idempotent)
+                if delay is None:
+                    return response
+                await _aclose(response)
+            self._count("retried")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def request_blocking(self, send: Callable[[], R], *, idempotent: bool) -> R:
+        """``request`` for synchronous callers."""
+        attempt = 0
+        while True:
+            try:
+                with self.call_blocking() as call:
+                    response = send()
+                    call.observe(response.status_code, response.headers.get("Retry-After"))
+            except CircuitOpenError:
+                raise
+            except Exception:
+                delay = self.retry_delay(attempt, None, idempotent)
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry_delay(attempt, response.status_code, idempotent)
+                if delay is None:
+                    return response
+                response.close()
+            self._count("retried")
+            attempt += 1
+            time.sleep(delay)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._opened_at is None:
+                circuit = CLOSED
+            elif self._probing or time.monotonic() - self._opened_at >= self._reset_seconds:
+                circuit = HALF_OPEN
+            else:
+                circuit = OPEN
+            counters = self._counters
+            return {
+                "provider": self.name,
+                "circuit": circuit,
+                "rate": self.bucket.rate,
+                "concurrency_limit": int(self._limit),
+                "max_concurrency": self._max_limit,
+                "in_flight": self._in_flight,
+                "calls": counters["calls"],
+                "throttled": counters["throttled"],
+                "rejected": counters["rejected"],
+                "retried": counters["retried"],
+                "rate_limited": counters["rate_limited"],
+                "server_errors": counters["server_errors"],
+                "connection_errors": counters["connection_errors"],
+                "circuit_opened": counters["circuit_opened"],
+            }
+
+
+async def _aclose(response: Any) -> None:
+    close = getattr(response, "aclose", None)
+    if close is not None:
+        await close()
+    else:
+        response.close()
+
+
+class GovernedAsyncTransport(httpx.AsyncBaseTransport):
+    """Sends every request of an ``httpx.AsyncClient`` through a governor."""
+
+    def __init__(self, governor: ProviderGovernor, transport: httpx.AsyncBaseTransport):
+        self._governor = governor
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._governor.request(
+            lambda: self._transport.handle_async_request(request),
+            idempotent=request.method in IDEMPOTENT_METHODS,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class GovernedTransport(httpx.BaseTransport):
+    """Sends every request of an ``httpx.Client`` through a governor."""
+
+    def __init__(self, governor: ProviderGovernor, transport: httpx.BaseTransport):
+        self._governor = governor
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self._governor.request_blocking(
+            lambda: self._transport.handle_request(request),
+            idempotent=request.method in IDEMPOTENT_METHODS,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def _governor(name: str, *, rate: float, burst: int, max_concurrency: int, max_retries: int) -> ProviderGovernor:
+    return ProviderGovernor(
+        name,
+        rate=rate,
+        burst=burst,
+        max_concurrency=max_concurrency,
+        max_retries=max_retries,
+        failure_threshold=settings.OUTBOUND_BREAKER_FAILURES,
+        reset_seconds=settings.OUTBOUND_BREAKER_RESET_SECONDS,
+    )
+
+
+lix_governor = _governor(
+    "lix",
+    rate=settings.LIX_REQUEST_RATE,
+    burst=settings.LIX_REQUEST_BURST,
+    max_concurrency=settings.LIX_MAX_CONCURRENCY,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+)
+siren_governor = _governor(
+    "siren",
+    rate=settings.SIREN_SEND_RATE,
+    burst=settings.SIREN_SEND_BURST,
+    max_concurrency=settings.SIREN_MAX_CONCURRENCY,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+)
+# The OpenAI SDK retries 429s and 5xx itself (honouring Retry-After); retrying here too would multiply them.
+openai_governor = _governor(
+    "openai",
+    rate=settings.OPENAI_REQUEST_RATE,
+    burst=settings.OPENAI_REQUEST_BURST,
+    max_concurrency=settings.LLM_MAX_CONNECTIONS,
+    max_retries=0,
+)
+
+GOVERNORS: List[ProviderGovernor] = [lix_governor, siren_governor, openai_governor]
@@ -1,16 +1,27 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
 from app.core.config import settings
+from app.db.pool import engine_options, instrument_engine
+from app.db.replicas import ReplicaRouter, replica_urls
 import logging
 
 logger = logging.getLogger(__name__)
 
-engine = create_async_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.ENV.lower() == "development",
-    poolclass=NullPool,
-    pool_pre_ping=True,
-    pool_recycle=300,
+T = TypeVar("T")
+
+_echo = settings.ENV.lower() == "development"
+_database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+
+engine = create_async_engine(_database_url, echo=_echo, **engine_options())
+instrument_engine(engine)
+
+replica_router = ReplicaRouter(
+    engine,
+    [create_async_engine(url, echo=_echo, **engine_options(instrumented=False)) for url in replica_urls()],
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -22,6 +33,51 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+class BlockingDatabase:
+    """
+    Sessions for synchronous code, such as graph nodes running on worker threads.
+
+    ``engine`` belongs to the server's event loop, so this uses a second engine driven by a
+    private event loop on a daemon thread, started on first use; ``run`` blocks the calling
+    thread until the work is done.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._engine = None
+        self._sessions = None
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="blocking-db", daemon=True).start()
+                self._engine = create_async_engine(_database_url, echo=_echo, **engine_options(instrumented=False))
+                self._sessions = async_sessionmaker(
+                    self._engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+                )
+                self._loop = loop
+            return self._loop
+
+    def run(self, work: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        """Run ``work`` with a new session and return its result."""
+        loop = self._start()
+
+        async def in_session() -> T:
+            async with self._sessions() as session:
+                return await work(session)
+
+        return asyncio.run_coroutine_threadsafe(in_session(), loop).result()
+
+    async def dispose(self) -> None:
+        if self._loop is not None:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._engine.dispose(), self._loop))
+
+
+blocking_db = BlockingDatabase()
+
+
 async def get_db_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
@@ -35,7 +91,29 @@ async def get_db_session() -> AsyncSession:
             await session.close()
 
 
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    A session for read-only work, bound to a replica within the lag limit or the primary.
+
+    Nothing is committed; use it for queries that can tolerate DB_REPLICA_MAX_LAG_SECONDS of
+    staleness, never for reading back a write made in the same request.
+    """
+    async with AsyncSessionLocal(bind=await replica_router.read_engine()) as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+
+
+async def get_read_db_session() -> AsyncSession:
+    async with read_session() as session:
+        yield session
+
+
 async def close_db():
     """Close database connections."""
     await engine.dispose()
+    await replica_router.dispose()
+    await blocking_db.dispose()
     logger.info("Database connections closed")
@@ -0,0 +1,32 @@
+"""
+Helpers for Alembic migrations in ``alembic/versions``.
+
+Indexes on live tables are built with ``CREATE INDEX CONCURRENTLY``. A concurrent build that
+fails (a deadlock, a uniqueness violation, a cancelled run) leaves an INVALID index behind,
+and ``IF NOT EXISTS`` would then skip it on the retried upgrade, so it is dropped first.
+"""
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+from alembic import context, op
+from sqlalchemy import text
+
+_INVALID_INDEX = text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)")
+
+
+def drop_invalid_index(name: str, table_name: str) -> None:
+    """
+    Drop index ``name`` if a failed concurrent build left it INVALID. Call inside
+    ``autocommit_block``. Offline (``--sql``) the catalog cannot be read, so nothing is emitted.
+    """
+    if context.is_offline_mode():
+        return
+    if op.get_bind().execute(_INVALID_INDEX, {"name": name}).scalar():
+        op.drop_index(name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+def create_index_concurrently(name: str, table_name: str, columns: Sequence[Any], **kw: Any) -> None:
+    """``CREATE INDEX CONCURRENTLY IF NOT EXISTS``, rebuilding an INVALID leftover. Call inside ``autocommit_block``."""
+    drop_invalid_index(name, table_name)
+    op.create_index(name, table_name, columns, postgresql_concurrently=True, if_not_exists=True, **kw)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from sqlalchemy import String, DateTime, func, UniqueConstraint
+from sqlalchemy import (
+    DDL, BigInteger, Boolean, CheckConstraint, String, DateTime, ForeignKey, Index, Integer, Float, LargeBinary, Text,
+    event, func, literal_column, text, UniqueConstraint,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 import uuid
 
 
@@ -17,6 +20,8 @@ class Lead(Base):
     __tablename__ = "leads"
     __table_args__ = (
         UniqueConstraint("email", name="uq_leads_email"),
+        # Emails are stored trimmed and lowercased, so uq_leads_email is case-insensitive.
+        CheckConstraint("email = lower(btrim(email, E' \\t\\r\\n'))", name="ck_leads_email_normalized"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -25,3 +30,179 @@ class Lead(Base):
     mobile: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+# Domain part of a lead's email. The arguments are SQL literals rather than bind parameters
+# so that queries using this expression match ix_leads_email_domain.
+lead_email_domain = func.lower(func.split_part(Lead.email, literal_column("'@'"), literal_column("2")))
+
+# Listing indexes; every one ends in (created_at, id) so filtered pages are keyset scans.
+Index("ix_leads_created_at_id", Lead.created_at, Lead.id)
+Index("ix_leads_with_mobile", Lead.created_at, Lead.id, postgresql_where=Lead.mobile.isnot(None))
+Index("ix_leads_email_domain", lead_email_domain, Lead.created_at, Lead.id)
+Index("ix_leads_name_trgm", Lead.name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+Index("ix_leads_email_trgm", Lead.email, postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"})
+
+event.listen(Lead.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+class LeadEmailFilter(Base):
+    """Persisted Bloom filter over ``leads.email`` used to skip existence lookups on import."""
+    __tablename__ = "lead_email_filters"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    num_bits: Mapped[int] = mapped_column(Integer, nullable=False)
+    num_hashes: Mapped[int] = mapped_column(Integer, nullable=False)
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bits: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+    mode: Mapped[str] = mapped_column(String(16), nullable=False, default="insert")
+    batch_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    strip_plus_tags: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    filename: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    file_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+
+    rows_estimated: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    rows_parsed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    inserted_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    duplicate_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    in_file_duplicate_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    existing_duplicate_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_committed_row: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_per_second: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    eta_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    errors: Mapped[List[str]] = mapped_column(JSONB, nullable=False, default=list)
+    validation_errors: Mapped[List[dict]] = mapped_column(JSONB, nullable=False, default=list)
+    failure_reasons: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    error_report_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Renewed by the process running (or about to run) the job; once it lapses the process
+    # is presumed dead and the job can be resumed elsewhere.
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class LeadUpload(Base):
+    """A chunked lead-file upload; parts live in the file store until it is completed."""
+    __tablename__ = "lead_uploads"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    filename: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="open")
+    file_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    size_bytes: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class Campaign(Base):
+    """One broadcast to the leads, e.g. an SMS blast or a round of product-update emails."""
+    __tablename__ = "campaigns"
+    __table_args__ = (
+        Index("uq_campaigns_idempotency_key", "idempotency_key", unique=True),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    channel: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    # Client-supplied Idempotency-Key; a retried request finds the campaign instead of re-sending.
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    total_leads: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sent_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class CampaignResult(Base):
+    """Outcome of a campaign for one lead."""
+    __tablename__ = "campaign_results"
+    __table_args__ = (
+        Index("ix_campaign_results_campaign_id_id", "campaign_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    campaign_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False
+    )
+    lead_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(320), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    detail: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class SentMessage(Base):
+    """
+    Ledger of delivered messages, one row per (scope, channel, recipient).
+
+    ``scope`` is a hash of the content sent (or of a one-off send), so a retried broadcast
+    finds its earlier sends here and skips them. A row is written before the send and
+    removed again only if the send definitely did not go out.
+    """
+    __tablename__ = "sent_messages"
+    __table_args__ = (
+        UniqueConstraint("scope", "channel", "recipient", name="uq_sent_messages_scope_channel_recipient"),
+        Index("ix_sent_messages_recipient_channel", "recipient", "channel"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    scope: Mapped[str] = mapped_column(String(64), nullable=False)
+    channel: Mapped[str] = mapped_column(String(16), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(320), nullable=False)
+
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class OutboxMessage(Base):
+    """
+    One queued send of a campaign, delivered by the outbox workers.
+
+    ``status`` moves from pending to sending (claimed, leased until ``locked_until``) to sent,
+    or back to pending with a later ``next_attempt_at``, or to dead after the last attempt;
+    a claimed message already in the sent ledger goes to skipped instead.
+    """
+    __tablename__ = "message_outbox"
+    __table_args__ = (
+        Index("ix_message_outbox_due", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+        Index("ix_message_outbox_leased", "locked_until", postgresql_where=text("status = 'sending'")),
+        Index("ix_message_outbox_campaign_id_status", "campaign_id", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    campaign_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False
+    )
+    idempotency_key: Mapped[str] = mapped_column(String(512), nullable=False, unique=True)
+    channel: Mapped[str] = mapped_column(String(16), nullable=False)
+    lead_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(320), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
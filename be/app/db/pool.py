@@ -0,0 +1,143 @@
+"""
+Connection pool configuration and statistics for the async engine.
+
+DB_POOL_PROFILE selects how connections are managed:
+
+- ``pooled``: a local queue pool of DB_POOL_SIZE connections plus DB_MAX_OVERFLOW extra,
+  reused across requests so they skip the TCP/TLS/auth handshake.
+- ``pgbouncer``: the same pool in front of PgBouncer in transaction mode. Server connections
+  change between transactions, so asyncpg's statement caches are disabled and prepared
+  statements get unique names.
+- ``none``: a new connection per checkout (NullPool), the previous behaviour.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.core.config import settings
+
+POOLED = "pooled"
+PGBOUNCER = "pgbouncer"
+NO_POOL = "none"
+
+
+@dataclass
+class PoolStats:
+    """Counters maintained by pool events; read through ``snapshot``."""
+
+    waiting: int = 0
+    checkouts: int = 0
+    checkout_wait_seconds: float = 0.0
+    max_checkout_wait_seconds: float = 0.0
+    checkout_timeouts: int = 0
+    connects: int = 0
+    connect_seconds: float = 0.0
+    last_connect_seconds: float = 0.0
+    max_connect_seconds: float = 0.0
+
+    def record_checkout(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.checkout_wait_seconds += seconds
+        self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, seconds)
+
+    def record_connect(self, seconds: float) -> None:
+        self.connects += 1
+        self.connect_seconds += seconds
+        self.last_connect_seconds = seconds
+        self.max_connect_seconds = max(self.max_connect_seconds, seconds)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that counts callers waiting for a connection and how long they wait."""
+
+    def _do_get(self):
+        pool_stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.checkout_timeouts += 1
+            raise
+        finally:
+            pool_stats.waiting -= 1
+            pool_stats.record_checkout(time.perf_counter() - start)
+
+
+def engine_options(instrumented: bool = True) -> Dict[str, Any]:
+    """
+    Keyword arguments for ``create_async_engine`` according to DB_POOL_PROFILE.
+
+    Only the primary's pool is instrumented; replica pools use the plain queue pool so their
+    checkouts do not mix into ``pool_stats``.
+    """
+    profile = settings.DB_POOL_PROFILE
+    if profile == NO_POOL:
+        return {"poolclass": NullPool}
+
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool if instrumented else AsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": True,  # idle connections beyond the working set age out via recycle
+    }
+    if profile == PGBOUNCER:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return options
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time new connections from the dialect's connect call to the pool's connect event."""
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def _before_connect(dialect, conn_rec, cargs, cparams):
+        conn_rec.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine.pool, "connect")
+    def _after_connect(dbapi_connection, conn_rec):
+        started = conn_rec.info.pop("connect_started", None)
+        if started is not None:
+            pool_stats.record_connect(time.perf_counter() - started)
+
+
+def snapshot(engine: AsyncEngine) -> Dict[str, Any]:
+    """Current pool state and the counters collected since startup."""
+    pool = engine.sync_engine.pool
+    queued = isinstance(pool, AsyncAdaptedQueuePool)
+    return {
+        "profile": settings.DB_POOL_PROFILE,
+        "pool_class": type(pool).__name__,
+        "size": pool.size() if queued else 0,
+        "checked_in": pool.checkedin() if queued else 0,
+        "checked_out": pool.checkedout() if queued else 0,
+        "overflow": pool.overflow() if queued else 0,
+        "waiting": pool_stats.waiting,
+        "checkouts": pool_stats.checkouts,
+        "avg_checkout_wait_ms": _avg_ms(pool_stats.checkout_wait_seconds, pool_stats.checkouts),
+        "max_checkout_wait_ms": pool_stats.max_checkout_wait_seconds * 1000,
+        "checkout_timeouts": pool_stats.checkout_timeouts,
+        "connects": pool_stats.connects,
+        "avg_connect_ms": _avg_ms(pool_stats.connect_seconds, pool_stats.connects),
+        "last_connect_ms": pool_stats.last_connect_seconds * 1000,
+        "max_connect_ms": pool_stats.max_connect_seconds * 1000,
+    }
+
+
+def _avg_ms(total_seconds: float, count: int) -> float:
+    return total_seconds / count * 1000 if count else 0.0
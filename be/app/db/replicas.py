@@ -0,0 +1,129 @@
+"""
+Routing of read-only sessions to streaming replicas.
+
+DATABASE_REPLICA_URLS lists zero or more replicas. Each replica's replay lag is sampled at
+most every DB_REPLICA_LAG_CHECK_INTERVAL seconds; reads go round-robin to replicas whose
+lag is within DB_REPLICA_MAX_LAG_SECONDS and fall back to the primary when none qualify or
+a replica cannot be reached. With no replicas configured every read uses the primary.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# A replica that has replayed everything it received is current however old its last
+# replayed transaction is; on a primary both functions return NULL and the lag is 0.
+REPLICATION_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class Replica:
+    engine: AsyncEngine
+    lag_seconds: Optional[float] = None
+    reachable: bool = True
+    checked_at: float = float("-inf")
+
+    @property
+    def name(self) -> str:
+        url = self.engine.url
+        return f"{url.host}:{url.port or 5432}/{url.database}"
+
+    @property
+    def usable(self) -> bool:
+        return (
+            self.reachable
+            and self.lag_seconds is not None
+            and self.lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        )
+
+
+class ReplicaRouter:
+    """Chooses the engine for a read-only session."""
+
+    def __init__(self, primary: AsyncEngine, replicas: List[AsyncEngine]):
+        self.primary = primary
+        self.replicas = [Replica(engine) for engine in replicas]
+        self._next = itertools.count()
+        self._lock = asyncio.Lock()
+        self.primary_fallbacks = 0
+
+    @staticmethod
+    async def _lag(replica: Replica) -> float:
+        async with replica.engine.connect() as conn:
+            return float(await conn.scalar(REPLICATION_LAG_SQL))
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            # the timeout covers connecting too, so an unreachable host cannot stall reads
+            replica.lag_seconds = await asyncio.wait_for(
+                self._lag(replica), timeout=settings.DB_REPLICA_CHECK_TIMEOUT
+            )
+            replica.reachable = True
+        except Exception as e:
+            if replica.reachable:
+                logger.warning(f"Read replica {replica.name} unavailable: {e}")
+            replica.reachable = False
+        replica.checked_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        """Re-sample the lag of replicas whose last check is older than the interval."""
+        now = time.monotonic()
+        stale = [r for r in self.replicas if now - r.checked_at >= settings.DB_REPLICA_LAG_CHECK_INTERVAL]
+        if not stale:
+            return
+        async with self._lock:
+            # another caller may have refreshed while we waited
+            now = time.monotonic()
+            stale = [r for r in stale if now - r.checked_at >= settings.DB_REPLICA_LAG_CHECK_INTERVAL]
+            if stale:
+                await asyncio.gather(*(self._check(replica) for replica in stale))
+
+    async def read_engine(self) -> AsyncEngine:
+        if not self.replicas:
+            return self.primary
+        await self.refresh()
+        usable = [replica for replica in self.replicas if replica.usable]
+        if not usable:
+            self.primary_fallbacks += 1
+            return self.primary
+        return usable[next(self._next) % len(usable)].engine
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "max_lag_seconds": settings.DB_REPLICA_MAX_LAG_SECONDS,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "reachable": replica.reachable,
+                    "lag_seconds": replica.lag_seconds,
+                    "usable": replica.usable,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def replica_urls() -> List[str]:
+    """Configured replica URLs with the asyncpg driver, in order."""
+    raw = settings.DATABASE_REPLICA_URLS or ""
+    urls = [url.strip() for url in raw.split(",") if url.strip()]
+    return [url.replace("postgresql://", "postgresql+asyncpg://") for url in urls]
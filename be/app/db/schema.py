@@ -0,0 +1,106 @@
+"""
+Startup schema check against the Alembic migration history.
+
+The schema is owned by the migrations in ``alembic/versions`` (``alembic upgrade head``), not
+by the application. At startup each process reads ``alembic_version`` once, a single-row
+query, and compares it with the head revisions of the bundled migration scripts; the result
+is cached for the readiness endpoint, so nothing reflects or alters the schema at boot.
+"""
+from __future__ import annotations
+
+import ast
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import FrozenSet, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCRIPT_LOCATION = Path(__file__).resolve().parents[2] / "alembic"
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised at startup under DB_SCHEMA_CHECK=strict when migrations are pending."""
+
+
+@dataclass
+class SchemaStatus:
+    checked: bool = False
+    expected: FrozenSet[str] = field(default_factory=frozenset)
+    current: FrozenSet[str] = field(default_factory=frozenset)
+    error: Optional[str] = None
+
+    @property
+    def up_to_date(self) -> bool:
+        return self.checked and self.error is None and self.current == self.expected
+
+
+schema_status = SchemaStatus()
+
+
+def _revision_ids(path: Path) -> Tuple[Optional[str], FrozenSet[str]]:
+    """``revision`` and ``down_revision`` ids assigned at the top level of a migration script."""
+    values = {}
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.value is not None:
+            values[node.target.id] = node.value
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            values[node.targets[0].id] = node.value
+    revision = ast.literal_eval(values["revision"]) if "revision" in values else None
+    down = ast.literal_eval(values["down_revision"]) if "down_revision" in values else None
+    if down is None:
+        down = ()
+    elif isinstance(down, str):
+        down = (down,)
+    return revision, frozenset(down)
+
+
+@lru_cache(maxsize=1)
+def expected_revisions() -> FrozenSet[str]:
+    """
+    Head revisions of the migration scripts shipped with this build.
+
+    The scripts are parsed rather than loaded through Alembic's ScriptDirectory, which
+    imports Alembic and every migration and would add hundreds of milliseconds to each
+    worker's startup.
+    """
+    revisions, parents = set(), set()
+    for path in (SCRIPT_LOCATION / "versions").glob("*.py"):
+        revision, down = _revision_ids(path)
+        if revision:
+            revisions.add(revision)
+            parents |= down
+    return frozenset(revisions - parents)
+
+
+async def check_schema(engine: AsyncEngine) -> SchemaStatus:
+    """Compare the database's Alembic revision with the expected heads and cache the result."""
+    schema_status.expected = expected_revisions()
+    try:
+        async with engine.connect() as conn:
+            rows = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            schema_status.current = frozenset(row[0] for row in rows)
+        schema_status.error = None
+    except Exception as e:
+        schema_status.current = frozenset()
+        schema_status.error = f"Could not read alembic_version: {e}"
+    schema_status.checked = True
+
+    if schema_status.up_to_date:
+        logger.info(f"Database schema at revision {', '.join(sorted(schema_status.current))}")
+        return schema_status
+
+    message = schema_status.error or (
+        f"Database schema at {sorted(schema_status.current) or 'no revision'}, "
+        f"expected {sorted(schema_status.expected)}; run `alembic upgrade head`"
+    )
+    if settings.DB_SCHEMA_CHECK == "strict":
+        raise SchemaOutOfDate(message)
+    logger.error(message)
+    return schema_status
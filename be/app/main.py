@@ -4,10 +4,17 @@ from contextlib import asynccontextmanager
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.graphs.tools.linkedin import lix_client
+from app.core.graphs.tools.siren import siren_client
+from app.core.leads.components import component_registry
+from app.core.leads.dedup import warm_email_filter
+from app.core.leads.jobs import import_job_runner
+from app.core.leads.outbox import outbox_worker
+from app.core.leads.parsing import shutdown_parser_pool
 from app.middleware import get_middlewares
 from app.utils.logger import logger, logging_config
 from app.db.database import engine
-from app.db.models import Base
+from app.db.schema import check_schema
 
 
 @asynccontextmanager
@@ -15,16 +22,26 @@ async def lifespan(_: FastAPI):
     """Application startup and shutdown lifecycle"""
     logger.info("Starting application...")
 
-    # Dev/testing: auto-create tables if they don't exist
-    try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("Database tables ensured (create_all)")
-    except Exception as e:
-        logger.exception(f"Failed to ensure database tables: {e}")
+    # The schema is managed by Alembic (`alembic upgrade head`); only check it is current.
+    if settings.DB_SCHEMA_CHECK != "off":
+        await check_schema(engine)
+
+    # LLMs, toolkits and agent executors are built once here and borrowed by the handlers.
+    await component_registry.start()
+    outbox_worker.start()
+    # the stored-email Bloom filter; imports run without it until it is loaded
+    warm_email_filter()
+    # imports left queued or running by a process that died; retried in the background
+    import_job_runner.start_recovery()
 
     yield
     logger.info("Shutting down application...")
+    await outbox_worker.shutdown()
+    await component_registry.aclose()
+    await siren_client.aclose()
+    await lix_client.aclose()
+    await import_job_runner.shutdown()
+    shutdown_parser_pool()
 
 
 # Initialize FastAPI app
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -10,3 +12,10 @@ class HealthCheckResponse(BaseModel):
                 "status": "ok"
             }
         }
+
+
+class ReadinessResponse(BaseModel):
+    status: str = Field(..., description="ready, or not_ready when the database schema is behind the code")
+    schema_revisions: List[str] = Field(default_factory=list, description="Alembic revisions applied to the database")
+    expected_revisions: List[str] = Field(default_factory=list, description="Alembic heads shipped with this build")
+    detail: Optional[str] = None
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Optional
-from pydantic import BaseModel, Field, EmailStr
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 
 
 class LeadIn(BaseModel):
@@ -10,13 +13,179 @@ class LeadIn(BaseModel):
     mobile: Optional[str] = Field(None, description="Lead mobile number")
 
 
+class LeadOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    name: str
+    email: str
+    mobile: Optional[str] = None
+    created_at: datetime
+
+
+class LeadSearchMatch(str, Enum):
+    PREFIX = "prefix"  # name or email starts with the query
+    CONTAINS = "contains"  # query appears anywhere in name or email
+
+
+class LeadListResponse(BaseModel):
+    items: List[LeadOut]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
+
+
+class LeadIngestMode(str, Enum):
+    INSERT = "insert"  # batched INSERT ... ON CONFLICT, committed per batch
+    COPY = "copy"  # binary COPY into a staging table, merged in one statement
+
+
+class LeadExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    XLSX = "xlsx"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+class LeadRowError(BaseModel):
+    row: int = Field(..., description="Sheet row number")
+    field: str
+    reason: str
+    value: str = ""
+
+
+class LeadImportBatch(BaseModel):
+    batch: int = Field(..., description="1-based batch number")
+    first_row: int = Field(..., description="Sheet row number of the first row in the batch")
+    last_row: int = Field(..., description="Sheet row number of the last row in the batch")
+    total_rows: int
+    inserted_count: int
+    duplicate_count: int
+    in_file_duplicate_count: int = 0
+    existing_duplicate_count: int = 0
+    failed_count: int
+
+
 class LeadBulkInsertResponse(BaseModel):
     total_rows: int
     inserted_count: int
+    duplicate_count: int = Field(..., description="In-file plus already-stored duplicates")
+    in_file_duplicate_count: int = Field(0, description="Rows repeating an email seen earlier in the same file")
+    existing_duplicate_count: int = Field(0, description="Rows whose email was already stored")
+    failed_count: int
+    errors: List[str] = []
+    validation_errors: List[LeadRowError] = Field([], description="First failing rows, see LEAD_VALIDATION_MAX_REPORTED")
+    failure_reasons: Dict[str, int] = Field({}, description="Number of failures per reason")
+    error_report_id: Optional[str] = Field(None, description="Id of the downloadable CSV of all failing rows")
+    batches: List[LeadImportBatch] = []
+
+
+class ImportJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    status: ImportJobStatus
+    mode: LeadIngestMode
+    strip_plus_tags: bool = False
+    filename: Optional[str] = None
+    file_sha256: Optional[str] = None
+    rows_estimated: Optional[int] = Field(None, description="Row count from the sheet dimensions, if known")
+    rows_parsed: int
+    inserted_count: int
     duplicate_count: int
+    in_file_duplicate_count: int
+    existing_duplicate_count: int
     failed_count: int
+    last_committed_row: int = Field(0, description="Sheet row up to which batches are committed; resumes continue after it")
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
     errors: List[str] = []
+    validation_errors: List[LeadRowError] = []
+    failure_reasons: Dict[str, int] = {}
+    error_report_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class LeadUploadCreate(BaseModel):
+    filename: Optional[str] = Field(None, description="Original file name, for reference")
+
+
+class LeadUploadResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    filename: Optional[str] = None
+    status: str
+    file_sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
+    parts: List[int] = Field([], description="Part numbers received so far")
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+
+class LeadUploadPartResponse(BaseModel):
+    part_number: int
+    size_bytes: int
+
+
+class SmsMode(str, Enum):
+    AGENT = "agent"
+    TEMPLATE = "template"
+    BATCHED = "batched"
+
+
+class BroadcastDelivery(str, Enum):
+    INLINE = "inline"
+    OUTBOX = "outbox"
+
+
+class BroadcastStreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    SSE = "sse"
+
+
+class ProductUpdateMode(str, Enum):
+    AGENT = "agent"
+    BATCHED = "batched"
 
 
 class SMS(BaseModel):
-    content: str = Field(..., description="Content of the SMS")
\ No newline at end of file
+    content: str = Field(..., description="Content of the SMS")
+    mode: SmsMode = Field(
+        SmsMode.AGENT,
+        description="agent: an LLM agent writes and sends each message; "
+        "template: one LLM call drafts a {name} template that is rendered per lead and sent directly; "
+        "batched: each lead gets its own message, written PERSONALIZATION_BATCH_SIZE leads per LLM call",
+    )
+    delivery: BroadcastDelivery = Field(
+        BroadcastDelivery.INLINE,
+        description="inline: send during the request; outbox: queue the messages and return the campaign id "
+        "at once (template and batched modes)",
+    )
+    resend: bool = Field(
+        False, description="Send to leads that already received this content on this channel (skipped by default)"
+    )
+    exclude_contacted: bool = Field(False, description="Skip leads that were ever sent an SMS")
+
+
+class CampaignStatusResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    channel: str
+    total_leads: int
+    sent_count: int
+    failed_count: int
+    outbox: Dict[str, int] = Field({}, description="Queued messages by status: pending, sending, sent, dead, skipped")
+    created_at: datetime
+    finished_at: Optional[datetime] = None
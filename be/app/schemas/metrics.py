@@ -0,0 +1,55 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class DBPoolMetrics(BaseModel):
+    profile: str = Field(..., description="DB_POOL_PROFILE in effect")
+    pool_class: str
+    size: int = Field(..., description="Configured pool size")
+    checked_in: int = Field(..., description="Idle connections in the pool")
+    checked_out: int = Field(..., description="Connections in use")
+    overflow: int = Field(..., description="Connections above the pool size (negative while the pool is filling)")
+    waiting: int = Field(..., description="Callers currently waiting for a connection")
+    checkouts: int
+    avg_checkout_wait_ms: float
+    max_checkout_wait_ms: float
+    checkout_timeouts: int
+    connects: int = Field(..., description="New database connections opened")
+    avg_connect_ms: float
+    last_connect_ms: float
+    max_connect_ms: float
+
+
+class ReplicaStatus(BaseModel):
+    name: str = Field(..., description="host:port/database")
+    reachable: bool
+    lag_seconds: Optional[float] = Field(None, description="Replay lag at the last check; null before the first check")
+    usable: bool = Field(..., description="Reachable and within the lag limit")
+
+
+class DBReplicaMetrics(BaseModel):
+    max_lag_seconds: float = Field(..., description="DB_REPLICA_MAX_LAG_SECONDS in effect")
+    primary_fallbacks: int = Field(..., description="Reads sent to the primary because no replica was usable")
+    replicas: List[ReplicaStatus]
+
+
+class ProviderMetrics(BaseModel):
+    provider: str
+    circuit: str = Field(..., description="closed, open (failing fast) or half_open (letting a probe through)")
+    rate: float = Field(..., description="Requests per second allowed (0: unpaced)")
+    concurrency_limit: int = Field(..., description="Current adaptive limit on requests in flight")
+    max_concurrency: int
+    in_flight: int
+    calls: int = Field(..., description="Requests sent to the provider, retries included")
+    throttled: int = Field(..., description="Calls that waited for a token or a concurrency slot")
+    rejected: int = Field(..., description="Calls failed fast because the circuit was open")
+    retried: int = Field(..., description="Retries after a 429, 5xx or connection error")
+    rate_limited: int = Field(..., description="429 responses")
+    server_errors: int = Field(..., description="5xx responses")
+    connection_errors: int
+    circuit_opened: int = Field(..., description="Times the circuit opened")
+
+
+class OutboundMetrics(BaseModel):
+    providers: List[ProviderMetrics]
@@ -0,0 +1,95 @@
+"""
+Measure /health latency while a large lead import runs.
+
+Generates a workbook, probes /health at a fixed rate for a baseline window, then keeps
+probing while the workbook is posted to /leads/bulk-insert, and prints p50/p95/p99 for both
+windows. Start the API separately; compare LEAD_IMPORT_PARSER_PROCESSES=0 against the pool.
+
+    poetry run python -m benchmarks.health_latency --base-url http://localhost:8000 --rows 200000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+import httpx
+from openpyxl import Workbook
+
+
+def build_workbook(path: str, rows: int) -> None:
+    domain = f"bench-{uuid.uuid4().hex[:8]}.example"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["Lead Name", "Lead Email", "Lead Mobile"])
+    for i in range(rows):
+        ws.append([f"Lead {i}", f"lead{i}@{domain}", f"+1555{i:07d}"])
+    wb.save(path)
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label: str, samples) -> None:
+    if not samples:
+        print(f"{label:<12} no samples")
+        return
+    print(
+        f"{label:<12} n={len(samples):>5} p50={statistics.median(samples):7.1f}ms "
+        f"p95={percentile(samples, 95):7.1f}ms p99={percentile(samples, 99):7.1f}ms max={max(samples):7.1f}ms"
+    )
+
+
+async def probe(client: httpx.AsyncClient, url: str, interval: float, stop: asyncio.Event, samples) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def main(base_url: str, rows: int, baseline_seconds: float, interval: float) -> None:
+    api = f"{base_url.rstrip('/')}/api/v1"
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        print(f"building workbook with {rows} rows...")
+        build_workbook(path, rows)
+
+        async with httpx.AsyncClient(timeout=None) as client:
+            baseline, during = [], []
+            stop = asyncio.Event()
+            prober = asyncio.create_task(probe(client, f"{api}/health", interval, stop, baseline))
+            await asyncio.sleep(baseline_seconds)
+            stop.set()
+            await prober
+
+            stop = asyncio.Event()
+            prober = asyncio.create_task(probe(client, f"{api}/health", interval, stop, during))
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                files = {"file": ("bench.xlsx", f, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+                response = await client.post(f"{api}/leads/bulk-insert", files=files)
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await prober
+
+        print(f"import: status={response.status_code} time={elapsed:.2f}s")
+        report("idle", baseline)
+        report("importing", during)
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between /health probes")
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.rows, args.baseline_seconds, args.interval))
@@ -0,0 +1,59 @@
+"""
+Benchmark the batched INSERT and COPY lead ingest paths.
+
+Runs each path against the database in DATABASE_URL with synthetic rows and prints the
+wall time and rows/s. Rows are written with a unique email domain and deleted afterwards.
+
+    poetry run python -m benchmarks.lead_ingest --rows 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.core.leads.copy_ingest import copy_import_rows
+from app.core.leads.importer import LeadRow, import_rows
+from app.db.database import AsyncSessionLocal, close_db
+from app.db.models import Lead
+
+
+def synthetic_rows(count: int, domain: str):
+    # Every 10th row repeats an earlier email so the duplicate path is exercised too.
+    for i in range(count):
+        n = i - 1 if i % 10 == 9 else i
+        yield LeadRow(i + 2, f"Lead {n}", f"lead{n}@{domain}", f"+1555{n:07d}")
+
+
+async def run_once(name: str, ingest, count: int, batch_size: int) -> None:
+    domain = f"bench-{uuid.uuid4().hex[:8]}.example"
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        result = await ingest(db, synthetic_rows(count, domain), batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        await db.execute(delete(Lead).where(Lead.email.like(f"%@{domain}")))
+        await db.commit()
+
+    print(
+        f"{name:<7} rows={count:>9} time={elapsed:8.2f}s rate={count / elapsed:>10.0f} rows/s "
+        f"inserted={result.inserted_count} duplicates={result.duplicate_count}"
+    )
+
+
+async def main(row_counts, batch_size: int) -> None:
+    try:
+        for count in row_counts:
+            await run_once("insert", import_rows, count, batch_size)
+            await run_once("copy", copy_import_rows, count, batch_size)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch_size))
@@ -0,0 +1,95 @@
+"""
+Benchmark per-query overhead of the lead repository against ad-hoc ORM statements.
+
+"before" builds the statement the way the endpoints used to (a multi-VALUES insert and an
+IN list sized to the batch) and compiles it for every call; "after" takes the repository's
+cached SQL. Both are measured without a database to isolate client-side cost. With --db the
+upsert and lookup are also run against DATABASE_URL, where the fixed SQL text lets asyncpg
+reuse its prepared statement instead of preparing one per distinct batch size.
+
+    poetry run python -m benchmarks.lead_queries --batch-sizes 10 100 1000 --iterations 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.leads.importer import LeadRow
+from app.core.leads.repository import EXISTING_EMAILS, UPSERT_LEADS, lead_repository
+from app.db.database import AsyncSessionLocal, close_db
+from app.db.models import Lead
+
+
+def synthetic_rows(count: int, domain: str):
+    return [LeadRow(i + 2, f"Lead {i}", f"lead{i}@{domain}", f"+1555{i:07d}") for i in range(count)]
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def compile_overhead(batch_sizes, iterations: int) -> None:
+    dialect = postgresql.asyncpg.dialect()
+    for size in batch_sizes:
+        rows = synthetic_rows(size, "bench.example")
+        emails = [row.email for row in rows]
+
+        def upsert_before():
+            payload = [{"name": row.name, "email": row.email, "mobile": row.mobile} for row in rows]
+            stmt = insert(Lead).values(payload).on_conflict_do_nothing(index_elements=[Lead.email])
+            stmt.returning(Lead.id).compile(dialect=dialect)
+
+        def upsert_after():
+            UPSERT_LEADS.sql(dialect)
+            [row.name for row in rows], [row.email for row in rows], [row.mobile for row in rows]
+
+        def lookup_before():
+            select(Lead.email).where(Lead.email.in_(emails)).compile(dialect=dialect)
+
+        def lookup_after():
+            EXISTING_EMAILS.sql(dialect)
+
+        for name, before, after in (("upsert", upsert_before, upsert_after), ("lookup", lookup_before, lookup_after)):
+            before_us = per_call_us(before, iterations)
+            after_us = per_call_us(after, iterations)
+            print(
+                f"{name:<7} rows={size:>6} before={before_us:>10.1f}us after={after_us:>8.1f}us "
+                f"speedup={before_us / after_us:>7.1f}x"
+            )
+
+
+async def db_round_trips(batch_sizes, iterations: int) -> None:
+    try:
+        for size in batch_sizes:
+            domain = f"bench-{uuid.uuid4().hex[:8]}.example"
+            rows = synthetic_rows(size, domain)
+            emails = [row.email for row in rows]
+            async with AsyncSessionLocal() as db:
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    await lead_repository.upsert(db, rows)
+                    await lead_repository.existing_emails(db, emails)
+                elapsed = time.perf_counter() - start
+                await db.execute(delete(Lead).where(Lead.email.like(f"%@{domain}")))
+                await db.commit()
+            print(f"db      rows={size:>6} upsert+lookup={elapsed / iterations * 1000:>8.2f}ms")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--db", action="store_true", help="also time round trips against DATABASE_URL")
+    args = parser.parse_args()
+    compile_overhead(args.batch_sizes, args.iterations)
+    if args.db:
+        asyncio.run(db_round_trips(args.batch_sizes, args.iterations))
@@ -0,0 +1,109 @@
+"""
+Benchmark per-lead agent personalization against batched personalization.
+
+"agent" replays what /leads/sms does per lead: the same system prompt and input, with the
+Siren tools bound, one lead at a time. The tool calls are not executed, so nothing is sent
+and only the first of the agent's round trips is measured; the real path costs at least
+twice as much. "batched" runs BatchPersonalizer over the same leads at each batch size.
+Prints messages per minute and tokens per message. Needs OPENAI_API_KEY and makes real calls.
+
+    poetry run python -m benchmarks.personalization --leads 50 --batch-sizes 10 25 50
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.leads.broadcast import SMS_MAX_LENGTH
+from app.core.leads.personalization import BatchPersonalizer, PersonalizationTarget
+
+CONTENT = "Our spring release adds shared inboxes and AI follow-ups. Book a 15 minute demo this week."
+
+AGENT_SYSTEM_PROMPT = """You are a helpful assistant that can send SMS messages using Siren.
+
+IMPORTANT: For SMS channel, always provide:
+- channel: "SMS"
+- recipient_value: the mobile number (e.g., "+919188065817")
+- body: the message content
+
+When sending messages, personalize them with the recipient's name and make them conversational and friendly. Keep SMS messages under 160 characters when possible."""
+
+
+def synthetic_leads(count: int):
+    first = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Margaret", "Ken"]
+    last = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Hamilton", "Thompson"]
+    return [(f"{first[i % len(first)]} {last[i // len(first) % len(last)]}", f"+1555{i:07d}") for i in range(count)]
+
+
+def report(name: str, messages: int, elapsed: float, calls: int, prompt_tokens: int, completion_tokens: int) -> None:
+    per_message = (prompt_tokens + completion_tokens) / messages if messages else 0
+    print(
+        f"{name:<12} messages={messages:>5} calls={calls:>5} time={elapsed:7.1f}s "
+        f"rate={messages / elapsed * 60:>8.0f} msg/min tokens/msg={per_message:>7.0f} "
+        f"(prompt {prompt_tokens}, completion {completion_tokens})"
+    )
+
+
+async def run_agent(leads) -> None:
+    from agenttoolkit.langchain import SirenAgentToolkit
+    from langchain_openai import ChatOpenAI
+
+    toolkit = SirenAgentToolkit(
+        api_key=settings.SIREN_API_KEY,
+        configuration={"actions": {"messaging": {"create": True, "read": True}, "templates": {"read": True, "create": True}}},
+    )
+    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, api_key=settings.OPENAI_API_KEY).bind_tools(toolkit.get_tools())
+    prompt_tokens = completion_tokens = 0
+    start = time.perf_counter()
+    for name, mobile in leads:
+        response = await llm.ainvoke([
+            ("system", AGENT_SYSTEM_PROMPT),
+            ("human", f"""
+                Send a message using the following details:
+                - Channel: SMS
+                - Recipient mobile number: {mobile}
+                - Message content: Personalize this for "{name}": {CONTENT}
+
+                Make the message personal by adding their name naturally and keep it conversational and friendly.
+                Ensure you provide the recipient mobile number in the correct field for SMS channel.
+                """),
+        ])
+        usage = response.usage_metadata or {}
+        prompt_tokens += usage.get("input_tokens", 0)
+        completion_tokens += usage.get("output_tokens", 0)
+    report("agent", len(leads), time.perf_counter() - start, len(leads), prompt_tokens, completion_tokens)
+
+
+async def run_batched(leads, batch_size: int) -> None:
+    personalizer = BatchPersonalizer(
+        "Write a friendly, conversational SMS for each lead based on the message below, "
+        f"mentioning them by name.\n\nMessage:\n{CONTENT}",
+        max_length=SMS_MAX_LENGTH,
+        batch_size=batch_size,
+    )
+    start = time.perf_counter()
+    result = await personalizer.personalize(
+        [PersonalizationTarget(str(index), name) for index, (name, _) in enumerate(leads)]
+    )
+    stats = result.stats
+    report(
+        f"batched/{batch_size}", len(result.messages), time.perf_counter() - start,
+        stats.llm_calls, stats.prompt_tokens, stats.completion_tokens,
+    )
+
+
+async def main(count: int, batch_sizes, skip_agent: bool) -> None:
+    leads = synthetic_leads(count)
+    if not skip_agent:
+        await run_agent(leads)
+    for batch_size in batch_sizes:
+        await run_batched(leads, batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=50)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 25, 50])
+    parser.add_argument("--skip-agent", action="store_true", help="only run the batched engine")
+    args = parser.parse_args()
+    asyncio.run(main(args.leads, args.batch_sizes, args.skip_agent))
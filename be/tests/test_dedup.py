@@ -0,0 +1,96 @@
+import asyncio
+
+from app.core.leads import dedup
+from app.core.leads.dedup import EmailBloomFilter, EmailDeduplicator, normalize_email
+from app.core.leads.importer import LeadRow
+
+
+def rows(*emails):
+    return [LeadRow(number, f"Lead {number}", email, None) for number, email in enumerate(emails, start=2)]
+
+
+def test_normalize_email_trims_and_lowercases():
+    assert normalize_email("  Ann.Lee@Example.COM \t") == "ann.lee@example.com"
+    assert normalize_email("ann+promo@x.com") == "ann+promo@x.com"
+    assert normalize_email("Ann+Promo@X.com", strip_plus=True) == "ann@x.com"
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = EmailBloomFilter.for_capacity(1000, 0.01)
+    emails = [f"lead{i}@example.com" for i in range(1000)]
+    for email in emails:
+        bloom.add(email)
+    assert all(email in bloom for email in emails)
+    assert bloom.item_count == 1000
+
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_bloom_filters_of_the_same_shape_merge():
+    left = EmailBloomFilter.for_capacity(100, 0.01)
+    right = EmailBloomFilter(left.num_bits, left.num_hashes)
+    left.add("a@x.com")
+    right.add("b@x.com")
+    assert right.same_shape(left.num_bits, left.num_hashes)
+
+    left.merge(bytes(right.bits), right.item_count)
+    assert "a@x.com" in left and "b@x.com" in left
+
+
+def test_drop_seen_removes_repeats_across_batches():
+    deduplicator = EmailDeduplicator()
+    unique, dropped = deduplicator.drop_seen(rows("a@x.com", "b@x.com", "a@x.com"))
+    assert [row.email for row in unique] == ["a@x.com", "b@x.com"]
+    assert dropped == 1
+
+    unique, dropped = deduplicator.drop_seen(rows("b@x.com", "c@x.com"))
+    assert [row.email for row in unique] == ["c@x.com"]
+    assert dropped == 1
+
+
+def test_drop_seen_with_strip_plus_treats_tags_as_the_same_lead():
+    deduplicator = EmailDeduplicator(strip_plus=True)
+    unique, dropped = deduplicator.drop_seen(rows("ann@x.com", "ann+news@x.com"))
+    assert [row.email for row in unique] == ["ann@x.com"]
+    assert dropped == 1
+
+
+def test_forget_lets_unwritten_rows_through_again():
+    deduplicator = EmailDeduplicator()
+    batch = rows("a@x.com")
+    deduplicator.drop_seen(batch)
+    deduplicator.forget(batch)
+    unique, dropped = deduplicator.drop_seen(batch)
+    assert len(unique) == 1 and dropped == 0
+
+
+def test_max_seen_bounds_the_seen_set():
+    deduplicator = EmailDeduplicator(max_seen=2)
+    deduplicator.drop_seen(rows("a@x.com", "b@x.com"))
+    unique, _ = deduplicator.drop_seen(rows("a@x.com"))
+    assert len(unique) == 1
+
+
+def test_stored_emails_only_looks_up_possible_matches(monkeypatch):
+    looked_up = []
+
+    async def existing_emails(db, emails):
+        looked_up.append(list(emails))
+        return set(emails)
+
+    monkeypatch.setattr(dedup.lead_repository, "existing_emails", existing_emails)
+    bloom = EmailBloomFilter.for_capacity(1000, 0.001)
+    bloom.add("old@x.com")
+    deduplicator = EmailDeduplicator(bloom=bloom)
+
+    assert asyncio.run(deduplicator.stored_emails(None, rows("old@x.com", "new@x.com"))) == {"old@x.com"}
+    assert looked_up == [["old@x.com"]]
+    assert asyncio.run(EmailDeduplicator().stored_emails(None, rows("old@x.com"))) == set()
+
+
+def test_remember_adds_new_emails_to_the_filter():
+    bloom = EmailBloomFilter.for_capacity(1000, 0.001)
+    deduplicator = EmailDeduplicator(bloom=bloom)
+    deduplicator.remember(["new@x.com"])
+    assert "new@x.com" in bloom
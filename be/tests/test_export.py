@@ -0,0 +1,119 @@
+import asyncio
+import csv
+import io
+import json
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.core.leads import export
+from app.core.leads.export import CAMPAIGN_RESULT_COLUMNS, LEAD_COLUMNS, _encoder, export_rows
+from app.schemas.leads import LeadExportFormat
+
+CREATED_AT = datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+LEADS = [
+    (uuid.UUID(int=1), "Ann", "ann@x.com", "+15550100", CREATED_AT),
+    (uuid.UUID(int=2), "Bob, Jr.", "bob@x.com", None, CREATED_AT),
+]
+
+
+def encode(export_format, rows, columns=LEAD_COLUMNS) -> bytes:
+    encoder = _encoder(export_format, columns)
+    return encoder.header() + encoder.encode(rows[:1]) + encoder.encode(rows[1:]) + b"".join(encoder.close())
+
+
+def test_csv_has_a_header_and_quotes_values():
+    lines = list(csv.reader(io.StringIO(encode(LeadExportFormat.CSV, LEADS).decode())))
+    assert lines == [
+        ["id", "name", "email", "mobile", "created_at"],
+        [str(uuid.UUID(int=1)), "Ann", "ann@x.com", "+15550100", "2026-03-01T12:30:00+00:00"],
+        [str(uuid.UUID(int=2)), "Bob, Jr.", "bob@x.com", "", "2026-03-01T12:30:00+00:00"],
+    ]
+
+
+def test_ndjson_writes_one_object_per_row():
+    lines = encode(LeadExportFormat.NDJSON, LEADS).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {
+            "id": str(uuid.UUID(int=1)),
+            "name": "Ann",
+            "email": "ann@x.com",
+            "mobile": "+15550100",
+            "created_at": "2026-03-01T12:30:00+00:00",
+        },
+        {
+            "id": str(uuid.UUID(int=2)),
+            "name": "Bob, Jr.",
+            "email": "bob@x.com",
+            "mobile": None,
+            "created_at": "2026-03-01T12:30:00+00:00",
+        },
+    ]
+
+
+def test_xlsx_writes_utc_wall_clock_times(monkeypatch, tmp_path):
+    from openpyxl import load_workbook
+
+    monkeypatch.setattr(settings, "LEAD_IMPORT_SPOOL_DIR", str(tmp_path))
+    path = tmp_path / "export.xlsx"
+    path.write_bytes(encode(LeadExportFormat.XLSX, LEADS))
+    rows = list(load_workbook(path).active.iter_rows(values_only=True))
+    assert rows[0] == ("id", "name", "email", "mobile", "created_at")
+    assert rows[1] == (str(uuid.UUID(int=1)), "Ann", "ann@x.com", "+15550100", datetime(2026, 3, 1, 12, 30))
+    assert rows[2][3] is None
+    # the spooled workbook is removed once streamed
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize("export_format", [LeadExportFormat.PARQUET, LeadExportFormat.ARROW])
+def test_arrow_formats_keep_column_types(export_format):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    results = [(1, "Ann", "+15550100", "sent", None, CREATED_AT), (2, "Bob", "+15550101", "failed", "boom", CREATED_AT)]
+    data = encode(export_format, results, CAMPAIGN_RESULT_COLUMNS)
+    if export_format == LeadExportFormat.PARQUET:
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.schema.field("id").type == pa.int64()
+    assert table.schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+    assert table.column("detail").to_pylist() == [None, "boom"]
+    assert table.num_rows == 2
+
+
+class FakeStream:
+    def __init__(self, partitions):
+        self._partitions = partitions
+
+    async def partitions(self):
+        for partition in self._partitions:
+            yield partition
+
+
+def test_export_rows_streams_the_header_first_and_splits_the_first_partition(monkeypatch):
+    monkeypatch.setattr(export, "FIRST_CHUNK_ROWS", 1)
+    queried = []
+
+    class FakeSession:
+        async def stream(self, stmt):
+            queried.append(stmt)
+            return FakeStream([LEADS, LEADS])
+
+    @asynccontextmanager
+    async def read_session():
+        yield FakeSession()
+
+    monkeypatch.setattr(export, "read_session", read_session)
+
+    async def collect():
+        return [chunk async for chunk in export_rows(export.leads_query(), LEAD_COLUMNS, LeadExportFormat.CSV)]
+
+    chunks = asyncio.run(collect())
+    assert chunks[0] == b"id,name,email,mobile,created_at\r\n"
+    # the first partition goes out as its first row, then the rest
+    assert [chunk.count(b"\n") for chunk in chunks[1:]] == [1, 1, 2]
+    assert len(queried) == 1
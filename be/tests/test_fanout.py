@@ -0,0 +1,126 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import outbound
+from app.core.leads.fanout import SendSkipped, fan_out, iter_fan_out
+from app.core.outbound import TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(outbound, "time", SimpleNamespace(monotonic=clock, sleep=time.sleep, time=time.time))
+    return clock
+
+
+class CountingBucket:
+    def __init__(self):
+        self.acquired = 0
+
+    async def acquire(self) -> float:
+        self.acquired += 1
+        return 0.0
+
+
+def test_outcomes_come_back_in_item_order():
+    async def send(item):
+        await asyncio.sleep(0.001 * (5 - item))
+        if item == 1:
+            raise RuntimeError("boom")
+        if item == 2:
+            raise SendSkipped("already sent")
+        return item * 10
+
+    outcomes = asyncio.run(fan_out(range(5), send, concurrency=5, timeout=1))
+    assert [outcome.ok for outcome in outcomes] == [True, False, False, True, True]
+    assert [outcome.value for outcome in outcomes if outcome.ok] == [0, 30, 40]
+    assert outcomes[1].error == "boom" and not outcomes[1].skipped
+    assert outcomes[2].skipped and outcomes[2].error == "already sent"
+
+
+def test_concurrency_is_bounded():
+    in_flight = peak = 0
+
+    async def send(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+
+    asyncio.run(fan_out(range(20), send, concurrency=3, timeout=1))
+    assert peak == 3
+
+
+def test_a_slow_send_times_out_without_stopping_the_others():
+    async def send(item):
+        if item == 0:
+            await asyncio.sleep(3600)
+        return item
+
+    outcomes = asyncio.run(fan_out(range(3), send, concurrency=3, timeout=0.01))
+    assert outcomes[0].error == "Timed out after 0.01s"
+    assert [outcome.value for outcome in outcomes[1:]] == [1, 2]
+
+
+def test_every_send_takes_a_token():
+    bucket = CountingBucket()
+
+    async def send(item):
+        return item
+
+    asyncio.run(fan_out(range(7), send, concurrency=2, timeout=1, rate_limiter=bucket))
+    assert bucket.acquired == 7
+
+
+def test_token_bucket_spaces_sends_after_the_burst(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0.0, 0.0, 0.1, 0.2])
+    clock.advance(1)
+    assert bucket.reserve() == 0.0
+
+
+def test_token_bucket_pause_holds_every_token(clock):
+    bucket = TokenBucket(rate=0, capacity=1)
+    assert bucket.reserve() == 0.0
+    bucket.pause(5)
+    assert bucket.reserve() == pytest.approx(5)
+    clock.advance(5)
+    assert bucket.reserve() == 0.0
+
+
+def test_closing_the_iterator_cancels_sends_in_flight():
+    cancelled = []
+
+    async def send(item):
+        try:
+            if item:
+                await asyncio.sleep(3600)
+            return item
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+
+    async def first_outcome():
+        outcomes = iter_fan_out(range(3), send, concurrency=3, timeout=3600)
+        index, outcome = await outcomes.__anext__()
+        await outcomes.aclose()
+        return index, outcome
+
+    index, outcome = asyncio.run(first_outcome())
+    assert (index, outcome.value) == (0, 0)
+    assert sorted(cancelled) == [1, 2]
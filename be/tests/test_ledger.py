@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+
+from app.core.graphs.tools.siren import SirenSendError
+from app.core.leads import ledger
+from app.core.leads.fanout import SendSkipped
+from app.core.leads.ledger import ALREADY_SENT, SentLedger, definitely_unsent
+from app.core.outbound import CircuitOpenError
+
+
+class FakeSession:
+    """Stands in for an AsyncSession over ``sent_messages``, shared by every session opened."""
+
+    def __init__(self):
+        self.rows = set()
+        self.statements = 0
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def commit(self):
+        self.commits += 1
+
+
+class FakeQuery:
+    def __init__(self, run):
+        self._run = run
+
+    async def execute(self, db, **params):
+        db.statements += 1
+        return self._run(db, **params)
+
+
+class FakeResult(list):
+    def first(self):
+        return self[0] if self else None
+
+
+def _reserve(db, scope, channel, recipient):
+    key = (scope, channel, recipient)
+    if key in db.rows:
+        return FakeResult([])
+    db.rows.add(key)
+    return FakeResult([(len(db.rows),)])
+
+
+def _release(db, scope, channel, recipient):
+    db.rows.discard((scope, channel, recipient))
+
+
+def _reserve_many(db, scopes, channels, recipients):
+    inserted = []
+    for key in zip(scopes, channels, recipients):
+        if key not in db.rows:
+            db.rows.add(key)
+            inserted.append(key)
+    return FakeResult(inserted)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(ledger, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(ledger, "_RESERVE", FakeQuery(_reserve))
+    monkeypatch.setattr(ledger, "_RELEASE", FakeQuery(_release))
+    monkeypatch.setattr(ledger, "_RESERVE_MANY", FakeQuery(_reserve_many))
+    return session
+
+
+def test_seen_is_an_lru_of_remembered_keys():
+    sent = SentLedger(cache_size=2)
+    sent.remember("s", "sms", "+1")
+    sent.remember("s", "sms", "+2")
+    assert sent.seen("s", "sms", "+1")
+    sent.remember("s", "sms", "+3")
+    assert sent.seen("s", "sms", "+1")
+    assert not sent.seen("s", "sms", "+2")
+    assert not sent.seen("s", "email", "+1")
+
+
+def test_reserve_claims_a_send_once(db):
+    sent = SentLedger(cache_size=10)
+    assert asyncio.run(sent.reserve("s", "sms", "+1"))
+    assert db.rows == {("s", "sms", "+1")}
+
+    statements = db.statements
+    assert not asyncio.run(sent.reserve("s", "sms", "+1"))
+    assert db.statements == statements  # answered from the cache
+
+    # another process finds the row instead
+    assert not asyncio.run(SentLedger(cache_size=10).reserve("s", "sms", "+1"))
+
+
+def test_release_lets_the_send_be_reserved_again(db):
+    sent = SentLedger(cache_size=10)
+    asyncio.run(sent.reserve("s", "sms", "+1"))
+    asyncio.run(sent.release("s", "sms", "+1"))
+    assert not sent.seen("s", "sms", "+1")
+    assert db.rows == set()
+    assert asyncio.run(sent.reserve("s", "sms", "+1"))
+
+
+def test_reserve_many_returns_only_the_keys_it_reserved(db):
+    sent = SentLedger(cache_size=10)
+    db.rows.add(("s", "sms", "+1"))
+    keys = {("s", "sms", "+1"), ("s", "sms", "+2")}
+    assert asyncio.run(sent.reserve_many(db, keys)) == {("s", "sms", "+2")}
+    assert asyncio.run(sent.reserve_many(db, keys)) == set()
+
+
+LEADS = [("Ann", "+1"), ("Bob", "+2")]
+
+
+def run_guarded(sent, send, index=0):
+    guarded = sent.guard(send, "s", "sms", LEADS)
+    return asyncio.run(guarded(index))
+
+
+def test_guard_sends_once(db):
+    sent = SentLedger(cache_size=10)
+    calls = []
+
+    async def send(index):
+        calls.append(index)
+        return "ok"
+
+    assert run_guarded(sent, send) == "ok"
+    with pytest.raises(SendSkipped, match=ALREADY_SENT):
+        run_guarded(sent, send)
+    assert calls == [0]
+    assert db.rows == {("s", "sms", "+1")}
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ValueError("template did not render"),
+        SirenSendError("Siren returned 400: bad number", status_code=400, rejected=True),
+        CircuitOpenError("siren circuit is open; failing fast", "siren"),
+    ],
+)
+def test_guard_releases_sends_that_did_not_go_out(db, error):
+    sent = SentLedger(cache_size=10)
+
+    async def send(index):
+        raise error
+
+    with pytest.raises(type(error)):
+        run_guarded(sent, send)
+    assert db.rows == set()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        SirenSendError("Siren returned 502: bad gateway", status_code=502),
+        SirenSendError("Siren request failed: ReadTimeout()"),
+        RuntimeError("agent toolkit failed"),
+    ],
+)
+def test_guard_keeps_sends_that_may_have_gone_out(db, error):
+    sent = SentLedger(cache_size=10)
+
+    async def send(index):
+        raise error
+
+    with pytest.raises(type(error)):
+        run_guarded(sent, send)
+    assert db.rows == {("s", "sms", "+1")}
+
+
+def test_guard_keeps_the_reservation_of_a_timed_out_send(db):
+    sent = SentLedger(cache_size=10)
+
+    async def send(index):
+        await asyncio.sleep(3600)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(sent.guard(send, "s", "sms", LEADS)(0), 0.01)
+
+    asyncio.run(scenario())
+    assert db.rows == {("s", "sms", "+1")}
+
+
+def test_definitely_unsent():
+    assert definitely_unsent(SirenSendError("Siren returned 422", status_code=422, rejected=True))
+    assert not definitely_unsent(SirenSendError("Siren returned 500", status_code=500))
+    assert definitely_unsent(CircuitOpenError("open", "siren"))
+    assert not definitely_unsent(asyncio.CancelledError())
+    assert not definitely_unsent(TimeoutError())
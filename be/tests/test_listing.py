@@ -0,0 +1,43 @@
+import base64
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.leads.listing import InvalidCursor, _like_pattern, decode_cursor, encode_cursor
+from app.schemas.leads import LeadSearchMatch
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    lead_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, lead_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, lead_id)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"not json",
+        b'["2026-03-01T12:00:00+00:00"]',
+        b'["2026-03-01T12:00:00+00:00", "not-a-uuid"]',
+        b'["yesterday", "00000000-0000-0000-0000-000000000000"]',
+        b"42",
+    ],
+)
+def test_malformed_cursors_are_rejected(payload):
+    cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_undecodable_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("%%%")
+
+
+def test_search_patterns_escape_wildcards():
+    assert _like_pattern("ann", LeadSearchMatch.PREFIX) == "ann%"
+    assert _like_pattern("50%_off\\", LeadSearchMatch.PREFIX) == "50\\%\\_off\\\\%"
+    assert _like_pattern("ann", LeadSearchMatch.CONTAINS) == "%ann%"
@@ -0,0 +1,64 @@
+import httpx
+import pytest
+
+from app.core.graphs.tools.linkedin.lix_client import LixClient
+from app.core.outbound import ProviderUnavailable
+
+
+def response(status_code, **kwargs) -> httpx.Response:
+    return httpx.Response(status_code, request=httpx.Request("GET", "https://lix.test/v1/person"), **kwargs)
+
+
+def client(handler) -> LixClient:
+    lix = LixClient("key", "https://lix.test", max_connections=2, connect_timeout=1, read_timeout=1, http2=False)
+    lix._sync_client = httpx.Client(base_url="https://lix.test", transport=httpx.MockTransport(handler))
+    return lix
+
+
+def test_success_returns_the_json():
+    assert LixClient._result(response(200, json={"name": "Ann"}), "GET") == {"name": "Ann"}
+
+
+@pytest.mark.parametrize("status_code", [400, 404])
+def test_client_errors_are_returned_to_the_caller(status_code):
+    result = LixClient._result(response(status_code, json={"message": "not found"}), "GET")
+    assert result["status_code"] == status_code
+    assert str(status_code) in result["error"]
+
+
+def test_invalid_json_is_returned_as_an_error():
+    result = LixClient._result(response(200, text="<html>"), "GET")
+    assert result["status_code"] == 200
+    assert "error" in result
+
+
+@pytest.mark.parametrize(
+    "status_code, method, message",
+    [
+        (429, "GET", "Lix returned 429 after retries"),
+        (429, "POST", "Lix returned 429 after retries"),
+        (503, "GET", "Lix returned 503 after retries"),
+        (503, "POST", "Lix returned 503"),
+    ],
+)
+def test_throttling_and_server_errors_raise(status_code, method, message):
+    with pytest.raises(ProviderUnavailable) as error:
+        LixClient._result(response(status_code), method)
+    assert str(error.value) == message
+    assert error.value.status_code == status_code
+    assert error.value.provider == "lix"
+
+
+@pytest.mark.parametrize("method, retried", [("GET", True), ("POST", False)])
+def test_transport_errors_raise(method, retried):
+    def handler(request):
+        raise httpx.ConnectError("refused")
+
+    with pytest.raises(ProviderUnavailable) as error:
+        client(handler).request_blocking("/v1/person", {"id": "ann"}, method=method)
+    assert ("after retries" in str(error.value)) is retried
+
+
+def test_unsupported_method_is_refused():
+    with pytest.raises(ValueError):
+        client(lambda request: pytest.fail("sent")).request_blocking("/v1/person", method="DELETE")
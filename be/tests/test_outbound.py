@@ -0,0 +1,146 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from app.core import outbound
+from app.core.outbound import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, ProviderGovernor
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(outbound, "time", SimpleNamespace(monotonic=clock, sleep=time.sleep, time=time.time))
+    return clock
+
+
+def make_governor(**overrides) -> ProviderGovernor:
+    options = dict(
+        rate=0, burst=1, max_concurrency=8, max_retries=2, failure_threshold=2, reset_seconds=30
+    )
+    options.update(overrides)
+    return ProviderGovernor("test", **options)
+
+
+def answer(governor: ProviderGovernor, status_code: int, retry_after: Optional[str] = None) -> None:
+    with governor.call_blocking() as call:
+        call.observe(status_code, retry_after)
+
+
+def fail(governor: ProviderGovernor) -> None:
+    with pytest.raises(ConnectionError):
+        with governor.call_blocking():
+            raise ConnectionError("reset")
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    governor = make_governor()
+    answer(governor, 503)
+    assert governor.snapshot()["circuit"] == CLOSED
+    fail(governor)
+    assert governor.snapshot()["circuit"] == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        answer(governor, 200)
+    assert governor.snapshot()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    governor = make_governor()
+    answer(governor, 503)
+    answer(governor, 200)
+    answer(governor, 503)
+    assert governor.snapshot()["circuit"] == CLOSED
+
+
+def test_half_open_lets_one_probe_through(clock):
+    governor = make_governor()
+    answer(governor, 503)
+    answer(governor, 503)
+    clock.advance(30)
+    assert governor.snapshot()["circuit"] == HALF_OPEN
+
+    with governor.call_blocking() as probe:
+        with pytest.raises(CircuitOpenError):
+            answer(governor, 200)
+        probe.observe(200)
+    assert governor.snapshot()["circuit"] == CLOSED
+    answer(governor, 200)
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    governor = make_governor()
+    answer(governor, 503)
+    answer(governor, 503)
+    clock.advance(30)
+
+    fail(governor)
+    assert governor.snapshot()["circuit"] == OPEN
+    assert governor.snapshot()["circuit_opened"] == 2
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        answer(governor, 200)
+
+
+def test_only_the_probe_ends_the_probe(clock):
+    governor = make_governor()
+
+    async def scenario():
+        entered = asyncio.Event()
+
+        async def straggler():
+            async with governor.call():
+                entered.set()
+                await asyncio.sleep(3600)
+
+        task = asyncio.create_task(straggler())
+        await entered.wait()
+        answer(governor, 503)
+        answer(governor, 503)
+        clock.advance(30)
+        with governor.call_blocking() as probe:
+            # a call from before the circuit opened giving its slot back must not admit a second probe
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            with pytest.raises(CircuitOpenError):
+                answer(governor, 200)
+            probe.observe(200)
+
+    asyncio.run(scenario())
+    assert governor.snapshot()["circuit"] == CLOSED
+    assert governor.snapshot()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_limit_halves_on_throttling_and_server_errors(clock, status_code):
+    governor = make_governor(failure_threshold=10)
+    answer(governor, status_code, "0")
+    assert governor.snapshot()["concurrency_limit"] == 4
+
+    # at most once per DECREASE_INTERVAL
+    answer(governor, status_code, "0")
+    assert governor.snapshot()["concurrency_limit"] == 4
+    clock.advance(outbound.DECREASE_INTERVAL)
+    answer(governor, status_code, "0")
+    assert governor.snapshot()["concurrency_limit"] == 2
+
+
+def test_limit_grows_back_on_success(clock):
+    governor = make_governor()
+    answer(governor, 503)
+    for _ in range(30):
+        answer(governor, 200)
+    assert governor.snapshot()["concurrency_limit"] == 8
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from openpyxl import Workbook
+
+from app.core.config import settings
+from app.core.leads import parsing
+from app.core.leads.importer import LeadImportError, LeadRow
+from app.core.leads.parsing import workbook_batches
+
+
+@pytest.fixture(autouse=True)
+def inline_parsing(monkeypatch):
+    monkeypatch.setattr(settings, "LEAD_IMPORT_PARSER_PROCESSES", 0)
+
+
+def write_workbook(path, *rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def collect(path, batch_size):
+    async def run():
+        return [batch async for batch in workbook_batches(path, batch_size)]
+
+    return asyncio.run(run())
+
+
+def test_inline_mode_streams_batches_without_the_pool(tmp_path):
+    path = write_workbook(
+        tmp_path / "leads.xlsx",
+        ("Lead Name", "Lead Email", "Lead Mobile"),
+        ("Ann", " ann@x.com ", "+15550100"),
+        ("Bob", "bob@x.com", None),
+        (None, None, None),
+        ("Cat", "cat@x.com", 15550102),
+    )
+    batches = collect(path, batch_size=2)
+    assert batches == [
+        [LeadRow(2, "Ann", "ann@x.com", "+15550100"), LeadRow(3, "Bob", "bob@x.com", None)],
+        [LeadRow(5, "Cat", "cat@x.com", "15550102")],
+    ]
+    assert parsing._pool is None
+
+
+def test_headers_match_plain_names_in_any_case_and_order(tmp_path):
+    path = write_workbook(tmp_path / "leads.xlsx", ("EMAIL", "name"), ("ann@x.com", "Ann"))
+    assert collect(path, batch_size=10) == [[LeadRow(2, "Ann", "ann@x.com", None)]]
+
+
+def test_missing_required_column_fails(tmp_path):
+    path = write_workbook(tmp_path / "leads.xlsx", ("Lead Name", "Phone"), ("Ann", "+15550100"))
+    with pytest.raises(LeadImportError, match="lead email"):
+        collect(path, batch_size=10)
+
+
+def test_empty_sheet_fails_on_the_missing_header(tmp_path):
+    path = write_workbook(tmp_path / "leads.xlsx")
+    with pytest.raises(LeadImportError):
+        collect(path, batch_size=10)
@@ -0,0 +1,53 @@
+import httpx
+import pytest
+
+from app.core.graphs.tools.siren import SirenMessage, SirenSendError
+from app.core.graphs.tools.siren.siren import SirenMessagingClient
+from app.core.outbound import CircuitOpenError, ProviderUnavailable
+
+
+def client(handler) -> SirenMessagingClient:
+    siren = SirenMessagingClient("key", "https://siren.test", max_concurrency=2, timeout=1)
+    siren._sync_client = httpx.Client(base_url="https://siren.test", transport=httpx.MockTransport(handler))
+    return siren
+
+
+def send(handler) -> str:
+    return client(handler).send_blocking(SirenMessage("+15550100", "SMS", "hi"))
+
+
+def test_success_returns_the_notification_id():
+    assert send(lambda request: httpx.Response(200, json={"data": {"notificationId": "n-1"}})) == "n-1"
+
+
+@pytest.mark.parametrize("status_code, rejected", [(400, True), (429, True), (500, False), (503, False)])
+def test_error_responses_are_rejected_only_for_4xx(status_code, rejected):
+    with pytest.raises(SirenSendError) as error:
+        send(lambda request: httpx.Response(status_code, json={"error": {"message": "nope"}}))
+    assert error.value.status_code == status_code
+    assert error.value.rejected is rejected
+    assert "nope" in str(error.value)
+
+
+@pytest.mark.parametrize(
+    "raised, rejected",
+    [
+        (httpx.ConnectError("refused"), True),
+        (httpx.ConnectTimeout("slow"), True),
+        (httpx.ReadTimeout("slow"), False),
+        (CircuitOpenError("siren circuit is open; failing fast", "siren"), True),
+        (ProviderUnavailable("siren failed", "siren", status_code=502), False),
+    ],
+)
+def test_request_errors_are_rejected_only_if_nothing_was_sent(raised, rejected):
+    def handler(request):
+        raise raised
+
+    with pytest.raises(SirenSendError) as error:
+        send(handler)
+    assert error.value.rejected is rejected
+
+
+def test_unsupported_channel_fails_before_sending():
+    with pytest.raises(ValueError):
+        client(lambda request: pytest.fail("sent")).send_blocking(SirenMessage("a@x.com", "FAX", "hi"))
@@ -0,0 +1,68 @@
+import csv
+
+from app.core.config import settings
+from app.core.leads.importer import LeadRow
+from app.core.leads.validation import INVALID_EMAIL, INVALID_MOBILE, MISSING_EMAIL, LeadValidator, report_path
+
+
+def row(number, email, mobile=None):
+    return LeadRow(number, f"Lead {number}", email, mobile)
+
+
+def test_valid_rows_pass_with_mobile_formatting_removed():
+    validator = LeadValidator()
+    valid = validator.validate([row(2, "ann@example.com", "+44 (20) 7946-0958"), row(3, "bob@example.co.uk")])
+    assert [(r.email, r.mobile) for r in valid] == [("ann@example.com", "+442079460958"), ("bob@example.co.uk", None)]
+    assert validator.invalid_rows == 0
+
+
+def test_invalid_rows_are_dropped_and_reported_by_reason():
+    validator = LeadValidator()
+    valid = validator.validate(
+        [
+            row(2, "ann@example.com"),
+            row(3, ""),
+            row(4, "not-an-email"),
+            row(5, "cat@example.com", "07946 0958"),
+            row(6, "bad", "12345"),
+        ]
+    )
+    assert [r.row_number for r in valid] == [2]
+    assert validator.invalid_rows == 4
+    assert validator.reasons == {MISSING_EMAIL: 1, INVALID_EMAIL: 2, INVALID_MOBILE: 2}
+    assert [(e.row, e.field) for e in validator.errors] == [
+        (3, "email"),
+        (4, "email"),
+        (5, "mobile"),
+        (6, "email"),
+        (6, "mobile"),
+    ]
+
+
+def test_values_with_newlines_are_checked_one_by_one():
+    validator = LeadValidator()
+    valid = validator.validate([row(2, "ann@example.com\nbob@example.com"), row(3, "cat@example.com")])
+    assert [r.row_number for r in valid] == [3]
+    assert validator.errors[0].row == 2
+
+
+def test_reported_errors_are_capped(monkeypatch):
+    monkeypatch.setattr(settings, "LEAD_VALIDATION_MAX_REPORTED", 2)
+    validator = LeadValidator()
+    validator.validate([row(number, "bad") for number in range(2, 7)])
+    assert validator.invalid_rows == 5
+    assert len(validator.errors) == 2
+
+
+def test_report_file_lists_every_failure(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LEAD_FILE_STORE_DIR", str(tmp_path))
+    validator = LeadValidator(write_report=True)
+    validator.validate([row(2, "bad"), row(3, "ann@example.com", "123")])
+    validator.close()
+
+    with open(report_path(validator.report_id), newline="") as f:
+        assert list(csv.reader(f)) == [
+            ["row", "field", "reason", "value"],
+            ["2", "email", INVALID_EMAIL, "bad"],
+            ["3", "mobile", INVALID_MOBILE, "123"],
+        ]